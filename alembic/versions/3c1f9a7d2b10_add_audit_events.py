@@ -0,0 +1,39 @@
+"""add audit events
+
+Revision ID: 3c1f9a7d2b10
+Revises: e56e7137342b
+Create Date: 2026-10-19 00:00:00.000000
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = "3c1f9a7d2b10"
+down_revision: Union[str, None] = "e56e7137342b"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "audit_events",
+        sa.Column("id", sa.BigInteger().with_variant(sa.Integer(), "sqlite"), primary_key=True, autoincrement=True),
+        sa.Column("created_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("event_type", sa.String(length=32), nullable=False),
+        sa.Column("success", sa.Boolean(), nullable=False, server_default=sa.true()),
+        sa.Column("user_id", sa.Integer(), nullable=True),
+        sa.Column("session_id", sa.String(length=64), nullable=True),
+        sa.Column("ip", sa.String(length=64), nullable=True),
+        sa.Column("user_agent", sa.String(length=255), nullable=True),
+        sa.Column("detail", sa.String(length=255), nullable=True),
+    )
+    op.create_index("ix_audit_events_created_at_id", "audit_events", ["created_at", "id"], unique=False)
+    op.create_index("ix_audit_events_user_id_created_at", "audit_events", ["user_id", "created_at"], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index("ix_audit_events_user_id_created_at", table_name="audit_events")
+    op.drop_index("ix_audit_events_created_at_id", table_name="audit_events")
+    op.drop_table("audit_events")
@@ -0,0 +1,31 @@
+"""add user shard directory
+
+Revision ID: 7b2e4c9d1a36
+Revises: 3c1f9a7d2b10
+Create Date: 2026-10-19 00:00:00.000000
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = "7b2e4c9d1a36"
+down_revision: Union[str, None] = "3c1f9a7d2b10"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "user_shards",
+        sa.Column("user_id", sa.Integer(), primary_key=True, autoincrement=True),
+        sa.Column("email", sa.String(length=255), nullable=False),
+        sa.Column("shard", sa.String(length=32), nullable=False),
+    )
+    op.create_index("ix_user_shards_email", "user_shards", ["email"], unique=True)
+
+
+def downgrade() -> None:
+    op.drop_index("ix_user_shards_email", table_name="user_shards")
+    op.drop_table("user_shards")
@@ -0,0 +1,28 @@
+"""refresh_tokens (user_id, revoked_at, last_used_at) index
+
+Revision ID: 9d4f0b6e2c51
+Revises: 7b2e4c9d1a36
+Create Date: 2026-10-19 00:00:00.000000
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+revision: str = "9d4f0b6e2c51"
+down_revision: Union[str, None] = "7b2e4c9d1a36"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        "ix_refresh_tokens_user_id_revoked_at_last_used_at",
+        "refresh_tokens",
+        ["user_id", "revoked_at", "last_used_at"],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_refresh_tokens_user_id_revoked_at_last_used_at", table_name="refresh_tokens")
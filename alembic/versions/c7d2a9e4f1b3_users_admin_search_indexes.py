@@ -0,0 +1,27 @@
+"""users indexes for admin listing and search
+
+Revision ID: c7d2a9e4f1b3
+Revises: 5e8a1c3f7b92
+Create Date: 2026-10-19 00:00:00.000000
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+revision: str = "c7d2a9e4f1b3"
+down_revision: Union[str, None] = "5e8a1c3f7b92"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index("ix_users_created_at_id", "users", ["created_at", "id"], unique=False)
+    op.create_index("ix_users_full_name", "users", ["full_name"], unique=False)
+    op.create_index("ix_users_phone", "users", ["phone"], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index("ix_users_phone", table_name="users")
+    op.drop_index("ix_users_full_name", table_name="users")
+    op.drop_index("ix_users_created_at_id", table_name="users")
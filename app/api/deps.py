@@ -1,8 +1,41 @@
-from app.db.session import SessionLocal
+import anyio.to_thread
+from fastapi import Depends
+from sqlalchemy.orm import Session
+
+from app.db.session import ReadSessionLocal, SessionLocal, replica_router
 
 def get_db():
     db = SessionLocal()
     try:
         yield db
     finally:
+        close_read_db(db)
         db.close()
+
+
+def close_read_db(db: Session) -> None:
+    """Close the replica session get_read_db attached to this request's primary session."""
+    read_db = db.info.pop("read_db", None)
+    if read_db is not None:
+        read_db.close()
+
+
+async def get_read_db(db: Session = Depends(get_db)) -> Session:
+    """
+    Session for read-only dependencies: a replica when one is configured and
+    healthy, otherwise the request's primary session (same object as get_db).
+
+    Not a generator: without replicas this is one call on the event loop (no
+    threadpool hop, no exit stack entry). The replica session is closed by
+    get_db's teardown.
+    """
+    if not replica_router.enabled:
+        return db
+    replica = await anyio.to_thread.run_sync(replica_router.pick)  # lag probe = network
+    if replica is None:
+        return db
+
+    read_db = ReadSessionLocal(bind=replica)
+    read_db.info["replica"] = True
+    db.info["read_db"] = read_db
+    return read_db
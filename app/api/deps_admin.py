@@ -0,0 +1,21 @@
+import secrets
+
+from fastapi import HTTPException, Request
+
+from app.core.config import settings
+
+
+def admin_key_ok(request: Request) -> bool:
+    # เหมือน docs guard: มี ADMIN_KEY => ต้องส่ง x-admin-key ให้ตรง, ไม่มี key => เปิดเฉพาะ dev
+    admin_key = settings.ADMIN_KEY
+    if not admin_key:
+        return settings.ENV == "dev"
+
+    provided = request.headers.get("x-admin-key") or ""
+    return secrets.compare_digest(provided, admin_key)
+
+
+def require_admin_key(request: Request) -> None:
+    if not admin_key_ok(request):
+        # behave like not found (don't advertise admin endpoints)
+        raise HTTPException(status_code=404, detail="Not found")
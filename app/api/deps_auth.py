@@ -1,36 +1,108 @@
-from fastapi import Depends, HTTPException
+from fastapi import Depends, HTTPException, Request
 from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
 from sqlalchemy.orm import Session
 
-from app.api.deps import get_db
+from app.api.deps import get_db, get_read_db
+from app.core.config import settings
+from app.core.principal import Principal
+from app.core.telemetry import session_telemetry
 from app.core.tokens import decode_token
-from app.crud.user import get_user
+from app.crud.user import get_principal, get_user, get_user_profile
+from app.models.user import User
 
 bearer_scheme = HTTPBearer(auto_error=False)
 
-def get_current_user(
-    creds: HTTPAuthorizationCredentials | None = Depends(bearer_scheme),
-    db: Session = Depends(get_db),
-):
-    if creds is None or creds.scheme.lower() != "bearer":
-        raise HTTPException(status_code=401, detail="Not authenticated")
-
-    token = creds.credentials
 
+def access_token_claims(token: str) -> tuple[int, str | None]:
+    """(user_id, session_id) of a valid access token; ValueError(detail) otherwise."""
     try:
         payload = decode_token(token)
     except ValueError:
-        raise HTTPException(status_code=401, detail="Invalid token")
+        raise ValueError("Invalid token")
 
     if payload.get("type") != "access":
-        raise HTTPException(status_code=401, detail="Invalid token type")
+        raise ValueError("Invalid token type")
 
     sub = payload.get("sub")
-    if not sub:
-        raise HTTPException(status_code=401, detail="Invalid token subject")
+    if not isinstance(sub, str) or not sub.isdigit():
+        raise ValueError("Invalid token subject")
+
+    return int(sub), payload.get("sid")
+
+
+def _access_token_claims(creds: HTTPAuthorizationCredentials | None) -> tuple[int, str | None]:
+    if creds is None or creds.scheme.lower() != "bearer":
+        raise HTTPException(status_code=401, detail="Not authenticated")
+
+    try:
+        return access_token_claims(creds.credentials)
+    except ValueError as e:
+        raise HTTPException(status_code=401, detail=str(e))
+
+
+def _touch_session(request: Request, user_id: int, sid: str | None) -> None:
+    # access log อ่านจาก request.state
+    request.state.user_id, request.state.session_id = user_id, sid
+    if sid and settings.SESSION_TELEMETRY_ENABLED:
+        # last seen ของ session: เก็บใน buffer แล้ว flush เป็น batch (ไม่เขียน DB ทุก request)
+        session_telemetry.touch(
+            user_id,
+            sid,
+            ip=request.client.host if request.client else None,
+            user_agent=request.headers.get("user-agent"),
+        )
+
 
-    user = get_user(db, int(sub))
+def get_current_user(
+    request: Request,
+    creds: HTTPAuthorizationCredentials | None = Depends(bearer_scheme),
+    db: Session = Depends(get_read_db),
+    primary_db: Session = Depends(get_db),
+) -> Principal:
+    """Read-only caller identity (id/email/is_active), no ORM instance."""
+    user_id, sid = _access_token_claims(creds)
+
+    principal = get_principal(db, user_id, sid)
+    if principal is None and db is not primary_db:
+        # replica ยังตามไม่ทัน (เพิ่ง register) => อ่านซ้ำจาก primary
+        principal = get_principal(primary_db, user_id, sid)
+    if not principal or not principal.is_active:
+        raise HTTPException(status_code=401, detail="User not found/inactive")
+
+    _touch_session(request, user_id, sid)
+    return principal
+
+
+def get_current_user_entity(
+    request: Request,
+    creds: HTTPAuthorizationCredentials | None = Depends(bearer_scheme),
+    db: Session = Depends(get_db),
+) -> User:
+    """ORM `User` for endpoints that modify the user (edit-profile, change-password)."""
+    user_id, sid = _access_token_claims(creds)
+
+    user = get_user(db, user_id)
     if not user or not user.is_active:
         raise HTTPException(status_code=401, detail="User not found/inactive")
 
+    _touch_session(request, user_id, sid)
     return user
+
+
+def get_current_user_profile(
+    request: Request,
+    creds: HTTPAuthorizationCredentials | None = Depends(bearer_scheme),
+    db: Session = Depends(get_read_db),
+    primary_db: Session = Depends(get_db),
+) -> dict:
+    """UserOut columns only, one query (view-profile)."""
+    user_id, sid = _access_token_claims(creds)
+
+    profile = get_user_profile(db, user_id)
+    if profile is None and db is not primary_db:
+        profile = get_user_profile(primary_db, user_id)  # replica ยังไม่มี user นี้
+    if not profile or not profile["is_active"]:
+        raise HTTPException(status_code=401, detail="User not found/inactive")
+
+    _touch_session(request, user_id, sid)
+    return profile
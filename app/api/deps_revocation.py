@@ -0,0 +1,17 @@
+import secrets
+
+from fastapi import HTTPException, Request
+
+from app.core.config import settings
+
+
+def require_revocation_feed_key(request: Request) -> None:
+    # credential ของ subscriber (resource server): อ่าน feed ได้อย่างเดียว, แยกจาก ADMIN_KEY
+    # มี REVOCATION_FEED_KEY => ต้องส่ง x-revocation-key ให้ตรง, ไม่มี key => เปิดเฉพาะ dev
+    feed_key = settings.REVOCATION_FEED_KEY
+    if not feed_key:
+        ok = settings.ENV == "dev"
+    else:
+        ok = secrets.compare_digest(request.headers.get("x-revocation-key") or "", feed_key)
+    if not ok:
+        raise HTTPException(status_code=404, detail="Not found")
@@ -0,0 +1,285 @@
+import base64
+import json
+import logging
+from datetime import datetime, timezone
+from typing import Literal, Optional
+
+import anyio.to_thread
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.orm import Session
+from starlette.responses import PlainTextResponse, Response, StreamingResponse
+
+from app.api.deps import get_db, get_read_db
+from app.api.deps_admin import require_admin_key
+from app.api.verify_socket import verify_socket
+from app.core.admission import admission
+from app.core import audit
+from app.core.access_log import access_log
+from app.core.audit import audit_log
+from app.core.config import settings
+from app.core.limiter import limiter as rate_limiter
+from app.core.recorder import traffic_recorder
+from app.core.revocation import revocation_feed
+from app.core.profiler import ProfilerBusy, SamplingProfiler, profile_worker, request_profiles
+from app.core.telemetry import session_telemetry
+from app.core.timing import slow_traces, span
+from app.core.warmup import warmup
+from app.crud.audit_event import list_events
+from app.crud.refresh_token import revoke_all_for_users
+from app.crud.revocation_event import record_revocations
+from app.crud.user import force_password_reset_many, iter_users, list_users, resolve_user_ids, set_active_many
+from app.db.session import pool_capacity_warnings, pool_stats, replica_router
+from app.schemas.audit import AuditEventPage
+from app.schemas.user import BulkChunkResult, BulkUsersRequest, BulkUsersResult, UserPage
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(prefix="/admin", tags=["Admin"], dependencies=[Depends(require_admin_key)])
+
+
+def _profile_response(profiler: SamplingProfiler, fmt: str) -> Response:
+    headers = {
+        "X-Profile-Samples": str(profiler.sample_count),
+        "X-Profile-Interval-Ms": f"{profiler.interval * 1000:g}",
+    }
+    if fmt == "pstats":
+        return Response(
+            profiler.pstats_dump(),
+            media_type="application/octet-stream",
+            headers={**headers, "Content-Disposition": 'attachment; filename="profile.pstats"'},
+        )
+    return PlainTextResponse(profiler.collapsed(), headers=headers)
+
+
+def _naive_utc(dt: datetime | None) -> datetime | None:
+    # เวลาใน DB เก็บเป็น UTC แบบ naive
+    if dt is None or dt.tzinfo is None:
+        return dt
+    return dt.astimezone(timezone.utc).replace(tzinfo=None)
+
+
+def _encode_cursor(created_at: datetime, event_id: int) -> str:
+    raw = f"{created_at.replace(tzinfo=None).isoformat()}|{event_id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def _decode_cursor(cursor: str) -> tuple[datetime, int]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        ts, event_id = raw.split("|", 1)
+        return datetime.fromisoformat(ts), int(event_id)
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+@router.get("/traces/slow")
+def list_slow_traces():
+    return {"items": slow_traces.snapshot()}
+
+
+@router.delete("/traces/slow")
+def clear_slow_traces():
+    slow_traces.clear()
+    return {"status": "ok"}
+
+
+@router.get("/session-telemetry")
+def session_telemetry_metrics():
+    return session_telemetry.metrics()
+
+
+@router.get("/admission")
+def admission_metrics():
+    return admission.metrics()
+
+
+@router.get("/pool")
+async def pool_metrics():
+    # async: อ่าน threadpool limiter ได้จาก event loop เท่านั้น
+    limiter = anyio.to_thread.current_default_thread_limiter()
+    return {
+        "engines": [stats.snapshot() for stats in pool_stats.values()],
+        "threadpool": {"total_tokens": limiter.total_tokens, "borrowed_tokens": limiter.borrowed_tokens},
+        "workers": settings.WEB_CONCURRENCY,
+        "capacity_warnings": pool_capacity_warnings,
+    }
+
+
+@router.get("/rate-limit")
+def rate_limit_metrics():
+    storage = rate_limiter.limiter.storage
+    metrics = storage.metrics() if hasattr(storage, "metrics") else {}
+    return {"storage": type(storage).__name__, "enabled": rate_limiter.enabled, **metrics}
+
+
+@router.get("/replicas")
+def replica_metrics():
+    return replica_router.metrics()
+
+
+@router.get("/verify-socket")
+def verify_socket_metrics():
+    return verify_socket.metrics()
+
+
+@router.get("/traffic-recorder")
+def traffic_recorder_metrics():
+    return {"enabled": settings.TRAFFIC_RECORD_ENABLED, **traffic_recorder.metrics()}
+
+
+@router.get("/access-log")
+def access_log_metrics():
+    return {"enabled": settings.ACCESS_LOG_ENABLED, **access_log.metrics()}
+
+
+@router.get("/warmup")
+def warmup_metrics():
+    return {"enabled": settings.WARMUP_ENABLED, **warmup.metrics()}
+
+
+@router.get("/audit-log")
+def audit_log_metrics():
+    return audit_log.metrics()
+
+
+@router.get("/audit-events", response_model=AuditEventPage)
+def audit_events(
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    user_id: Optional[int] = None,
+    event_type: Optional[str] = None,
+    cursor: Optional[str] = None,
+    limit: int = Query(default=100, ge=1, le=1000),
+    db: Session = Depends(get_db),
+):
+    since, until = _naive_utc(since), _naive_utc(until)
+    after = _decode_cursor(cursor) if cursor else None
+
+    items = list_events(db, since=since, until=until, after=after, user_id=user_id, event_type=event_type, limit=limit)
+    next_cursor = _encode_cursor(items[-1].created_at, items[-1].id) if len(items) == limit else None
+    return AuditEventPage(items=items, next_cursor=next_cursor)
+
+
+UserOrder = Literal["id", "created_at"]
+
+
+def _user_filters(
+    email_prefix: Optional[str] = Query(default=None, min_length=1, max_length=255),
+    full_name: Optional[str] = Query(default=None, min_length=1, max_length=255, description="prefix"),
+    phone: Optional[str] = Query(default=None, min_length=1, max_length=50, description="prefix"),
+) -> dict:
+    return {"email_prefix": email_prefix, "full_name": full_name, "phone": phone}
+
+
+@router.get("/users", response_model=UserPage)
+def users(
+    order: UserOrder = "id",
+    cursor: Optional[str] = None,
+    limit: int = Query(default=100, ge=1, le=1000),
+    filters: dict = Depends(_user_filters),
+    db: Session = Depends(get_read_db),
+):
+    # keyset เท่านั้น (ไม่มี page/offset) และอ่านจาก replica ถ้ามี
+    after = _decode_cursor(cursor) if cursor else None
+    items = list_users(db, order=order, after=after, limit=limit, **filters)
+    next_cursor = _encode_cursor(items[-1]["created_at"], items[-1]["id"]) if len(items) == limit else None
+    return UserPage(items=items, next_cursor=next_cursor)
+
+
+def _json_default(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+
+@router.get("/users/export")
+def users_export(
+    order: UserOrder = "id",
+    filters: dict = Depends(_user_filters),
+    db: Session = Depends(get_read_db),
+):
+    """Every matching user as NDJSON (UserOut columns), streamed 1000 rows per query."""
+    def lines():
+        for row in iter_users(db, order=order, **filters):
+            yield json.dumps(row, default=_json_default, separators=(",", ":")) + "\n"
+
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+
+def _bulk_chunk(db: Session, action: str, user_ids: list[int]) -> tuple[int, int]:
+    """Apply action to existing user ids (flush only); returns (users updated, sessions revoked)."""
+    if action == "reactivate":
+        return set_active_many(db, user_ids, True), 0
+    updated = 0
+    if action == "deactivate":
+        updated = set_active_many(db, user_ids, False)
+    elif action == "force_password_reset":
+        updated = force_password_reset_many(db, user_ids)
+    revoked = revoke_all_for_users(db, user_ids)
+    # access token ที่ออกไปแล้วยังใช้ได้จนหมดอายุ => แจ้ง resource server ผ่าน revocation feed
+    record_revocations(db, user_ids, f"admin_{action}")
+    return updated, revoked
+
+
+@router.post("/users/bulk", response_model=BulkUsersResult)
+def bulk_users(payload: BulkUsersRequest, db: Session = Depends(get_db)):
+    """
+    deactivate / reactivate / revoke_sessions / force_password_reset for many
+    users: ADMIN_BULK_CHUNK_SIZE ids or emails per transaction, each a handful
+    of set-based statements (SELECT ids, UPDATE users, UPDATE refresh_tokens,
+    INSERT revocation_events).
+    """
+    size = settings.ADMIN_BULK_CHUNK_SIZE
+    parts = [(payload.user_ids[i:i + size], []) for i in range(0, len(payload.user_ids), size)]
+    parts += [([], payload.emails[i:i + size]) for i in range(0, len(payload.emails), size)]
+
+    chunks = []
+    for n, (ids, emails) in enumerate(parts, 1):
+        user_ids = resolve_user_ids(db, ids, emails)
+        updated, revoked = _bulk_chunk(db, payload.action, user_ids) if user_ids else (0, 0)
+        with span("db.commit"):
+            db.commit()
+        chunks.append(BulkChunkResult(requested=len(ids) + len(emails), matched=len(user_ids), users_updated=updated, sessions_revoked=revoked))
+        logger.info("admin bulk %s: chunk %d/%d, %d users matched, %d updated, %d sessions revoked",
+                    payload.action, n, len(parts), len(user_ids), updated, revoked)
+        if settings.AUDIT_ENABLED:
+            audit_log.record(audit.ADMIN_BULK, detail=f"{payload.action} chunk {n}/{len(parts)}: matched={len(user_ids)} updated={updated} revoked={revoked}")
+    if payload.action != "reactivate":
+        revocation_feed.wake()
+
+    return BulkUsersResult(
+        action=payload.action,
+        requested=sum(c.requested for c in chunks),
+        matched=sum(c.matched for c in chunks),
+        users_updated=sum(c.users_updated for c in chunks),
+        sessions_revoked=sum(c.sessions_revoked for c in chunks),
+        chunks=chunks,
+    )
+
+
+@router.get("/revocations/feed")
+def revocation_feed_metrics():
+    return revocation_feed.metrics()
+
+
+@router.get("/profile")
+def profile(
+    seconds: float = Query(default=10.0, gt=0),
+    interval_ms: float = Query(default=None, ge=1, le=1000),
+    format: Literal["collapsed", "pstats"] = "collapsed",
+):
+    # sample worker ที่รับ request นี้ (ไม่ใช่ทุก worker ของ gunicorn)
+    interval = (interval_ms or settings.PROFILER_INTERVAL_MS) / 1000
+    try:
+        profiler = profile_worker(seconds, interval)
+    except ProfilerBusy as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    return _profile_response(profiler, format)
+
+
+@router.get("/profile/requests/{profile_id}")
+def request_profile(profile_id: str, format: Literal["collapsed", "pstats"] = "collapsed"):
+    item = request_profiles.get(profile_id)
+    if item is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return _profile_response(item["profiler"], format)
@@ -5,8 +5,10 @@ from datetime import datetime, timedelta, timezone
 from fastapi import APIRouter, Depends, HTTPException, Request, Response, Cookie
 from sqlalchemy.orm import Session
 
-from app.api.deps import get_db
-from app.api.deps_auth import get_current_user
+from app.api.deps import get_db, get_read_db
+from app.db.session import release_connection
+from app.db.sharding import release_user_id
+from app.api.deps_auth import get_current_user, get_current_user_entity, get_current_user_profile
 from app.core.config import settings
 from app.core.security import hash_password, verify_password
 from app.core.tokens import create_access_token, create_refresh_token, decode_token
@@ -14,10 +16,13 @@ from app.core.tokens import create_access_token, create_refresh_token, decode_to
 from app.crud.user import get_user_by_email, create_user, get_user
 from app.crud.refresh_token import (
     create_refresh_token as save_refresh,
+    evict_lru_sessions,
     get_by_hash,
+    rotate_session,
     revoke,
     revoke_all_for_user,
 )
+from app.crud.revocation_event import record_revocation
 from app.crud.password_reset_token import (
     create_reset_token,
     get_by_hash as get_reset_by_hash,
@@ -31,6 +36,11 @@ from app.schemas.auth import (
 from app.schemas.token import TokenPair
 from app.schemas.user import UserOut, ProfileUpdateRequest
 from app.core.limiter import limiter
+from app.core.timing import span
+from app.core.principal import Principal
+from app.core import audit
+from app.core.audit import audit_log
+from app.core.revocation import revocation_feed
 from app.core.cookies import set_refresh_cookie, clear_refresh_cookie
 from typing import Optional
 from app.core.email import send_reset_email
@@ -44,26 +54,70 @@ def _sha256(s: str) -> str:
     return hashlib.sha256(s.encode("utf-8")).hexdigest()
 
 
+def _subject_id(claims: dict) -> int | None:
+    # sub ของ refresh token = user id => shard hint (sharded layout)
+    sub = claims.get("sub")
+    return int(sub) if isinstance(sub, str) and sub.isdigit() else None
+
+
+def _refresh_subject_id(raw: str) -> int | None:
+    # logout รับ token ที่หมดอายุ/เสียได้ => ไม่มี hint ก็ค้นตาม hash ตามเดิม
+    try:
+        return _subject_id(decode_token(raw))
+    except ValueError:
+        return None
+
+
 def _now_utc() -> datetime:
     return datetime.now(timezone.utc)
 
 
+def _audit(request: Request, event_type: str, **kwargs) -> None:
+    if kwargs.get("success", True) and kwargs.get("user_id") is not None:
+        # access log อ่านจาก request.state (login / refresh ยังไม่มี access token ใน request)
+        request.state.user_id = kwargs["user_id"]
+        if kwargs.get("session_id"):
+            request.state.session_id = kwargs["session_id"]
+    # แค่ append เข้าคิวใน memory, writer thread เป็นคน INSERT เป็น batch
+    if settings.AUDIT_ENABLED:
+        audit_log.record(
+            event_type,
+            ip=request.client.host if request.client else None,
+            user_agent=request.headers.get("user-agent"),
+            **kwargs,
+        )
+
+
 @router.get("/verify")
-def verify_token(current_user=Depends(get_current_user)):
+def verify_token(current_user: Principal = Depends(get_current_user)):
     return {"active": True, "user_id": current_user.id, "email": current_user.email}
 
 
 @router.get("/view-profile", response_model=UserOut, summary="Get my profile", 
             description="Return the current user's profile using the access token (Bearer).")
-def me(current_user=Depends(get_current_user)):
-    return current_user
+def me(profile: dict = Depends(get_current_user_profile)):
+    return profile
 
 
 @router.post("/register", response_model=UserOut)
 def register(payload: RegisterRequest, db: Session = Depends(get_db)):
     if get_user_by_email(db, payload.email):
         raise HTTPException(status_code=409, detail="Email already registered")
-    user = create_user(db, str(payload.email), hash_password(payload.password))
+
+    # คืน connection ให้ pool ระหว่าง bcrypt แล้วค่อยยืมใหม่ตอน INSERT
+    release_connection(db)
+    password_hash = hash_password(payload.password)
+
+    user = create_user(db, str(payload.email), password_hash)
+    user_id = user.id
+    try:
+        with span("db.commit"):
+            db.commit()
+    except Exception:
+        # sharded: directory commit ไปแล้ว แต่ shard ไม่ => ปล่อย email คืน
+        db.rollback()
+        release_user_id(db, user_id)
+        raise
     return user
 
 
@@ -73,21 +127,56 @@ def login(
     payload: LoginRequest,
     request: Request,
     response: Response,   # ✅ เพิ่ม
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_db),
+    read_db: Session = Depends(get_read_db),
 ):
-    user = get_user_by_email(db, payload.email)
-    if not user or not verify_password(payload.password, user.password_hash):
+    user = get_user_by_email(read_db, payload.email)
+    if user is None and read_db is not db:
+        # replica ยังตามไม่ทัน (เพิ่ง register) => อ่านซ้ำจาก primary
+        user = get_user_by_email(db, payload.email)
+
+    # ไม่ถือ connection ไว้ระหว่าง verify_password (bcrypt หลายร้อย ms)
+    release_connection(read_db)
+    release_connection(db)
+    ok = user is not None and verify_password(payload.password, user.password_hash)
+    if not ok and user is not None and read_db is not db:
+        # เพิ่งเปลี่ยนรหัสผ่าน แต่ replica ยังมี hash เก่า => เช็คกับ primary (bcrypt ซ้ำเฉพาะเมื่อ hash ต่างกัน)
+        fresh = get_user_by_email(db, payload.email)
+        release_connection(db)
+        if fresh is not None and fresh.password_hash != user.password_hash:
+            user = fresh
+            ok = verify_password(payload.password, user.password_hash)
+    if not ok:
+        _audit(request, audit.LOGIN, success=False, user_id=user.id if user else None, detail="invalid_credentials")
+        raise HTTPException(status_code=401, detail="Invalid credentials")
+    if not user.is_active:
+        # เช็คหลัง bcrypt + 401 เดียวกัน: ไม่บอกว่ารหัสผ่านถูกแต่บัญชีถูกปิด
+        _audit(request, audit.LOGIN, success=False, user_id=user.id, detail="inactive_user")
         raise HTTPException(status_code=401, detail="Invalid credentials")
 
     session_id = payload.device_id or secrets.token_hex(16)
     ua = request.headers.get("user-agent")
     ip = request.client.host if request.client else None
 
-    access = create_access_token(str(user.id))
+    access = create_access_token(str(user.id), session_id)
     refresh, exp = create_refresh_token(str(user.id))
 
-    save_refresh(db, user.id, session_id, _sha256(refresh), exp, user_agent=ua, ip=ip)
-    db.commit()
+    user_id = user.id  # อ่านก่อน commit (หลัง commit attribute ถูก expire => SELECT ใหม่)
+    # device เดิม => rotate แถวเดิม; session ใหม่ => INSERT แล้ว cap จำนวน session ต่อ user
+    rotated = bool(payload.device_id) and rotate_session(db, user_id, session_id, _sha256(refresh), exp, user_agent=ua, ip=ip)
+    evicted = []
+    if not rotated:
+        save_refresh(db, user_id, session_id, _sha256(refresh), exp, user_agent=ua, ip=ip)
+        if settings.REFRESH_SESSIONS_PER_USER_MAX > 0:
+            evicted = evict_lru_sessions(db, user_id, settings.REFRESH_SESSIONS_PER_USER_MAX)
+            # session ที่ถูก evict = revoke: resource server ต้องรู้เหมือน logout
+            for evicted_session_id in evicted:
+                record_revocation(db, user_id, audit.SESSION_EVICT, session_id=evicted_session_id)
+    with span("db.commit"):
+        db.commit()
+    if evicted:
+        revocation_feed.wake()
+    _audit(request, audit.LOGIN, user_id=user_id, session_id=session_id)
 
     # ✅ ใส่ refresh token ลง cookie
     set_refresh_cookie(response, refresh)
@@ -119,24 +208,33 @@ def refresh(
         raise HTTPException(status_code=401, detail="Invalid token type")
 
     token_hash = _sha256(rt_raw)
-    rt = get_by_hash(db, token_hash)
+    rt = get_by_hash(db, token_hash, user_id=_subject_id(data))
     if not rt or rt.revoked_at is not None:
+        if rt is not None:
+            # refresh token ที่ถูก rotate/revoke ไปแล้วถูกใช้ซ้ำ
+            _audit(request, audit.REFRESH, success=False, user_id=rt.user_id, session_id=rt.session_id, detail="revoked_token_reuse")
         raise HTTPException(status_code=401, detail="Refresh token revoked/unknown")
 
     revoke(db, rt)
 
     user = get_user(db, rt.user_id)
     if not user or not user.is_active:
+        # token ที่ยื่นมาต้องถูก revoke จริง แม้จะปฏิเสธ request นี้
+        with span("db.commit"):
+            db.commit()
         raise HTTPException(status_code=401, detail="User not found/inactive")
 
-    access = create_access_token(str(user.id))
+    access = create_access_token(str(user.id), rt.session_id)
     new_refresh, exp = create_refresh_token(str(user.id))
 
     ua = request.headers.get("user-agent")
     ip = request.client.host if request.client else None
 
-    save_refresh(db, user.id, rt.session_id, _sha256(new_refresh), exp, user_agent=ua, ip=ip)
-    db.commit()
+    user_id, session_id = user.id, rt.session_id
+    save_refresh(db, user_id, session_id, _sha256(new_refresh), exp, user_agent=ua, ip=ip)
+    with span("db.commit"):
+        db.commit()
+    _audit(request, audit.REFRESH, user_id=user_id, session_id=session_id)
 
     # ✅ rotate แล้ว set cookie ใหม่
     set_refresh_cookie(response, new_refresh)
@@ -161,23 +259,37 @@ def logout(
     rt_raw = refresh_token_cookie or (payload.refresh_token if payload else None)
     if rt_raw:
         token_hash = _sha256(rt_raw)
-        rt = get_by_hash(db, token_hash)
-        if rt and rt.revoked_at is None:
+        rt = get_by_hash(db, token_hash, user_id=_refresh_subject_id(rt_raw))
+        event = {"user_id": rt.user_id, "session_id": rt.session_id} if rt else None
+        revoked = rt is not None and rt.revoked_at is None
+        if revoked:
             revoke(db, rt)
-        db.commit()
+            record_revocation(db, rt.user_id, audit.LOGOUT, session_id=rt.session_id)
+        with span("db.commit"):
+            db.commit()
+        if revoked:
+            revocation_feed.wake()
+        if event:
+            _audit(request, audit.LOGOUT, **event)
 
     clear_refresh_cookie(response)
     return {"status": "ok"}
 
 
 @router.post("/logout-all")
-def logout_all(current_user=Depends(get_current_user), db: Session = Depends(get_db)):
-    n = revoke_all_for_user(db, current_user.id)
+def logout_all(request: Request, current_user=Depends(get_current_user), db: Session = Depends(get_db)):
+    user_id = current_user.id
+    n = revoke_all_for_user(db, user_id)
+    record_revocation(db, user_id, audit.LOGOUT_ALL)
+    with span("db.commit"):
+        db.commit()
+    revocation_feed.wake()
+    _audit(request, audit.LOGOUT_ALL, user_id=user_id, detail=f"revoked={n}")
     return {"status": "ok", "revoked": n}
 
 
 @router.patch("/edit-profile", response_model=UserOut)
-def edit_profile(payload: ProfileUpdateRequest, current_user=Depends(get_current_user), db: Session = Depends(get_db)):
+def edit_profile(payload: ProfileUpdateRequest, current_user=Depends(get_current_user_entity), db: Session = Depends(get_db)):
     # update allowed fields
     if payload.full_name is not None:
         current_user.full_name = payload.full_name
@@ -185,22 +297,34 @@ def edit_profile(payload: ProfileUpdateRequest, current_user=Depends(get_current
         current_user.phone = payload.phone
 
     db.add(current_user)
-    db.commit()
-    db.refresh(current_user)
+    with span("db.commit"):
+        db.commit()
     return current_user
 
 
 @router.post("/change-password")
-def change_password(payload: ChangePasswordRequest, current_user=Depends(get_current_user), db: Session = Depends(get_db)):
+def change_password(
+    request: Request,
+    payload: ChangePasswordRequest,
+    current_user=Depends(get_current_user_entity),
+    db: Session = Depends(get_db),
+):
+    release_connection(db)
     if not verify_password(payload.old_password, current_user.password_hash):
+        _audit(request, audit.PASSWORD_CHANGE, success=False, user_id=current_user.id, detail="invalid_old_password")
         raise HTTPException(status_code=401, detail="Invalid old password")
 
     current_user.password_hash = hash_password(payload.new_password)
     db.add(current_user)
 
     # security: revoke all sessions after password change
-    revoke_all_for_user(db, current_user.id)
-    db.commit()
+    user_id = current_user.id
+    revoke_all_for_user(db, user_id)
+    record_revocation(db, user_id, audit.PASSWORD_CHANGE)
+    with span("db.commit"):
+        db.commit()
+    revocation_feed.wake()
+    _audit(request, audit.PASSWORD_CHANGE, user_id=user_id)
     return {"status": "ok"}
 
 
@@ -216,13 +340,17 @@ def forgot_password(request: Request, payload: ForgotPasswordRequest, db: Sessio
     token_hash = _sha256(raw_token)
 
     expires_at = _now_utc() + timedelta(minutes=settings.PASSWORD_RESET_TOKEN_EXPIRE_MINUTES)
-    create_reset_token(db, user.id, token_hash, expires_at)
+    user_id, user_email = user.id, user.email
+    create_reset_token(db, user_id, token_hash, expires_at)
+    with span("db.commit"):
+        db.commit()
+    _audit(request, audit.PASSWORD_RESET_REQUEST, user_id=user_id)
 
     # DEV MODE: คืน token ให้ทดสอบ (PROD ควรส่ง email อย่างเดียว)
     if settings.ENV == "dev":
         return {"status": "ok", "reset_token": raw_token}
 
-    send_reset_email(user.email, raw_token)
+    send_reset_email(user_email, raw_token)
     return {"status": "ok"}
 
 
@@ -242,12 +370,20 @@ def reset_password(request: Request, payload: ResetPasswordRequest, db: Session
     if not user:
         raise HTTPException(status_code=401, detail="User not found")
 
-    user.password_hash = hash_password(payload.new_password)
+    release_connection(db)
+    password_hash = hash_password(payload.new_password)
+    # check used_at ด้านบนเป็นแค่ fast path: ตัดสินจริงที่ UPDATE ... WHERE used_at IS NULL
+    if not mark_used(db, row):
+        raise HTTPException(status_code=401, detail="Token already used")
+    user.password_hash = password_hash
     db.add(user)
-    db.commit()
-
-    mark_used(db, row)
 
     # security: revoke all sessions after reset
-    revoke_all_for_user(db, user.id)
+    user_id = user.id
+    revoke_all_for_user(db, user_id)
+    record_revocation(db, user_id, audit.PASSWORD_RESET)
+    with span("db.commit"):
+        db.commit()
+    revocation_feed.wake()
+    _audit(request, audit.PASSWORD_RESET, user_id=user_id)
     return {"status": "ok"}
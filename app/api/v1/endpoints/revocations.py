@@ -0,0 +1,54 @@
+import json
+from typing import Optional
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Query
+from starlette.responses import StreamingResponse
+
+from app.api.deps_revocation import require_revocation_feed_key
+from app.core.config import settings
+from app.core.revocation import revocation_feed
+
+# subscriber ถือ REVOCATION_FEED_KEY (ไม่ใช่ ADMIN_KEY); ไม่ผ่าน admission เหมือน /admin
+router = APIRouter(prefix="/revocations", tags=["Revocations"], dependencies=[Depends(require_revocation_feed_key)])
+
+
+@router.get("")
+async def revocations(
+    cursor: Optional[int] = Query(default=None, ge=0),
+    wait: float = Query(default=0.0, ge=0),
+    limit: int = Query(default=1000, ge=1, le=1000),
+):
+    """Long-poll: events after cursor (no cursor = start at the current head)."""
+    async with revocation_feed.subscription():
+        if cursor is None:
+            return {"events": [], "cursor": revocation_feed.head}
+        events = await revocation_feed.wait_for_events(cursor, min(wait, settings.REVOCATION_LONGPOLL_MAX_SECONDS), limit)
+    return {"events": events, "cursor": events[-1]["id"] if events else cursor}
+
+
+@router.get("/stream")
+async def revocation_stream(
+    cursor: Optional[int] = Query(default=None, ge=0),
+    last_event_id: Optional[str] = Header(default=None),
+):
+    """Server-sent events; reconnects resume from Last-Event-ID."""
+    if last_event_id is not None:
+        if not last_event_id.isdigit():
+            raise HTTPException(status_code=400, detail="Invalid Last-Event-ID")
+        cursor = int(last_event_id)
+
+    async def stream():
+        async with revocation_feed.subscription():
+            after = revocation_feed.head if cursor is None else cursor
+            # id ของ event แรกตั้ง Last-Event-ID ให้ client ตั้งแต่ยังไม่มี revocation
+            yield f"id: {after}\nevent: ready\ndata: {{}}\n\n"
+            while True:
+                events = await revocation_feed.wait_for_events(after, settings.REVOCATION_SSE_HEARTBEAT_SECONDS)
+                if not events:
+                    yield ": keepalive\n\n"
+                    continue
+                for event in events:
+                    yield f"id: {event['id']}\nevent: revocation\ndata: {json.dumps(event)}\n\n"
+                after = events[-1]["id"]
+
+    return StreamingResponse(stream(), media_type="text/event-stream", headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
@@ -1,5 +1,9 @@
 from fastapi import APIRouter
 from app.api.v1.endpoints.auth import router as auth_router
+from app.api.v1.endpoints.admin import router as admin_router
+from app.api.v1.endpoints.revocations import router as revocations_router
 
 api_router = APIRouter(prefix="/api/v1")
 api_router.include_router(auth_router)
+api_router.include_router(admin_router)
+api_router.include_router(revocations_router)
@@ -0,0 +1,330 @@
+"""
+/verify over a Unix domain socket for co-located services (opt-in:
+VERIFY_SOCKET_PATH). Skips HTTP parsing, middleware, dependency injection and
+JSON; the token check (access_token_claims) and the lookup (get_principal)
+are the same as GET /api/v1/auth/verify.
+
+Framing: every message is a uint32 big-endian length followed by the payload.
+
+    request   access token (ASCII)
+    response  1 status byte + body
+              0 OK            uint64 user_id, uint16 email length, email,
+                              rest = session id (may be empty)
+              1 UNAUTHORIZED  detail (utf-8): bad signature/expired/type/subject
+              2 INACTIVE      detail: user not found or inactive
+              3 BAD_REQUEST   detail: frame too large / token not ASCII
+              4 ERROR         detail: lookup failed (DB down ...)
+
+Requests can be pipelined: responses come back in request order. All frames
+that arrive together are resolved in one threadpool hop with one DB session.
+
+Only one worker per host serves the socket: the one holding flock() on
+VERIFY_SOCKET_PATH + ".lock". Only the holder may unlink a stale socket and
+bind, so two workers starting together cannot unlink each other's socket. The
+kernel drops the lock when the holder exits.
+"""
+import asyncio
+import fcntl
+import logging
+import os
+import socket
+import stat
+import struct
+from dataclasses import dataclass
+
+import anyio.to_thread
+
+from app.api.deps_auth import access_token_claims
+from app.core.config import settings
+from app.core.telemetry import session_telemetry
+from app.crud.user import get_principal
+from app.db.session import ReadSessionLocal, SessionLocal, replica_router
+
+logger = logging.getLogger(__name__)
+
+OK, UNAUTHORIZED, INACTIVE, BAD_REQUEST, ERROR = range(5)
+
+_LEN = struct.Struct(">I")
+_OK_HEAD = struct.Struct(">BQH")
+
+
+def _frame(payload: bytes) -> bytes:
+    return _LEN.pack(len(payload)) + payload
+
+
+def _error(status: int, detail: str) -> bytes:
+    return _frame(bytes([status]) + detail.encode("utf-8"))
+
+
+def _ok(user_id: int, email: str, session_id: str | None) -> bytes:
+    email_b = email.encode("utf-8")
+    return _frame(_OK_HEAD.pack(OK, user_id, len(email_b)) + email_b + (session_id or "").encode("utf-8"))
+
+
+class _VerifyProtocol(asyncio.Protocol):
+    def __init__(self, server: "VerifySocketServer"):
+        self.server = server
+        self.transport: asyncio.Transport | None = None
+        self._buf = bytearray()
+        self._pending: list[bytes | None] = []  # None = frame ใหญ่เกิน max_frame
+        self._busy = False
+        self._paused = False
+        self._closing = False
+
+    def connection_made(self, transport) -> None:
+        self.transport = transport
+        self.server.connections += 1
+
+    def connection_lost(self, exc) -> None:
+        self.transport = None
+
+    def data_received(self, data: bytes) -> None:
+        if self._closing:
+            return
+        self._buf += data
+        buf, max_frame = self._buf, self.server.max_frame
+        pos = 0
+        while len(buf) - pos >= 4:
+            (n,) = _LEN.unpack_from(buf, pos)
+            if n > max_frame:
+                # ไม่รู้ว่า frame จบตรงไหน => ตอบ error แล้วปิด connection
+                self._pending.append(None)
+                self._buf.clear()
+                self._closing = True
+                self._schedule()
+                return
+            if len(buf) - pos - 4 < n:
+                break
+            self._pending.append(bytes(buf[pos + 4:pos + 4 + n]))
+            pos += 4 + n
+        del buf[:pos]
+        self._schedule()
+
+    def _schedule(self) -> None:
+        if self._pending and not self._busy:
+            self._busy = True
+            asyncio.get_running_loop().create_task(self._drain())
+        if len(self._pending) > 4 * self.server.max_batch and not self._paused and self.transport is not None:
+            # client ส่งเร็วกว่าที่ตอบทัน => หยุดอ่านจนกว่าคิวจะลด
+            self._paused = True
+            self.transport.pause_reading()
+
+    async def _drain(self) -> None:
+        try:
+            while self._pending and self.transport is not None:
+                batch = self._pending[: self.server.max_batch]
+                del self._pending[: len(batch)]
+                responses = await anyio.to_thread.run_sync(self.server.resolve, batch)
+                if self.transport is None:
+                    return
+                self.transport.write(b"".join(responses))
+                if self._paused and len(self._pending) <= self.server.max_batch:
+                    self._paused = False
+                    self.transport.resume_reading()
+            if self._closing and self.transport is not None:
+                self.transport.close()
+        finally:
+            self._busy = False
+
+
+class VerifySocketServer:
+    def __init__(self, path: str, mode: int = 0o660, session_factory=None, max_frame: int = 8192, max_batch: int = 256):
+        self.path = path
+        self.mode = mode
+        self.session_factory = session_factory
+        self.max_frame = max_frame
+        self.max_batch = max_batch
+        self._server: asyncio.AbstractServer | None = None
+        self._lock_fd: int | None = None
+
+        self.connections = 0
+        self.requests = 0
+        self.batches = 0
+        self.errors = 0
+
+    def _session(self):
+        if self.session_factory is not None:
+            return self.session_factory()
+        # เหมือน get_read_db: replica ถ้ามีและยังตามทัน
+        replica = replica_router.pick()
+        return ReadSessionLocal(bind=replica) if replica is not None else SessionLocal()
+
+    def resolve(self, frames: list[bytes | None]) -> list[bytes]:
+        """One response frame per request frame (runs in the threadpool)."""
+        out: list[bytes | None] = [None] * len(frames)
+        lookups = []
+        for i, raw in enumerate(frames):
+            if raw is None:
+                out[i] = _error(BAD_REQUEST, "Frame too large")
+                continue
+            try:
+                token = raw.decode("ascii")
+            except UnicodeDecodeError:
+                out[i] = _error(BAD_REQUEST, "Token must be ASCII")
+                continue
+            try:
+                user_id, sid = access_token_claims(token)
+            except ValueError as e:
+                out[i] = _error(UNAUTHORIZED, str(e))
+                continue
+            lookups.append((i, user_id, sid))
+
+        if lookups:
+            try:
+                with self._session() as db:
+                    for i, user_id, sid in lookups:
+                        principal = get_principal(db, user_id, sid)
+                        if principal is None or not principal.is_active:
+                            out[i] = _error(INACTIVE, "User not found/inactive")
+                            continue
+                        out[i] = _ok(principal.id, principal.email, sid)
+                        if sid and settings.SESSION_TELEMETRY_ENABLED:
+                            session_telemetry.touch(user_id, sid)
+            except Exception:
+                logger.exception("verify socket: lookup failed")
+                self.errors += 1
+                for i, _, _ in lookups:
+                    if out[i] is None:
+                        out[i] = _error(ERROR, "Lookup failed")
+
+        self.requests += len(frames)
+        self.batches += 1
+        return out
+
+    def _claim(self) -> bool:
+        """flock the lock file; the holder is the serving worker. False = another worker serves."""
+        fd = os.open(self.path + ".lock", os.O_RDWR | os.O_CREAT, 0o600)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            os.close(fd)
+            return False
+        self._lock_fd = fd
+        return True
+
+    def _release(self) -> None:
+        if self._lock_fd is not None:
+            os.close(self._lock_fd)  # ปลด flock (ไม่ลบไฟล์ lock: ลบแล้ว worker อื่นอาจ lock คนละ inode)
+            self._lock_fd = None
+
+    def _remove_stale(self) -> None:
+        try:
+            st = os.stat(self.path)
+        except FileNotFoundError:
+            return
+        if not stat.S_ISSOCK(st.st_mode):
+            raise RuntimeError(f"VERIFY_SOCKET_PATH {self.path} exists and is not a socket")
+        os.unlink(self.path)  # ถือ lock อยู่ => socket นี้ค้างจาก worker ที่ตายไปแล้ว
+
+    @property
+    def serving(self) -> bool:
+        return self._server is not None
+
+    async def start(self) -> bool:
+        if self._server is not None:
+            return True
+        if not self._claim():
+            logger.info("verify socket %s is served by another worker", self.path)
+            return False
+        try:
+            self._remove_stale()
+            loop = asyncio.get_running_loop()
+            self._server = await loop.create_unix_server(lambda: _VerifyProtocol(self), self.path)
+        except BaseException:
+            self._release()
+            raise
+        os.chmod(self.path, self.mode)
+        logger.info("verify socket listening on %s", self.path)
+        return True
+
+    async def stop(self) -> None:
+        if self._server is None:
+            return
+        self._server.close()
+        await self._server.wait_closed()
+        self._server = None
+        try:
+            os.unlink(self.path)
+        except FileNotFoundError:
+            pass
+        self._release()
+
+    def metrics(self) -> dict:
+        return {
+            "path": self.path,
+            "serving": self.serving,
+            "connections": self.connections,
+            "requests": self.requests,
+            "batches": self.batches,
+            "avg_batch": round(self.requests / self.batches, 2) if self.batches else 0.0,
+            "errors": self.errors,
+        }
+
+
+verify_socket = VerifySocketServer(settings.VERIFY_SOCKET_PATH, mode=int(settings.VERIFY_SOCKET_MODE, 8))
+
+
+# -----------------------------
+# client (blocking; for co-located Python services, tests and benchmarks)
+# -----------------------------
+@dataclass(frozen=True, slots=True)
+class VerifyResult:
+    status: int
+    user_id: int | None = None
+    email: str | None = None
+    session_id: str | None = None
+    detail: str | None = None
+
+    @property
+    def active(self) -> bool:
+        return self.status == OK
+
+
+def _parse(payload: bytes) -> VerifyResult:
+    status = payload[0]
+    if status != OK:
+        return VerifyResult(status, detail=payload[1:].decode("utf-8"))
+    _, user_id, email_len = _OK_HEAD.unpack_from(payload)
+    off = _OK_HEAD.size
+    email = payload[off:off + email_len].decode("utf-8")
+    sid = payload[off + email_len:].decode("utf-8") or None
+    return VerifyResult(status, user_id, email, sid)
+
+
+class VerifyClient:
+    def __init__(self, path: str, timeout: float | None = 5.0):
+        self._sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self._sock.settimeout(timeout)
+        self._sock.connect(path)
+        self._buf = bytearray()
+
+    def _read_exact(self, n: int) -> bytes:
+        while len(self._buf) < n:
+            chunk = self._sock.recv(max(65536, n - len(self._buf)))
+            if not chunk:
+                raise ConnectionError("verify socket closed")
+            self._buf += chunk
+        data = bytes(self._buf[:n])
+        del self._buf[:n]
+        return data
+
+    def verify_many(self, tokens: list[str]) -> list[VerifyResult]:
+        """Pipelined: send every request, then read the responses in order."""
+        self._sock.sendall(b"".join(_frame(t.encode("ascii")) for t in tokens))
+        results = []
+        for _ in tokens:
+            (n,) = _LEN.unpack(self._read_exact(4))
+            results.append(_parse(self._read_exact(n)))
+        return results
+
+    def verify(self, token: str) -> VerifyResult:
+        return self.verify_many([token])[0]
+
+    def close(self) -> None:
+        self._sock.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
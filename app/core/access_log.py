@@ -0,0 +1,183 @@
+"""
+Structured JSON access log (ACCESS_LOG_ENABLED), one line per request:
+
+    {"ts": "...", "method": "GET", "route": "/api/v1/auth/verify", "path": "...",
+     "status": 200, "duration_ms": 1.84, "user_id": 42, "session_id": "...",
+     "rate_limit": "ok", "client": "10.0.0.7", "sample_rate": 0.01}
+
+rate_limit: "ok" (route has a limit and passed), "limited" (429), null (no limit).
+user_id / session_id come from request.state (set by the auth dependencies,
+login and refresh).
+
+Nothing is formatted or written on the event loop. The middleware builds a
+dict and puts a LogRecord on a bounded queue.Queue (put_nowait; when the queue
+is full the line is dropped and counted). A QueueListener thread does the JSON
+encoding and writes to stdout or ACCESS_LOG_PATH (WatchedFileHandler: works
+with logrotate).
+
+Sampling (ACCESS_LOG_SAMPLE="route=rate,..."): high-volume routes such as
+/verify keep only that fraction of lines. 5xx and 429 are always logged.
+Every line carries its sample_rate, so counts can be scaled back up.
+
+Run uvicorn with --no-access-log (gunicorn: no --access-logfile) so requests
+are not logged twice.
+"""
+import json
+import logging
+import logging.handlers
+import queue
+import random
+import sys
+import threading
+import time
+from datetime import datetime, timezone
+
+from app.core.config import settings
+from app.core.routing import route_template
+
+
+def parse_sample_rates(spec: str) -> dict[str, float]:
+    rates = {}
+    for item in (spec or "").split(","):
+        if not item.strip():
+            continue
+        route, _, rate = item.strip().rpartition("=")
+        rates[route.strip()] = float(rate)
+    return rates
+
+
+class JSONFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        entry = getattr(record, "access", None) or {"message": record.getMessage()}
+        ts = datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds")
+        return json.dumps({"ts": ts, **entry}, separators=(",", ":"), default=str)
+
+
+class _BoundedQueueHandler(logging.handlers.QueueHandler):
+    def __init__(self, q: queue.Queue):
+        super().__init__(q)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # ไม่ format ที่นี่ (event loop): listener thread เป็นคน encode JSON
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class _Listener(logging.handlers.QueueListener):
+    def enqueue_sentinel(self) -> None:
+        # queue อาจเต็มอยู่: รอ listener ระบายก่อน (put_nowait จะ raise Full)
+        self.queue.put(self._sentinel)
+
+
+class AccessLog:
+    def __init__(self, path: str = "", max_queue: int = 10000, sample_rates: dict[str, float] | None = None):
+        self.path = path
+        self.sample_rates = sample_rates or {}
+        self.queue: queue.Queue = queue.Queue(max_queue)
+        self.handler = _BoundedQueueHandler(self.queue)
+        self.target: logging.Handler | None = None
+        self._listener: _Listener | None = None
+        self._lock = threading.Lock()
+
+        self.logged = 0
+        self.sampled_out = 0
+
+    def _target(self) -> logging.Handler:
+        if self.path:
+            handler = logging.handlers.WatchedFileHandler(self.path, encoding="utf-8")
+        else:
+            handler = logging.StreamHandler(sys.stdout)
+        handler.setFormatter(JSONFormatter())
+        return handler
+
+    def start(self, target: logging.Handler | None = None) -> None:
+        with self._lock:
+            if self._listener is not None:
+                return
+            self.target = target or self._target()
+            self._listener = _Listener(self.queue, self.target)
+            self._listener.start()
+
+    def stop(self) -> None:
+        with self._lock:
+            if self._listener is None:
+                return
+            self._listener.stop()  # เขียนของที่ค้างในคิวให้หมดก่อน
+            self._listener = None
+            self.target.close()
+
+    def request(self, scope, status: int, duration_ms: float) -> None:
+        route = route_template(scope)
+        rate = self.sample_rates.get(route, 1.0)
+        if rate < 1.0 and status < 500 and status != 429 and random.random() >= rate:
+            self.sampled_out += 1
+            return
+
+        state = scope.get("state") or {}
+        limit = state.get("view_rate_limit")
+        client = scope.get("client")
+        entry = {
+            "method": scope["method"],
+            "route": route,
+            "path": scope["path"],
+            "status": status,
+            "duration_ms": round(duration_ms, 3),
+            "user_id": state.get("user_id"),
+            "session_id": state.get("session_id"),
+            "rate_limit": ("limited" if status == 429 else "ok") if limit else None,
+            "client": client[0] if client else None,
+            "sample_rate": rate,
+        }
+        record = logging.LogRecord("app.access", logging.INFO, __name__, 0, "access", None, None)
+        record.access = entry
+        self.handler.handle(record)
+        self.logged += 1
+
+    def metrics(self) -> dict:
+        return {
+            "running": self._listener is not None,
+            "path": self.path or "stdout",
+            "queued": self.queue.qsize(),
+            "max_queue": self.queue.maxsize,
+            "logged": self.logged,
+            "sampled_out": self.sampled_out,
+            "dropped": self.handler.dropped,
+            "sample_rates": self.sample_rates,
+        }
+
+
+class AccessLogMiddleware:
+    def __init__(self, app, access_log: AccessLog):
+        self.app = app
+        self.access_log = access_log
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        start = time.perf_counter()
+        status = 500  # exception หลุดออกไป = ServerErrorMiddleware ตอบ 500
+
+        async def snd(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, snd)
+        finally:
+            self.access_log.request(scope, status, (time.perf_counter() - start) * 1000)
+
+
+access_log = AccessLog(
+    settings.ACCESS_LOG_PATH,
+    max_queue=settings.ACCESS_LOG_MAX_QUEUE,
+    sample_rates=parse_sample_rates(settings.ACCESS_LOG_SAMPLE),
+)
@@ -0,0 +1,145 @@
+"""
+Admission control / load shedding.
+
+Routes are grouped into classes with their own concurrency budget, so a
+credential-stuffing wave on the bcrypt routes cannot take the threadpool (and
+the latency of /health and /verify) down with it:
+
+- hash:  routes that run bcrypt (login, register, change/reset password)
+- db:    everything else under /api
+- cheap: /health, /verify
+
+A request waits on the event loop (not on a threadpool thread) for a slot of
+its class. If it waits longer than ADMISSION_MAX_QUEUE_WAIT_MS, or the queue is
+already ADMISSION_MAX_QUEUE deep, it fails fast with 503 + Retry-After instead
+of piling up until gunicorn's timeout kills the worker.
+"""
+import asyncio
+import time
+from collections import deque
+
+from app.core.config import settings
+
+HASH_ROUTES = {
+    "/api/v1/auth/login",
+    "/api/v1/auth/register",
+    "/api/v1/auth/change-password",
+    "/api/v1/auth/reset-password",
+}
+CHEAP_ROUTES = {
+    "/health",
+    "/api/v1/auth/verify",
+}
+# admin/diagnostics และ revocation feed ต้องใช้ได้ตอน overload ด้วย => ไม่ผ่าน admission
+EXEMPT_PREFIXES = ("/api/v1/admin", "/api/v1/revocations")
+
+
+class Budget:
+    """Async counting semaphore with a bounded, time-limited wait queue."""
+
+    def __init__(self, name: str, limit: int, max_wait_ms: float, max_queue: int):
+        self.name = name
+        self.limit = limit
+        self.max_wait_ms = max_wait_ms
+        self.max_queue = max_queue
+
+        self.in_flight = 0
+        # future ผูกกับ loop ตอนสร้างทีละตัว (ไม่ผูก Budget กับ loop ใด loop หนึ่ง)
+        self._waiters: deque[asyncio.Future] = deque()
+
+        self.admitted = 0
+        self.queued = 0
+        self.rejected_queue_full = 0
+        self.rejected_timeout = 0
+        self.wait_ms_total = 0.0
+        self.wait_ms_max = 0.0
+
+    async def acquire(self) -> bool:
+        if self.in_flight < self.limit and not self._waiters:
+            self.in_flight += 1
+            self.admitted += 1
+            return True
+
+        if len(self._waiters) >= self.max_queue:
+            self.rejected_queue_full += 1
+            return False
+
+        fut = asyncio.get_running_loop().create_future()
+        self._waiters.append(fut)
+        self.queued += 1
+        t0 = time.perf_counter()
+        try:
+            await asyncio.wait_for(fut, self.max_wait_ms / 1000)
+        except asyncio.TimeoutError:
+            self.rejected_timeout += 1
+            return False
+        except asyncio.CancelledError:
+            # client หลุดระหว่างรอ: ถ้าได้ slot มาแล้วต้องคืน
+            if fut.done() and not fut.cancelled():
+                self.release()
+            raise
+        finally:
+            if fut in self._waiters:
+                self._waiters.remove(fut)
+            waited = (time.perf_counter() - t0) * 1000
+            self.wait_ms_total += waited
+            self.wait_ms_max = max(self.wait_ms_max, waited)
+
+        # release() ส่ง slot ต่อให้เราโดยตรง (in_flight ไม่ลด)
+        self.admitted += 1
+        return True
+
+    def release(self) -> None:
+        while self._waiters:
+            fut = self._waiters.popleft()
+            if not fut.done():
+                fut.set_result(True)
+                return
+        self.in_flight -= 1
+
+    def metrics(self) -> dict:
+        return {
+            "limit": self.limit,
+            "in_flight": self.in_flight,
+            "waiting": len(self._waiters),
+            "max_wait_ms": self.max_wait_ms,
+            "max_queue": self.max_queue,
+            "admitted": self.admitted,
+            "queued": self.queued,
+            "rejected_queue_full": self.rejected_queue_full,
+            "rejected_timeout": self.rejected_timeout,
+            "wait_ms_avg": round(self.wait_ms_total / self.queued, 3) if self.queued else 0.0,
+            "wait_ms_max": round(self.wait_ms_max, 3),
+        }
+
+
+class AdmissionController:
+    def __init__(self):
+        wait = settings.ADMISSION_MAX_QUEUE_WAIT_MS
+        queue = settings.ADMISSION_MAX_QUEUE
+        self.budgets = {
+            "hash": Budget("hash", settings.ADMISSION_HASH_CONCURRENCY, wait, queue),
+            "db": Budget("db", settings.ADMISSION_DB_CONCURRENCY, wait, queue),
+            "cheap": Budget("cheap", settings.ADMISSION_CHEAP_CONCURRENCY, wait, queue),
+        }
+
+    def classify(self, path: str) -> str | None:
+        if path in HASH_ROUTES:
+            return "hash"
+        if path in CHEAP_ROUTES:
+            return "cheap"
+        if path.startswith(EXEMPT_PREFIXES):
+            return None
+        if path.startswith("/api/"):
+            return "db"
+        return None
+
+    def metrics(self) -> dict:
+        return {
+            "enabled": settings.ADMISSION_ENABLED,
+            "retry_after_seconds": settings.ADMISSION_RETRY_AFTER_SECONDS,
+            "budgets": {name: b.metrics() for name, b in self.budgets.items()},
+        }
+
+
+admission = AdmissionController()
@@ -0,0 +1,202 @@
+"""
+Asynchronous batched audit / security event log.
+
+Handlers call `audit_log.record(...)`, which only appends to a bounded
+in-memory queue. A background writer drains the queue in batches (when
+AUDIT_BATCH_SIZE events are waiting or every AUDIT_FLUSH_SECONDS) and writes
+them with one executemany INSERT into `audit_events`, or appends them to
+rotating NDJSON files (AUDIT_SINK=ndjson).
+
+When the queue is full AUDIT_OVERFLOW decides what happens:
+- drop_oldest: discard the oldest queued event (default; never blocks)
+- drop_newest: discard the event being recorded
+- block:       wait up to AUDIT_BLOCK_TIMEOUT_MS for space, then drop it
+"""
+import logging
+import threading
+import time
+from collections import deque
+from datetime import datetime, timezone
+
+from sqlalchemy import insert
+
+from app.core.background import PeriodicFlusher
+from app.core.config import settings
+from app.core.ndjson import RotatingNDJSONWriter
+from app.models.audit_event import AuditEvent
+
+logger = logging.getLogger(__name__)
+
+# event types
+LOGIN = "login"
+REFRESH = "refresh"
+LOGOUT = "logout"
+LOGOUT_ALL = "logout_all"
+SESSION_EVICT = "session_evict"
+PASSWORD_CHANGE = "password_change"
+PASSWORD_RESET_REQUEST = "password_reset_request"
+PASSWORD_RESET = "password_reset"
+ADMIN_BULK = "admin_bulk"
+
+
+class DatabaseAuditSink:
+    def __init__(self, session_factory=None):
+        self.session_factory = session_factory
+
+    def write(self, rows: list[dict]) -> None:
+        if self.session_factory is None:
+            from app.db.session import SessionLocal
+            self.session_factory = SessionLocal
+        with self.session_factory() as db:
+            db.execute(insert(AuditEvent.__table__), rows)
+            db.commit()
+
+
+class NDJSONAuditSink:
+    def __init__(self, path: str, max_bytes: int, backup_count: int):
+        self.writer = RotatingNDJSONWriter(path, max_bytes=max_bytes, backup_count=backup_count)
+
+    def write(self, rows: list[dict]) -> None:
+        self.writer.write_many(rows)
+
+
+class AuditLog:
+    def __init__(
+        self,
+        sink,
+        max_queue: int = 10000,
+        batch_size: int = 500,
+        flush_interval: float = 1.0,
+        overflow: str = "drop_oldest",
+        block_timeout_ms: float = 50.0,
+    ):
+        if overflow not in ("drop_oldest", "drop_newest", "block"):
+            raise ValueError(f"Unknown AUDIT_OVERFLOW: {overflow}")
+        self.sink = sink
+        self.max_queue = max_queue
+        self.batch_size = batch_size
+        self.overflow = overflow
+        self.block_timeout_ms = block_timeout_ms
+
+        self._queue: deque[dict] = deque()
+        self._cond = threading.Condition()
+        self._flush_lock = threading.Lock()
+        self._flusher = PeriodicFlusher("audit-writer", flush_interval, self.flush)
+
+        self.recorded = 0
+        self.dropped = 0
+        self.written = 0
+        self.batches = 0
+        self.write_errors = 0
+
+    def record(
+        self,
+        event_type: str,
+        *,
+        success: bool = True,
+        user_id: int | None = None,
+        session_id: str | None = None,
+        ip: str | None = None,
+        user_agent: str | None = None,
+        detail: str | None = None,
+    ) -> None:
+        row = {
+            "created_at": datetime.now(timezone.utc),
+            "event_type": event_type,
+            "success": success,
+            "user_id": user_id,
+            "session_id": session_id,
+            "ip": ip,
+            "user_agent": user_agent[:255] if user_agent else None,
+            "detail": detail[:255] if detail else None,
+        }
+        with self._cond:
+            if len(self._queue) >= self.max_queue:
+                if self.overflow == "drop_oldest":
+                    self._queue.popleft()
+                    self.dropped += 1
+                elif self.overflow == "drop_newest":
+                    self.dropped += 1
+                    return
+                else:
+                    deadline = time.monotonic() + self.block_timeout_ms / 1000
+                    while len(self._queue) >= self.max_queue:
+                        remaining = deadline - time.monotonic()
+                        if remaining <= 0:
+                            self.dropped += 1
+                            return
+                        self._cond.wait(remaining)
+            self._queue.append(row)
+            self.recorded += 1
+            wake = len(self._queue) >= self.batch_size
+
+        if wake:
+            self._flusher.wake()
+
+    def _take_batch(self) -> list[dict]:
+        with self._cond:
+            n = min(self.batch_size, len(self._queue))
+            batch = [self._queue.popleft() for _ in range(n)]
+            if batch:
+                self._cond.notify_all()
+            return batch
+
+    def flush(self) -> int:
+        """Drain the queue in batches; returns the number of events written."""
+        written = 0
+        with self._flush_lock:
+            while True:
+                batch = self._take_batch()
+                if not batch:
+                    return written
+                try:
+                    self.sink.write(batch)
+                except Exception:
+                    logger.exception("audit write failed (%d events)", len(batch))
+                    with self._cond:
+                        self.write_errors += 1
+                        # คืนเข้าหัวคิวเพื่อลองใหม่รอบหน้า (เกินความจุ => นับเป็น dropped)
+                        space = max(self.max_queue - len(self._queue), 0)
+                        self._queue.extendleft(reversed(batch[:space]))
+                        self.dropped += len(batch) - min(space, len(batch))
+                    return written
+                with self._cond:
+                    self.written += len(batch)
+                    self.batches += 1
+                written += len(batch)
+
+    def start(self) -> None:
+        self._flusher.start()
+
+    def stop(self) -> None:
+        self._flusher.stop()
+
+    def metrics(self) -> dict:
+        with self._cond:
+            return {
+                "sink": type(self.sink).__name__,
+                "overflow": self.overflow,
+                "queued": len(self._queue),
+                "max_queue": self.max_queue,
+                "recorded": self.recorded,
+                "dropped": self.dropped,
+                "written": self.written,
+                "batches": self.batches,
+                "write_errors": self.write_errors,
+            }
+
+
+def _build_sink():
+    if settings.AUDIT_SINK == "ndjson":
+        return NDJSONAuditSink(settings.AUDIT_NDJSON_PATH, settings.AUDIT_NDJSON_MAX_BYTES, settings.AUDIT_NDJSON_BACKUP_COUNT)
+    return DatabaseAuditSink()
+
+
+audit_log = AuditLog(
+    _build_sink(),
+    max_queue=settings.AUDIT_MAX_QUEUE,
+    batch_size=settings.AUDIT_BATCH_SIZE,
+    flush_interval=settings.AUDIT_FLUSH_SECONDS,
+    overflow=settings.AUDIT_OVERFLOW,
+    block_timeout_ms=settings.AUDIT_BLOCK_TIMEOUT_MS,
+)
@@ -0,0 +1,113 @@
+"""
+Offline breached-password screening.
+
+The index is built by `python -m app.tools.build_breach_index` from a dump of
+SHA-1 hashes (e.g. the HIBP "SHA1:count" file) or plaintext passwords:
+
+    header   "<8sIIQ"  magic, width, reserved, count            (24 bytes)
+    fanout   65536 x uint64 little-endian: number of records whose
+             first two bytes are <= i (same idea as a git pack .idx)
+    records  count x `width` bytes: sorted, unique SHA-1 prefixes
+
+The file is memory-mapped read-only, so every gunicorn worker shares the same
+page-cache pages; only the fanout table (512 KB) is copied per worker. A
+lookup reads the fanout bucket and binary-searches inside it: for a 1B-entry
+index a bucket has ~15k records, i.e. ~14 probes within ~40 adjacent pages.
+"""
+import hashlib
+import logging
+import mmap
+import struct
+import sys
+import threading
+from array import array
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b"BPWIDX1\x00"
+HEADER = struct.Struct("<8sIIQ")
+FANOUT_SIZE = 1 << 16
+RECORDS_OFFSET = HEADER.size + FANOUT_SIZE * 8
+
+
+class BreachedPasswordIndex:
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, "rb") as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self.width, _, self.count = HEADER.unpack_from(self._mm, 0)
+        if magic != MAGIC:
+            self._mm.close()
+            raise ValueError(f"{path}: not a breached-password index")
+        if len(self._mm) != RECORDS_OFFSET + self.count * self.width:
+            self._mm.close()
+            raise ValueError(f"{path}: truncated index")
+
+        self._fanout = array("Q", self._mm[HEADER.size:RECORDS_OFFSET])
+        if sys.byteorder == "big":
+            self._fanout.byteswap()
+        if hasattr(self._mm, "madvise"):
+            # lookup กระโดดไปทั่วไฟล์: ไม่ต้อง readahead
+            self._mm.madvise(mmap.MADV_RANDOM)
+
+    def contains_hash(self, digest: bytes) -> bool:
+        key = digest[: self.width]
+        bucket = (key[0] << 8) | key[1]
+        lo = self._fanout[bucket - 1] if bucket else 0
+        hi = self._fanout[bucket]
+        mm, w = self._mm, self.width
+        while lo < hi:
+            mid = (lo + hi) >> 1
+            off = RECORDS_OFFSET + mid * w
+            rec = mm[off:off + w]
+            if rec < key:
+                lo = mid + 1
+            elif rec > key:
+                hi = mid
+            else:
+                return True
+        return False
+
+    def __contains__(self, password: str) -> bool:
+        return self.contains_hash(hashlib.sha1(password.encode("utf-8")).digest())
+
+    def close(self) -> None:
+        self._mm.close()
+
+
+class BreachedPasswordChecker:
+    """Process-wide checker; disabled (never matches) when no index is configured."""
+
+    def __init__(self, path: str = ""):
+        self.path = path
+        self._index: BreachedPasswordIndex | None = None
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.path)
+
+    def open(self) -> BreachedPasswordIndex | None:
+        if not self.path:
+            return None
+        with self._lock:
+            if self._index is None:
+                self._index = BreachedPasswordIndex(self.path)
+                logger.info("breached-password index: %s (%d entries)", self.path, self._index.count)
+            return self._index
+
+    def is_breached(self, password: str) -> bool:
+        index = self._index or self.open()
+        return index is not None and password in index
+
+
+breached_passwords = BreachedPasswordChecker(settings.BREACHED_PASSWORDS_INDEX)
+
+
+def check_not_breached(password: str) -> str:
+    """pydantic validator body: reject passwords that appear in the breach index."""
+    if breached_passwords.is_breached(password):
+        raise ValueError("This password has appeared in a data breach; choose a different one")
+    return password
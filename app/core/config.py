@@ -23,6 +23,16 @@ class Settings(BaseSettings):
     DOCS_ENABLED: bool = False
     DOCS_KEY: Optional[str] = None
 
+    # ---- Admin / diagnostics ----
+    # ถ้าตั้ง ADMIN_KEY ต้องส่ง header x-admin-key ให้ตรง, ถ้าไม่ตั้งเปิดให้เฉพาะ dev
+    ADMIN_KEY: Optional[str] = None
+    ADMIN_BULK_CHUNK_SIZE: int = 1000  # user ต่อ transaction ของ /admin/users/bulk (ขนาด IN (...))
+    SERVER_TIMING_ENABLED: bool = False  # ใส่ Server-Timing header ทุก response
+    SLOW_REQUEST_MS: float = 500.0
+    SLOW_TRACE_BUFFER_SIZE: int = 200
+    PROFILER_MAX_SECONDS: float = 60.0
+    PROFILER_INTERVAL_MS: float = 5.0
+
     # ---- CORS / hosts ----
     ALLOWED_ORIGINS: str = ""  # comma-separated
     CORS_ALLOW_CREDENTIALS: bool = True
@@ -36,17 +46,99 @@ class Settings(BaseSettings):
 
     # ---- Database ----
     DATABASE_URL: str
+    # read replicas (comma-separated); ว่าง = อ่านจาก primary ทั้งหมด
+    DATABASE_REPLICA_URLS: str = ""
+    REPLICA_MAX_LAG_SECONDS: float = 0.0  # 0 = ไม่เช็ค lag
+    REPLICA_LAG_CHECK_SECONDS: float = 5.0
+    # sharding ตาม user_id (comma-separated => shard-0, shard-1, ...); ว่าง = DB เดียว
+    # DATABASE_URL เก็บ directory (user_shards) + audit_events
+    SHARD_URLS: str = ""
+    SHARD_DIRECTORY_CACHE_SECONDS: float = 30.0
+
+    # ---- DB pool (ต่อ worker, ต่อ engine) ----
+    DB_POOL_SIZE: int = 10
+    DB_MAX_OVERFLOW: int = 20
+    DB_POOL_TIMEOUT: float = 30.0
+    DB_POOL_RECYCLE: int = 1800
+    DB_POOL_PRE_PING: bool = True
+    DB_MAX_CONNECTIONS: int = 0  # max_connections ของ DB server; 0 = ถาม server ตอน startup (MySQL/Postgres)
+    # sync endpoint รันใน AnyIO threadpool (default 40) / จำนวน gunicorn worker (--workers)
+    THREADPOOL_TOKENS: int = 40
+    WEB_CONCURRENCY: int = 2
 
     # ---- JWT ----
     JWT_SECRET: str
     JWT_ALGORITHM: str = "HS256"  # ให้ใช้ชื่อนี้เป็นหลัก
+    JWT_CODEC: str = "auto"  # auto (HS256 => fast) | fast | jose
 
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 15
     REFRESH_TOKEN_EXPIRE_DAYS: int = 14
+    REFRESH_SESSIONS_PER_USER_MAX: int = 20  # live session ต่อ user (เกิน => revoke ตัวที่ใช้ล่าสุดเก่าสุด); 0 = ไม่จำกัด
     PASSWORD_RESET_TOKEN_EXPIRE_MINUTES: int = 15
 
+    # ---- Session telemetry (write-behind last_used_at/ip/user_agent) ----
+    SESSION_TELEMETRY_ENABLED: bool = True
+    SESSION_TELEMETRY_FLUSH_SECONDS: float = 5.0
+    SESSION_TELEMETRY_MAX_PENDING: int = 10000
+
+    # ---- Admission control (load shedding) ----
+    ADMISSION_ENABLED: bool = True
+    ADMISSION_HASH_CONCURRENCY: int = 4     # bcrypt routes พร้อมกันต่อ worker
+    ADMISSION_DB_CONCURRENCY: int = 20
+    ADMISSION_CHEAP_CONCURRENCY: int = 100
+    ADMISSION_MAX_QUEUE_WAIT_MS: float = 2000.0
+    ADMISSION_MAX_QUEUE: int = 200
+    ADMISSION_RETRY_AFTER_SECONDS: int = 1
+
+    # ---- Audit log (async batched) ----
+    AUDIT_ENABLED: bool = True
+    AUDIT_SINK: str = "db"  # db|ndjson
+    AUDIT_MAX_QUEUE: int = 10000
+    AUDIT_BATCH_SIZE: int = 500
+    AUDIT_FLUSH_SECONDS: float = 1.0
+    AUDIT_OVERFLOW: str = "drop_oldest"  # drop_oldest|drop_newest|block
+    AUDIT_BLOCK_TIMEOUT_MS: float = 50.0
+    AUDIT_NDJSON_PATH: str = "logs/audit.ndjson"
+    AUDIT_NDJSON_MAX_BYTES: int = 50 * 1024 * 1024
+    AUDIT_NDJSON_BACKUP_COUNT: int = 10
+
+    # ---- Access log (app.core.access_log: JSON ต่อ request ผ่าน queue + listener thread) ----
+    ACCESS_LOG_ENABLED: bool = True
+    ACCESS_LOG_PATH: str = ""           # ว่าง = stdout
+    ACCESS_LOG_MAX_QUEUE: int = 10000   # คิวเต็ม = ทิ้งบรรทัดนั้น (นับใน /admin/access-log) ไม่รอ
+    ACCESS_LOG_SAMPLE: str = "/api/v1/auth/verify=0.01"  # route=rate,... (5xx/429 log ทุกครั้ง)
+
+    # ---- Worker warmup (app.core.warmup: ก่อน /health ตอบ ready) ----
+    WARMUP_ENABLED: bool = True
+    WARMUP_POOL_CONNECTIONS: int = -1  # connection ที่เปิดไว้ก่อนต่อ engine; -1 = DB_POOL_SIZE, 0 = ไม่เปิด
+
+    # ---- Traffic recorder (app.core.recorder -> app.tools.replay) ----
+    TRAFFIC_RECORD_ENABLED: bool = False
+    TRAFFIC_RECORD_SAMPLE_RATE: float = 0.01     # สัดส่วนของ client (ตาม IP) ที่ถูกอัด: อัดทั้ง flow ของ client นั้น
+    TRAFFIC_RECORD_PATH: str = "logs/traffic.ndjson"
+    TRAFFIC_RECORD_MAX_BYTES: int = 50 * 1024 * 1024
+    TRAFFIC_RECORD_BACKUP_COUNT: int = 10
+    TRAFFIC_RECORD_MAX_BODY_BYTES: int = 4096    # body ใหญ่กว่านี้เก็บแค่ "<body:truncated>"
+
+    # ---- Revocation feed (/revocations: long-poll + SSE) ----
+    # credential ของ subscriber (header x-revocation-key), แยกจาก ADMIN_KEY; ไม่ตั้ง => เปิดเฉพาะ dev
+    REVOCATION_FEED_KEY: Optional[str] = None
+    REVOCATION_POLL_SECONDS: float = 1.0      # poll ตาราง revocation_events ต่อ worker (เฉพาะตอนมี subscriber)
+    REVOCATION_BUFFER_SIZE: int = 10000       # event ล่าสุดใน memory; cursor เก่ากว่านี้อ่านจากตาราง
+    REVOCATION_SETTLE_SECONDS: float = 5.0    # รอ id ที่ขาด (transaction ที่ยัง commit ไม่เสร็จ) นานสุดเท่านี้
+    REVOCATION_LONGPOLL_MAX_SECONDS: float = 30.0
+    REVOCATION_SSE_HEARTBEAT_SECONDS: float = 15.0
+
+    # ---- Verify over a Unix domain socket (app.api.verify_socket) ----
+    VERIFY_SOCKET_PATH: str = ""   # ว่าง = ปิด; worker ที่ถือ flock ของ <path>.lock เป็นคนให้บริการ
+    VERIFY_SOCKET_MODE: str = "660"  # สิทธิ์ไฟล์ socket (octal): ใครเชื่อมต่อได้ = ใครเรียก verify ได้
+
+    # ---- Breached passwords (offline index: app.tools.build_breach_index) ----
+    BREACHED_PASSWORDS_INDEX: str = ""  # path ของไฟล์ index; ว่าง = ไม่เช็ค
+
     # ---- Rate limit ----
     RATE_LIMIT_ENABLED: bool = True
+    RATE_LIMIT_STORAGE_URI: str = "memory://"  # หรือ sketch://?width=65536&depth=4 (memory คงที่), redis://...
 
     # ---- SMTP (prod only) ----
     SMTP_HOST: Optional[str] = None
@@ -70,6 +162,46 @@ class Settings(BaseSettings):
             raise ValueError("ENV must be 'dev' or 'prod'")
         return v
 
+    @field_validator("AUDIT_SINK")
+    @classmethod
+    def validate_audit_sink(cls, v: str) -> str:
+        v = (v or "").strip().lower()
+        if v not in ("db", "ndjson"):
+            raise ValueError("AUDIT_SINK must be 'db' or 'ndjson'")
+        return v
+
+    @field_validator("ACCESS_LOG_SAMPLE")
+    @classmethod
+    def validate_access_log_sample(cls, v: str) -> str:
+        for item in (v or "").split(","):
+            if not item.strip():
+                continue
+            route, _, rate = item.strip().rpartition("=")
+            try:
+                ok = bool(route.strip()) and 0.0 <= float(rate) <= 1.0
+            except ValueError:
+                ok = False
+            if not ok:
+                raise ValueError("ACCESS_LOG_SAMPLE must look like '/api/v1/auth/verify=0.01,...' (rate 0..1)")
+        return v
+
+    @field_validator("VERIFY_SOCKET_MODE")
+    @classmethod
+    def validate_verify_socket_mode(cls, v: str) -> str:
+        try:
+            int(v, 8)
+        except ValueError:
+            raise ValueError("VERIFY_SOCKET_MODE must be an octal mode like '660'")
+        return v
+
+    @field_validator("JWT_CODEC")
+    @classmethod
+    def validate_jwt_codec(cls, v: str) -> str:
+        v = (v or "").strip().lower()
+        if v not in ("auto", "fast", "jose"):
+            raise ValueError("JWT_CODEC must be 'auto', 'fast' or 'jose'")
+        return v
+
     # รองรับ env เก่า JWT_ALG -> map ไป JWT_ALGORITHM
     @field_validator("JWT_ALGORITHM", mode="before")
     @classmethod
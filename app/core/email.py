@@ -1,5 +1,3 @@
-import smtplib
-from email.message import EmailMessage
 from app.core.config import settings
 
 def send_reset_email(to_email: str, token: str) -> None:
@@ -16,6 +14,10 @@ def send_reset_email(to_email: str, token: str) -> None:
     if any(v in (None, "", 0) for v in required):
         raise RuntimeError("SMTP settings are not configured for production")
 
+    # import ตอนใช้: ส่งเมลเฉพาะ prod + forgot-password, ไม่ต้องโหลดทุก worker
+    import smtplib
+    from email.message import EmailMessage
+
     reset_link = f"{settings.FRONTEND_RESET_URL}?token={token}"
 
     msg = EmailMessage()
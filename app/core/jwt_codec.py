@@ -0,0 +1,115 @@
+"""
+JWT encode/decode behind a small TokenCodec interface.
+
+- HS256Codec: the HMAC key (inner/outer pads) and the base64url header segment
+  are computed once; encode is json + one hmac copy, decode checks the header
+  segment, the signature and only the claims we use (exp, type, sub).
+- JoseCodec: python-jose, for any other JWT_ALGORITHM or when JWT_CODEC=jose.
+
+Both produce byte-identical tokens for the same payload (same header, same
+json separators), so switching codec never invalidates issued tokens.
+"""
+import base64
+import binascii
+import hashlib
+import hmac
+import json
+import time
+
+from jose import JWTError, jwt
+
+from app.core.config import settings
+
+_HS256_HEADER = {"alg": "HS256", "typ": "JWT"}
+
+
+def _b64encode(data: bytes) -> bytes:
+    return base64.urlsafe_b64encode(data).rstrip(b"=")
+
+
+def _b64decode(data: bytes) -> bytes:
+    return base64.urlsafe_b64decode(data + b"=" * (-len(data) % 4))
+
+
+class TokenCodec:
+    """encode(payload) -> token, decode(token) -> claims; decode raises ValueError."""
+
+    name = "base"
+
+    def encode(self, payload: dict) -> str:
+        raise NotImplementedError
+
+    def decode(self, token: str) -> dict:
+        raise NotImplementedError
+
+
+class JoseCodec(TokenCodec):
+    name = "jose"
+
+    def __init__(self, secret: str, algorithm: str = "HS256"):
+        self.secret = secret
+        self.algorithm = algorithm
+
+    def encode(self, payload: dict) -> str:
+        return jwt.encode(payload, self.secret, algorithm=self.algorithm)
+
+    def decode(self, token: str) -> dict:
+        try:
+            return jwt.decode(token, self.secret, algorithms=[self.algorithm])
+        except JWTError as e:
+            raise ValueError("Invalid token") from e
+
+
+class HS256Codec(TokenCodec):
+    name = "hs256"
+
+    def __init__(self, secret: str):
+        # hmac object ที่ใส่ key แล้ว: ต่อ token แค่ .copy() (ไม่ derive key ใหม่)
+        self._mac = hmac.new(secret.encode("utf-8"), digestmod=hashlib.sha256)
+        # header เดียวกับ jose (sort_keys + compact) => token เหมือนกันทุก byte
+        self._header = _b64encode(json.dumps(_HS256_HEADER, separators=(",", ":"), sort_keys=True).encode())
+
+    def _sign(self, signing_input: bytes) -> bytes:
+        mac = self._mac.copy()
+        mac.update(signing_input)
+        return mac.digest()
+
+    def encode(self, payload: dict) -> str:
+        signing_input = self._header + b"." + _b64encode(json.dumps(payload, separators=(",", ":")).encode())
+        return (signing_input + b"." + _b64encode(self._sign(signing_input))).decode("ascii")
+
+    def decode(self, token: str) -> dict:
+        try:
+            raw = token.encode("ascii")
+            header, body, sig = raw.split(b".")
+            if header != self._header:
+                # token ที่ไม่ได้ออกจากเรา (alg อื่น / header แปลก): เช็ค alg ตรงๆ
+                if json.loads(_b64decode(header)).get("alg") != "HS256":
+                    raise ValueError("Invalid token")
+            if not hmac.compare_digest(_b64decode(sig), self._sign(header + b"." + body)):
+                raise ValueError("Invalid token")
+            claims = json.loads(_b64decode(body))
+        except (ValueError, UnicodeError, binascii.Error, AttributeError) as e:
+            raise ValueError("Invalid token") from e
+
+        if not isinstance(claims, dict):
+            raise ValueError("Invalid token")
+        exp = claims.get("exp")
+        # เหมือน jose: หมดอายุเมื่อ exp < now (leeway 0)
+        if not isinstance(exp, int) or isinstance(exp, bool) or exp < int(time.time()):
+            raise ValueError("Invalid token")
+        if not isinstance(claims.get("sub"), str) or not isinstance(claims.get("type"), str):
+            raise ValueError("Invalid token")
+        return claims
+
+
+def build_codec(secret: str | None = None, algorithm: str | None = None, codec: str | None = None) -> TokenCodec:
+    secret = secret if secret is not None else settings.JWT_SECRET
+    algorithm = algorithm or settings.JWT_ALGORITHM
+    codec = codec or settings.JWT_CODEC
+
+    if codec == "fast" and algorithm != "HS256":
+        raise ValueError(f"JWT_CODEC=fast supports HS256 only (got {algorithm})")
+    if codec in ("fast", "auto") and algorithm == "HS256":
+        return HS256Codec(secret)
+    return JoseCodec(secret, algorithm)
@@ -1,6 +1,8 @@
 from slowapi import Limiter
 from slowapi.util import get_remote_address
 from app.core.config import settings
+from app.core import rate_sketch  # noqa: F401  (ลงทะเบียน scheme sketch://)
 
-limiter = Limiter(key_func=get_remote_address)
+# memory:// = counter ต่อ key (โตตามจำนวน IP), sketch:// = หน่วยความจำคงที่ (app.core.rate_sketch)
+limiter = Limiter(key_func=get_remote_address, storage_uri=settings.RATE_LIMIT_STORAGE_URI)
 limiter.enabled = settings.RATE_LIMIT_ENABLED
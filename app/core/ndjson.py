@@ -0,0 +1,39 @@
+import json
+import os
+import threading
+
+
+class RotatingNDJSONWriter:
+    """
+    Append dict rows as NDJSON lines; rotate like logging.RotatingFileHandler
+    (path -> path.1 -> path.2 ... up to backup_count) when max_bytes is reached.
+    """
+
+    def __init__(self, path: str, max_bytes: int = 50 * 1024 * 1024, backup_count: int = 10):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self._lock = threading.Lock()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def _rotate(self) -> None:
+        for i in range(self.backup_count - 1, 0, -1):
+            src = f"{self.path}.{i}"
+            if os.path.exists(src):
+                os.replace(src, f"{self.path}.{i + 1}")
+        if os.path.exists(self.path):
+            if self.backup_count > 0:
+                os.replace(self.path, f"{self.path}.1")
+            else:
+                os.remove(self.path)
+
+    def write_many(self, rows: list[dict]) -> None:
+        data = "".join(json.dumps(r, separators=(",", ":"), default=str) + "\n" for r in rows)
+        with self._lock:
+            size = os.path.getsize(self.path) if os.path.exists(self.path) else 0
+            if size and self.max_bytes and size + len(data) > self.max_bytes:
+                self._rotate()
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(data)
@@ -0,0 +1,17 @@
+from dataclasses import dataclass
+
+
+@dataclass(frozen=True, slots=True)
+class Principal:
+    """
+    Authenticated caller for read-only endpoints (/verify, logout-all ...).
+
+    Loaded with a column-only query, so there is no ORM instance, identity-map
+    entry or lazy relationship behind it. Endpoints that modify the user use
+    `get_current_user_entity` to get the ORM `User` instead.
+    """
+
+    id: int
+    email: str
+    is_active: bool
+    session_id: str | None = None
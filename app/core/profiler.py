@@ -0,0 +1,196 @@
+"""
+Low-overhead sampling profiler for a live worker.
+
+A background thread wakes every `interval` seconds, grabs the Python stack of
+every other thread via `sys._current_frames()` and counts identical stacks.
+Nothing is hooked into the interpreter, so the profiled code runs at full speed;
+the cost is one stack walk per thread per tick.
+
+Output formats:
+- collapsed: "frame;frame;frame count" lines (flamegraph.pl / speedscope input)
+- pstats:    marshal dump loadable with `pstats.Stats(path)`; times are
+             samples * interval, call counts are sample counts
+"""
+import marshal
+import os
+import sys
+import threading
+import time
+import uuid
+from collections import Counter, OrderedDict
+
+from app.core.config import settings
+
+Frame = tuple[str, int, str]  # (filename, firstlineno, funcname) เหมือน key ของ pstats
+
+# leaf frames ของ thread ที่นั่งรอเฉยๆ (threadpool idle, event loop select) ไม่ต้องนับ
+_IDLE_LEAVES = {
+    ("threading.py", "wait"),
+    ("threading.py", "_wait_for_tstate_lock"),
+    ("queue.py", "get"),
+    ("selectors.py", "select"),
+    ("thread.py", "_worker"),
+}
+
+
+class ProfilerBusy(RuntimeError):
+    pass
+
+
+def _frame_label(frame: Frame) -> str:
+    filename, lineno, name = frame
+    return f"{name} ({os.path.basename(filename)}:{lineno})"
+
+
+class SamplingProfiler:
+    def __init__(self, interval: float = 0.005, include_idle: bool = False):
+        self.interval = interval
+        self.include_idle = include_idle
+        self.samples: Counter[tuple[Frame, ...]] = Counter()
+        self.sample_count = 0
+        self.duration = 0.0
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+        self._skip: set[int] = set()
+
+    # ---------- sampling ----------
+    def _take_sample(self) -> None:
+        for ident, frame in sys._current_frames().items():
+            if ident in self._skip:
+                continue
+
+            stack: list[Frame] = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append((code.co_filename, code.co_firstlineno, code.co_name))
+                frame = frame.f_back
+
+            if not stack:
+                continue
+            leaf = stack[0]
+            if not self.include_idle and (os.path.basename(leaf[0]), leaf[2]) in _IDLE_LEAVES:
+                continue
+
+            stack.reverse()  # root -> leaf
+            self.samples[tuple(stack)] += 1
+
+    def _run(self) -> None:
+        self._skip.add(threading.get_ident())
+        t0 = time.perf_counter()
+        while not self._stop.wait(self.interval):
+            self._take_sample()
+            self.sample_count += 1
+        self.duration = time.perf_counter() - t0
+
+    def start(self) -> None:
+        self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def run_for(self, seconds: float) -> "SamplingProfiler":
+        self._skip.add(threading.get_ident())  # thread ที่นั่ง sleep รอผลไม่ต้องนับ
+        self.start()
+        time.sleep(seconds)
+        self.stop()
+        return self
+
+    # ---------- output ----------
+    def collapsed(self) -> str:
+        lines = [
+            ";".join(_frame_label(f) for f in stack) + f" {count}"
+            for stack, count in self.samples.most_common()
+        ]
+        return "\n".join(lines) + ("\n" if lines else "")
+
+    def pstats_dump(self) -> bytes:
+        # stats[func] = (primitive calls, total calls, self time, cumulative time, callers)
+        # callers[caller] = (calls, calls, self time, cumulative time) ของ edge caller -> func
+        stats: dict = {}
+        interval = self.interval
+
+        for stack, count in self.samples.items():
+            seen: set[Frame] = set()
+            seen_edges: set[tuple[Frame, Frame]] = set()
+            last = len(stack) - 1
+            for i, func in enumerate(stack):
+                cc, nc, tt, ct, callers = stats.get(func, (0, 0, 0.0, 0.0, {}))
+                if func not in seen:  # recursion: นับ cumulative ครั้งเดียวต่อ sample
+                    seen.add(func)
+                    cc += count
+                    nc += count
+                    ct += count * interval
+                if i == last:
+                    tt += count * interval
+                if i > 0:
+                    edge = (stack[i - 1], func)
+                    if edge not in seen_edges:
+                        seen_edges.add(edge)
+                        e_cc, e_nc, e_tt, e_ct = callers.get(stack[i - 1], (0, 0, 0.0, 0.0))
+                        e_tt += count * interval if i == last else 0.0
+                        callers[stack[i - 1]] = (e_cc + count, e_nc + count, e_tt, e_ct + count * interval)
+                stats[func] = (cc, nc, tt, ct, callers)
+
+        return marshal.dumps(stats)
+
+
+# ป้องกันไม่ให้มีหลาย profiler วิ่งพร้อมกันใน worker เดียว
+_profile_lock = threading.Lock()
+
+
+def profile_worker(seconds: float, interval: float) -> SamplingProfiler:
+    seconds = min(max(seconds, 0.1), settings.PROFILER_MAX_SECONDS)
+    if not _profile_lock.acquire(blocking=False):
+        raise ProfilerBusy("A profiling session is already running on this worker")
+    try:
+        return SamplingProfiler(interval=interval).run_for(seconds)
+    finally:
+        _profile_lock.release()
+
+
+class RequestProfiles:
+    """Last N per-request profiles (x-profile header), looked up by id."""
+
+    def __init__(self, maxlen: int):
+        self.maxlen = maxlen
+        self._items: OrderedDict[str, dict] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def add(self, method: str, path: str, profiler: SamplingProfiler) -> str:
+        profile_id = uuid.uuid4().hex
+        with self._lock:
+            self._items[profile_id] = {"method": method, "path": path, "profiler": profiler}
+            while len(self._items) > self.maxlen:
+                self._items.popitem(last=False)
+        return profile_id
+
+    def get(self, profile_id: str) -> dict | None:
+        with self._lock:
+            return self._items.get(profile_id)
+
+
+request_profiles = RequestProfiles(maxlen=20)
+
+
+def start_request_profile() -> SamplingProfiler | None:
+    # per-request mode: sample ทุก thread ตลอดอายุ request นี้ (request อื่นที่วิ่งพร้อมกันจะติดมาด้วย)
+    if not _profile_lock.acquire(blocking=False):
+        return None
+    profiler = SamplingProfiler(interval=settings.PROFILER_INTERVAL_MS / 1000)
+    try:
+        profiler.start()
+    except Exception:
+        _profile_lock.release()
+        raise
+    return profiler
+
+
+def finish_request_profile(profiler: SamplingProfiler, method: str, path: str) -> str:
+    try:
+        profiler.stop()
+    finally:
+        _profile_lock.release()
+    return request_profiles.add(method, path, profiler)
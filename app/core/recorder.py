@@ -0,0 +1,244 @@
+"""
+Opt-in production traffic recorder (TRAFFIC_RECORD_ENABLED) for app.tools.replay.
+
+A pure ASGI middleware, outermost so the recorded latency is what clients
+saw. Sampling is per client (a keyed hash of the client IP compared with
+TRAFFIC_RECORD_SAMPLE_RATE), so a sampled client is recorded as a whole
+sequence: login -> verify burst -> refresh -> logout.
+
+Each request becomes one NDJSON row in rotating files (RotatingNDJSONWriter),
+written by a background flusher, never on the request path:
+
+    {"ts", "client", "method", "route", "path", "status", "duration_ms",
+     "body": {...anonymized...}, "auth": "<access:...>", "cookie": "<refresh:...>"}
+
+Anonymization keeps the structure the replayer needs and drops the secrets:
+- email                        -> "<email:ab12cd34ef56>"  (keyed HMAC pseudonym, stable across workers)
+- *password*                   -> "<password:12>"        (length only; the status says if it was right)
+- access / refresh JWTs        -> "<access:user-pseudonym>", "<refresh:user-pseudonym>"
+                                  ("<access:invalid>" when they do not decode)
+- other *token* fields         -> "<token:43>"
+- device_id                    -> "<device:pseudonym>"
+- any other string             -> "<str:len>"; numbers / booleans / null are kept
+`client` is a pseudonym of the client IP (groups one client's flow). Query
+strings, IPs and user agents are not recorded. /api/v1/admin is never recorded.
+"""
+import hashlib
+import hmac
+import json
+import logging
+import threading
+import time
+from collections import deque
+
+from app.core.background import PeriodicFlusher
+from app.core.config import settings
+from app.core.ndjson import RotatingNDJSONWriter
+from app.core.routing import route_template
+from app.core.tokens import decode_token
+
+logger = logging.getLogger(__name__)
+
+_KEY = hashlib.sha256(b"traffic-recorder:" + settings.JWT_SECRET.encode()).digest()
+
+
+def pseudonym(value: str) -> str:
+    return hmac.new(_KEY, value.lower().encode("utf-8"), hashlib.sha256).hexdigest()[:12]
+
+
+def _token_placeholder(kind: str, raw: str) -> str:
+    try:
+        sub = decode_token(raw).get("sub")
+    except ValueError:
+        return f"<{kind}:invalid>"
+    return f"<{kind}:{pseudonym('uid:' + str(sub))}>"
+
+
+def anonymize(value, key: str = ""):
+    if isinstance(value, dict):
+        return {k: anonymize(v, k.lower()) for k, v in value.items()}
+    if isinstance(value, list):
+        return [anonymize(v, key) for v in value]
+    if not isinstance(value, str):
+        return value
+    if key == "email":
+        return f"<email:{pseudonym(value)}>"
+    if "password" in key:
+        return f"<password:{len(value)}>"
+    if key == "refresh_token":
+        return _token_placeholder("refresh", value)
+    if "token" in key:
+        return f"<token:{len(value)}>"
+    if key == "device_id":
+        return f"<device:{pseudonym(value)}>"
+    return f"<str:{len(value)}>"
+
+
+def _anonymize_body(body: bytes, content_type: str):
+    if not body:
+        return None
+    if "json" in content_type:
+        try:
+            return anonymize(json.loads(body))
+        except ValueError:
+            pass
+    return f"<body:{len(body)}>"
+
+
+def _cookie_refresh(cookie: str) -> str | None:
+    for part in cookie.split(";"):
+        name, _, value = part.strip().partition("=")
+        if name == "refresh_token" and value:
+            return _token_placeholder("refresh", value)
+    return None
+
+
+class TrafficRecorder:
+    def __init__(
+        self,
+        path: str,
+        max_bytes: int = 50 * 1024 * 1024,
+        backup_count: int = 10,
+        sample_rate: float = 0.01,
+        max_body_bytes: int = 4096,
+        max_queue: int = 10000,
+        flush_interval: float = 1.0,
+        exclude_prefixes: tuple[str, ...] = ("/api/v1/admin", "/api/v1/revocations"),
+    ):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self._writer: RotatingNDJSONWriter | None = None  # สร้างตอนใช้จริง (ไม่สร้าง directory ตอน import)
+        self.sample_rate = sample_rate
+        self.max_body_bytes = max_body_bytes
+        self.max_queue = max_queue
+        self.exclude_prefixes = exclude_prefixes
+
+        self._queue: deque[dict] = deque()
+        self._lock = threading.Lock()
+        self._flusher = PeriodicFlusher("traffic-recorder", flush_interval, self.flush)
+
+        self.recorded = 0
+        self.dropped = 0
+        self.written = 0
+
+    @property
+    def writer(self) -> RotatingNDJSONWriter:
+        if self._writer is None:
+            self._writer = RotatingNDJSONWriter(self.path, max_bytes=self.max_bytes, backup_count=self.backup_count)
+        return self._writer
+
+    def sampled(self, client: str) -> bool:
+        if self.sample_rate >= 1:
+            return True
+        if self.sample_rate <= 0:
+            return False
+        digest = hmac.new(_KEY, client.encode(), hashlib.sha256).digest()
+        return int.from_bytes(digest[:8], "big") < self.sample_rate * 2**64
+
+    def record(self, row: dict) -> None:
+        with self._lock:
+            if len(self._queue) >= self.max_queue:
+                self.dropped += 1
+                return
+            self._queue.append(row)
+            self.recorded += 1
+
+    def flush(self) -> int:
+        with self._lock:
+            rows = list(self._queue)
+            self._queue.clear()
+        if rows:
+            self.writer.write_many(rows)
+            with self._lock:
+                self.written += len(rows)
+        return len(rows)
+
+    def start(self) -> None:
+        self._flusher.start()
+
+    def stop(self) -> None:
+        self._flusher.stop()
+
+    def metrics(self) -> dict:
+        with self._lock:
+            return {
+                "path": self.path,
+                "sample_rate": self.sample_rate,
+                "queued": len(self._queue),
+                "recorded": self.recorded,
+                "dropped": self.dropped,
+                "written": self.written,
+            }
+
+
+class TrafficRecorderMiddleware:
+    def __init__(self, app, recorder: TrafficRecorder):
+        self.app = app
+        self.recorder = recorder
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"].startswith(self.recorder.exclude_prefixes):
+            return await self.app(scope, receive, send)
+        client = scope.get("client")
+        client = client[0] if client else ""
+        if not self.recorder.sampled(client):
+            return await self.app(scope, receive, send)
+
+        ts = time.time()
+        start = time.perf_counter()
+        body = bytearray()
+        status = {"code": None}
+        limit = self.recorder.max_body_bytes
+
+        async def recv():
+            message = await receive()
+            if message["type"] == "http.request" and len(body) <= limit:
+                body.extend(message.get("body", b"")[: limit + 1 - len(body)])
+            return message
+
+        async def snd(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, recv, snd)
+        finally:
+            duration_ms = (time.perf_counter() - start) * 1000
+            try:
+                self.recorder.record(self._row(scope, client, ts, duration_ms, status["code"], bytes(body)))
+            except Exception:
+                logger.exception("traffic recorder: failed to record %s", scope["path"])
+
+    def _row(self, scope, client: str, ts: float, duration_ms: float, status: int | None, body: bytes) -> dict:
+        headers = {k.decode("latin-1"): v.decode("latin-1") for k, v in scope.get("headers", [])}
+        route = route_template(scope)
+        row = {
+            "ts": round(ts, 6),
+            "client": pseudonym("ip:" + client),
+            "method": scope["method"],
+            "route": route,
+            "path": route if route and scope.get("path_params") else scope["path"],  # ไม่เก็บค่า path param
+            "status": status,
+            "duration_ms": round(duration_ms, 3),
+        }
+        if len(body) > self.recorder.max_body_bytes:
+            row["body"] = "<body:truncated>"
+        else:
+            row["body"] = _anonymize_body(body, headers.get("content-type", ""))
+        auth = headers.get("authorization", "")
+        if auth[:7].lower() == "bearer ":
+            row["auth"] = _token_placeholder("access", auth[7:].strip())
+        if "cookie" in headers:
+            row["cookie"] = _cookie_refresh(headers["cookie"])
+        return row
+
+
+traffic_recorder = TrafficRecorder(
+    settings.TRAFFIC_RECORD_PATH,
+    max_bytes=settings.TRAFFIC_RECORD_MAX_BYTES,
+    backup_count=settings.TRAFFIC_RECORD_BACKUP_COUNT,
+    sample_rate=settings.TRAFFIC_RECORD_SAMPLE_RATE,
+    max_body_bytes=settings.TRAFFIC_RECORD_MAX_BODY_BYTES,
+)
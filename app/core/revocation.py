@@ -0,0 +1,242 @@
+"""
+Revocation event feed for resource servers that cache /verify.
+
+logout, logout_all, change-password, reset-password, the per-user session
+cap (LRU eviction at login) and admin bulk actions write a row to
+`revocation_events` in the same unit of work as the revoke. Each worker runs
+one poller (only while somebody is subscribed) that reads new rows every
+REVOCATION_POLL_SECONDS, or right away after a local revoke commits. New rows
+go into an in-memory ring buffer, and every waiting subscriber is woken up,
+so N subscribers cost one query per poll instead of N.
+
+Atomicity: on a single database the event and the revoke commit in one
+transaction. With SHARD_URLS, revocation_events is a global table on the
+directory database while refresh tokens live on the user's shard, so the
+Session commits two connections one after the other (no two-phase commit):
+- the event commits, the revoke does not: subscribers drop a session that is
+  still valid (fails closed; the user signs in again);
+- the revoke commits, the event does not: the session is dead for refresh,
+  but subscribers keep trusting its cached access tokens until they expire
+  (ACCESS_TOKEN_EXPIRE_MINUTES). A subscriber that cannot accept that window
+  must check /verify instead of caching.
+
+Event ids are the cursor. On Postgres/MySQL a smaller id can commit after a
+larger one, so the feed does not move past a gap in the ids until the row
+after the gap is REVOCATION_SETTLE_SECONDS old. A rolled-back insert leaves a
+permanent gap, and that gap is then skipped. A subscriber whose cursor is
+older than the buffer catches up from the table.
+
+Event payload: {"id", "user_id", "session_id", "not_before", "reason"}.
+session_id None means every session of the user. A token is revoked when
+`iat < not_before` (both integer epoch seconds). `iat` is truncated to the
+second, so not_before is the revocation time rounded *up*: a token issued
+earlier in the same second is revoked, and so is one issued later in that
+second (fails closed; the client refreshes or signs in again).
+"""
+import asyncio
+import bisect
+import logging
+import math
+import threading
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from datetime import datetime, timezone
+
+import anyio.to_thread
+
+from app.core.config import settings
+from app.crud.revocation_event import latest_id, list_after
+
+logger = logging.getLogger(__name__)
+
+
+def _epoch(dt: datetime) -> int:
+    # SQLite คืน datetime แบบ naive (เก็บเป็น UTC)
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    # ปัดขึ้น: iat เป็นวินาทีเต็ม (ตัดทศนิยม) => token ที่ออกก่อน revoke ในวินาทีเดียวกันต้อง iat < not_before
+    return math.ceil(dt.timestamp())
+
+
+def event_payload(row: dict) -> dict:
+    return {
+        "id": row["id"],
+        "user_id": row["user_id"],
+        "session_id": row["session_id"],
+        "not_before": _epoch(row["not_before"]),
+        "reason": row["reason"],
+    }
+
+
+class RevocationFeed:
+    def __init__(
+        self,
+        session_factory=None,
+        poll_interval: float = 1.0,
+        buffer_size: int = 10000,
+        settle_seconds: float = 5.0,
+        batch_size: int = 1000,
+    ):
+        self.session_factory = session_factory
+        self.poll_interval = poll_interval
+        self.settle_seconds = settle_seconds
+        self.batch_size = batch_size
+
+        self._buffer: deque[dict] = deque(maxlen=buffer_size)
+        self._ids: deque[int] = deque(maxlen=buffer_size)  # ขนานกับ _buffer ไว้ bisect
+        self._head: int | None = None  # id ล่าสุดที่ยืนยันแล้ว; None = ยังไม่ prime
+        self._floor = 0  # buffer มีทุก event ที่ id > _floor
+        self._poll_lock = threading.Lock()
+        self._lock = threading.Lock()  # buffer: poll thread เขียน / event loop อ่าน
+
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._task: asyncio.Task | None = None
+        self._wake: asyncio.Event | None = None
+        self._changed: asyncio.Event | None = None
+        self._subscribers = 0
+
+        self.polls = 0
+        self.events_seen = 0
+        self.gaps_skipped = 0
+        self.catch_ups = 0
+
+    def _session(self):
+        if self.session_factory is None:
+            from app.db.session import SessionLocal
+            self.session_factory = SessionLocal
+        return self.session_factory()
+
+    # -----------------------------
+    # poll (thread)
+    # -----------------------------
+    def poll(self) -> int:
+        """Read new events into the buffer; returns how many were accepted."""
+        with self._poll_lock:
+            self.polls += 1
+            with self._session() as db:
+                if self._head is None:
+                    # subscriber แรก: เริ่มที่ head ปัจจุบัน (ของเก่าไป catch-up จากตาราง)
+                    self._head = self._floor = latest_id(db)
+                    return 0
+                accepted = 0
+                while True:
+                    rows = list_after(db, self._head, limit=self.batch_size)
+                    n = self._accept(rows)
+                    accepted += n
+                    if n < self.batch_size:
+                        return accepted
+
+    def _accept(self, rows: list[dict]) -> int:
+        now = time.time()
+        n = 0
+        with self._lock:
+            for row in rows:
+                if row["id"] != self._head + 1:
+                    # id ที่ขาดไปอาจยัง commit ไม่เสร็จ: รอจนแถวถัดไปเก่ากว่า settle
+                    if now - _epoch(row["created_at"]) < self.settle_seconds:
+                        break
+                    self.gaps_skipped += 1
+                if len(self._buffer) == self._buffer.maxlen:
+                    self._floor = self._ids[0]
+                self._buffer.append(event_payload(row))
+                self._ids.append(row["id"])
+                self._head = row["id"]
+                n += 1
+            self.events_seen += n
+        return n
+
+    def events_after(self, cursor: int, limit: int) -> list[dict] | None:
+        """Buffered events after cursor; None = cursor is older than the buffer."""
+        with self._lock:
+            if cursor < self._floor:
+                return None
+            i = bisect.bisect_right(self._ids, cursor)
+            return [self._buffer[j] for j in range(i, min(i + limit, len(self._buffer)))]
+
+    def _catch_up(self, cursor: int, limit: int) -> list[dict]:
+        self.catch_ups += 1
+        with self._session() as db:
+            return [event_payload(r) for r in list_after(db, cursor, upto=self._head, limit=limit)]
+
+    # -----------------------------
+    # poller task (event loop)
+    # -----------------------------
+    def _bind_loop(self) -> None:
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            # TestClient / reload สร้าง loop ใหม่ได้: Event ผูกกับ loop เดิม
+            self._loop, self._task = loop, None
+            self._wake, self._changed = asyncio.Event(), asyncio.Event()
+        if self._task is None or self._task.done():
+            self._task = loop.create_task(self._run())
+
+    async def _run(self) -> None:
+        while self._subscribers > 0:
+            try:
+                if await anyio.to_thread.run_sync(self.poll):
+                    self._changed.set()
+                    self._changed = asyncio.Event()
+            except Exception:
+                logger.exception("revocation feed: poll failed")
+            try:
+                await asyncio.wait_for(self._wake.wait(), self.poll_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+
+    def wake(self) -> None:
+        """Poll now (called after a local revoke commits); no-op without subscribers."""
+        loop, wake = self._loop, self._wake
+        if self._subscribers and loop is not None and wake is not None and not loop.is_closed():
+            loop.call_soon_threadsafe(wake.set)
+
+    @asynccontextmanager
+    async def subscription(self):
+        self._subscribers += 1
+        try:
+            self._bind_loop()
+            if self._head is None or self._subscribers == 1:
+                # ไม่มี subscriber = poller หยุด => head ค้างตั้งแต่ครั้งก่อน, ตามให้ทันก่อนตอบ
+                await anyio.to_thread.run_sync(self.poll)
+            yield self
+        finally:
+            self._subscribers -= 1
+
+    @property
+    def head(self) -> int:
+        return self._head or 0
+
+    async def wait_for_events(self, cursor: int, timeout: float, limit: int = 1000) -> list[dict]:
+        """Events after cursor; waits up to timeout seconds when there are none yet."""
+        deadline = time.monotonic() + timeout
+        while True:
+            events = self.events_after(cursor, limit)
+            if events is None:
+                return await anyio.to_thread.run_sync(self._catch_up, cursor, limit)
+            remaining = deadline - time.monotonic()
+            if events or remaining <= 0:
+                return events
+            try:
+                await asyncio.wait_for(self._changed.wait(), remaining)
+            except asyncio.TimeoutError:
+                pass
+
+    def metrics(self) -> dict:
+        return {
+            "subscribers": self._subscribers,
+            "head": self._head,
+            "buffered": len(self._buffer),
+            "buffer_floor": self._floor,
+            "polls": self.polls,
+            "events_seen": self.events_seen,
+            "gaps_skipped": self.gaps_skipped,
+            "catch_ups": self.catch_ups,
+        }
+
+
+revocation_feed = RevocationFeed(
+    poll_interval=settings.REVOCATION_POLL_SECONDS,
+    buffer_size=settings.REVOCATION_BUFFER_SIZE,
+    settle_seconds=settings.REVOCATION_SETTLE_SECONDS,
+)
@@ -0,0 +1,5 @@
+def route_template(scope) -> str | None:
+    """Path template of the matched route ("/api/v1/auth/verify"), None before routing / on 404."""
+    # FastAPI ใหม่ไม่ flatten router ที่ include: scope["route"].path ไม่มี prefix (/api/v1)
+    ctx = scope.get("fastapi", {}).get("effective_route_context")
+    return getattr(ctx, "path", None) or getattr(scope.get("route"), "path", None)
@@ -1,9 +1,22 @@
 from passlib.context import CryptContext
 
+from app.core.timing import timed
+
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
+# admin สั่ง force reset: ไม่มีรหัสผ่านไหนตรง => ต้องตั้งใหม่ผ่าน forgot/reset-password
+UNUSABLE_PASSWORD = "!reset-required"
+
+@timed("security.hash_password")
 def hash_password(password: str) -> str:
     return pwd_context.hash(password)
 
+@timed("security.verify_password")
 def verify_password(password: str, password_hash: str) -> bool:
-    return pwd_context.verify(password, password_hash)
+    if password_hash.startswith("!"):
+        return False
+    try:
+        return pwd_context.verify(password, password_hash)
+    except ValueError:
+        # hash ที่ passlib ไม่รู้จัก (เช่นตั้งมือใน DB) = ใช้ไม่ได้ ไม่ใช่ 500
+        return False
@@ -0,0 +1,146 @@
+"""
+Write-behind buffer for session telemetry (last_used_at / ip / user_agent).
+
+Every authenticated request `touch()`es its session in memory; repeated touches
+of the same session coalesce into one pending entry. A background flusher
+writes all pending entries as one executemany UPDATE every
+SESSION_TELEMETRY_FLUSH_SECONDS and on shutdown.
+
+Telemetry is best-effort: when the buffer is full new sessions are dropped
+(counted) instead of writing on the request path.
+"""
+import logging
+import threading
+from datetime import datetime, timezone
+
+from sqlalchemy import bindparam, func, update
+
+from app.core.background import PeriodicFlusher
+from app.core.config import settings
+from app.db.sharding import group_by_shard
+from app.models.refresh_token import RefreshToken
+
+logger = logging.getLogger(__name__)
+
+_rt = RefreshToken.__table__
+
+# Core UPDATE (ไม่ใช่ ORM bulk-by-PK) => executemany ครั้งเดียวต่อ flush
+_touch_stmt = (
+    update(_rt)
+    .where(
+        _rt.c.user_id == bindparam("b_user_id"),
+        _rt.c.session_id == bindparam("b_session_id"),
+        _rt.c.revoked_at.is_(None),
+    )
+    .values(
+        last_used_at=bindparam("b_at"),
+        ip=func.coalesce(bindparam("b_ip"), _rt.c.ip),
+        user_agent=func.coalesce(bindparam("b_ua"), _rt.c.user_agent),
+    )
+)
+
+
+class SessionTelemetryBuffer:
+    def __init__(self, session_factory=None, max_pending: int = 10000, flush_interval: float = 5.0):
+        self.session_factory = session_factory
+        self.max_pending = max_pending
+        self._pending: dict[tuple[int, str], dict] = {}
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._flusher = PeriodicFlusher("session-telemetry", flush_interval, self.flush)
+
+        self.touches = 0
+        self.coalesced = 0
+        self.dropped = 0
+        self.flushed_rows = 0
+        self.flush_batches = 0
+        self.flush_errors = 0
+
+    def _get_session_factory(self):
+        if self.session_factory is None:
+            from app.db.session import SessionLocal
+            self.session_factory = SessionLocal
+        return self.session_factory
+
+    def touch(
+        self,
+        user_id: int,
+        session_id: str,
+        ip: str | None = None,
+        user_agent: str | None = None,
+        at: datetime | None = None,
+    ) -> None:
+        key = (user_id, session_id)
+        entry = {
+            "b_user_id": user_id,
+            "b_session_id": session_id,
+            "b_at": at or datetime.now(timezone.utc),
+            "b_ip": ip,
+            "b_ua": user_agent[:255] if user_agent else None,
+        }
+        full = False
+        with self._lock:
+            self.touches += 1
+            if key in self._pending:
+                self.coalesced += 1
+            elif len(self._pending) >= self.max_pending:
+                self.dropped += 1
+                full = True
+            if not full:
+                self._pending[key] = entry
+
+        if full:
+            self._flusher.wake()
+
+    def flush(self) -> int:
+        with self._flush_lock:
+            with self._lock:
+                if not self._pending:
+                    return 0
+                rows = list(self._pending.values())
+                self._pending = {}
+
+            try:
+                with self._get_session_factory()() as db:
+                    for kw, group in group_by_shard(db, rows, "b_user_id"):
+                        db.execute(_touch_stmt, group, **kw)
+                    db.commit()
+            except Exception:
+                with self._lock:
+                    self.flush_errors += 1
+                logger.exception("session telemetry flush failed (%d rows dropped)", len(rows))
+                return 0
+
+            with self._lock:
+                self.flushed_rows += len(rows)
+                self.flush_batches += 1
+            return len(rows)
+
+    def start(self) -> None:
+        self._flusher.start()
+
+    def stop(self) -> None:
+        self._flusher.stop()
+
+    def metrics(self) -> dict:
+        with self._lock:
+            pending = len(self._pending)
+            return {
+                "enabled": settings.SESSION_TELEMETRY_ENABLED,
+                "pending": pending,
+                "max_pending": self.max_pending,
+                "touches": self.touches,
+                "coalesced": self.coalesced,
+                "dropped": self.dropped,
+                "flushed_rows": self.flushed_rows,
+                "flush_batches": self.flush_batches,
+                "flush_errors": self.flush_errors,
+                # ถ้าเขียนตรงทุก request จะเป็น 1 UPDATE ต่อ touch
+                "writes_saved": max(self.touches - self.dropped - pending - self.flush_batches, 0),
+            }
+
+
+session_telemetry = SessionTelemetryBuffer(
+    max_pending=settings.SESSION_TELEMETRY_MAX_PENDING,
+    flush_interval=settings.SESSION_TELEMETRY_FLUSH_SECONDS,
+)
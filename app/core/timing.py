@@ -0,0 +1,131 @@
+"""
+Per-request stage timing (spans) without an external collector.
+
+- `span("name")` context manager / `timed("name")` decorator record how long a
+  stage took into the trace of the current request (contextvar).
+- `format_server_timing()` renders a trace as a `Server-Timing` header value.
+- slow requests are kept in an in-memory ring buffer (`slow_traces`) that the
+  admin endpoint can read.
+
+When no trace is active (scripts, tests calling crud directly) spans are no-ops.
+"""
+import functools
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime, timezone
+
+from app.core.config import settings
+
+
+class Trace:
+    __slots__ = ("method", "path", "started_at", "start", "duration_ms", "spans", "status_code")
+
+    def __init__(self, method: str, path: str):
+        self.method = method
+        self.path = path
+        self.started_at = datetime.now(timezone.utc)
+        self.start = time.perf_counter()
+        self.duration_ms = 0.0
+        self.spans: list[tuple[str, float]] = []
+        self.status_code: int | None = None
+
+    def add(self, name: str, duration_ms: float) -> None:
+        self.spans.append((name, duration_ms))
+
+    def finish(self, status_code: int | None = None) -> None:
+        self.duration_ms = (time.perf_counter() - self.start) * 1000
+        self.status_code = status_code
+
+    def as_dict(self) -> dict:
+        return {
+            "method": self.method,
+            "path": self.path,
+            "started_at": self.started_at.isoformat(),
+            "status_code": self.status_code,
+            "duration_ms": round(self.duration_ms, 3),
+            "spans": [{"name": n, "duration_ms": round(d, 3)} for n, d in self.spans],
+        }
+
+
+_current_trace: ContextVar[Trace | None] = ContextVar("current_trace", default=None)
+
+
+def start_trace(method: str, path: str) -> Trace:
+    trace = Trace(method, path)
+    _current_trace.set(trace)
+    return trace
+
+
+def current_trace() -> Trace | None:
+    return _current_trace.get()
+
+
+@contextmanager
+def span(name: str):
+    trace = _current_trace.get()
+    if trace is None:
+        yield
+        return
+
+    t0 = time.perf_counter()
+    try:
+        yield
+    finally:
+        trace.add(name, (time.perf_counter() - t0) * 1000)
+
+
+def timed(name: str):
+    """Decorator version of `span` for crud / core functions."""
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            trace = _current_trace.get()
+            if trace is None:
+                return fn(*args, **kwargs)
+
+            t0 = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                trace.add(name, (time.perf_counter() - t0) * 1000)
+        return wrapper
+    return decorator
+
+
+def format_server_timing(trace: Trace) -> str:
+    # Server-Timing: db.get_user_by_email;dur=1.20, security.verify_password;dur=240.10, total;dur=245.00
+    parts = [f"{name};dur={dur:.2f}" for name, dur in trace.spans]
+    parts.append(f"total;dur={trace.duration_ms:.2f}")
+    return ", ".join(parts)
+
+
+class SlowTraceBuffer:
+    """Thread-safe ring buffer of the most recent slow request traces."""
+
+    def __init__(self, maxlen: int):
+        self._items: deque[Trace] = deque(maxlen=maxlen)
+        self._lock = threading.Lock()
+
+    def add(self, trace: Trace) -> None:
+        with self._lock:
+            self._items.append(trace)
+
+    def snapshot(self) -> list[dict]:
+        with self._lock:
+            items = list(self._items)
+        return [t.as_dict() for t in reversed(items)]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._items.clear()
+
+
+slow_traces = SlowTraceBuffer(maxlen=settings.SLOW_TRACE_BUFFER_SIZE)
+
+
+def record_if_slow(trace: Trace) -> None:
+    if trace.duration_ms >= settings.SLOW_REQUEST_MS:
+        slow_traces.add(trace)
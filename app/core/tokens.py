@@ -1,12 +1,16 @@
 import secrets
 from datetime import datetime, timedelta, timezone
-from jose import jwt, JWTError
 from app.core.config import settings
+from app.core.jwt_codec import build_codec
+from app.core.timing import timed
+
+codec = build_codec()
 
 def _now_utc() -> datetime:
     return datetime.now(timezone.utc)
 
-def create_access_token(subject: str) -> str:
+@timed("tokens.create_access_token")
+def create_access_token(subject: str, session_id: str | None = None) -> str:
     now = _now_utc()
     payload = {
         "sub": subject,
@@ -15,8 +19,11 @@ def create_access_token(subject: str) -> str:
         "jti": secrets.token_hex(16),
         "exp": int((now + timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)).timestamp()),
     }
-    return jwt.encode(payload, settings.JWT_SECRET, algorithm=settings.JWT_ALGORITHM)
+    if session_id:
+        payload["sid"] = session_id  # ผูก access token กับ session (last seen / revoke ราย session)
+    return codec.encode(payload)
 
+@timed("tokens.create_refresh_token")
 def create_refresh_token(subject: str):
     now = _now_utc()
     exp_dt = now + timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS)
@@ -27,14 +34,12 @@ def create_refresh_token(subject: str):
         "jti": secrets.token_hex(16),
         "exp": int(exp_dt.timestamp()),
     }
-    token = jwt.encode(payload, settings.JWT_SECRET, algorithm=settings.JWT_ALGORITHM)
+    token = codec.encode(payload)
     return token, exp_dt
 
+@timed("tokens.decode_token")
 def decode_token(token: str) -> dict:
-    try:
-        return jwt.decode(token, settings.JWT_SECRET, algorithms=[settings.JWT_ALGORITHM])
-    except JWTError as e:
-        raise ValueError("Invalid token") from e
+    return codec.decode(token)
 
 
 
@@ -0,0 +1,103 @@
+"""
+Worker warmup (WARMUP_ENABLED), run from the app lifespan before the worker
+reports ready on /health.
+
+Without it the first requests after a deploy pay for work that happens lazily
+on live traffic:
+- mappers:   SQLAlchemy configures all mappers on the first query
+- hash:      passlib picks and self-tests the bcrypt backend on the first hash/verify
+- jwt:       the codec / jose backend on the first encode/decode
+- pool:      each of the DB_POOL_SIZE connections is opened by a request
+
+`run()` does all of that up front and only then sets `ready`.
+
+gunicorn --preload: app.main is imported once in the master and the workers
+fork from it, so the import must not open connections or start threads (the
+lifespan does that, per worker). If an engine was used before the fork anyway,
+`warm_pool` drops the inherited connections with `dispose(close=False)` (the
+parent still owns the sockets) before opening the worker's own.
+"""
+import logging
+import os
+import time
+
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import configure_mappers
+
+from app.core.config import settings
+from app.core.security import pwd_context
+from app.core.tokens import create_access_token, decode_token
+from app.db.session import engine, replica_router, shard_engines
+
+logger = logging.getLogger(__name__)
+
+_IMPORT_PID = os.getpid()  # --preload: pid ของ master
+
+
+def prime() -> None:
+    configure_mappers()
+    pwd_context.handler("bcrypt").get_backend()
+    decode_token(create_access_token("0"))
+
+
+def warm_pool(eng: Engine, n: int) -> int:
+    if os.getpid() != _IMPORT_PID:
+        eng.dispose(close=False)  # connection ที่ติดมาจาก master: ห้ามใช้ร่วมกัน, ห้ามปิดแทน
+    conns = []
+    try:
+        for _ in range(n):
+            conns.append(eng.connect())
+    finally:
+        for conn in conns:
+            conn.close()  # คืนเข้า pool (เปิดค้างไว้ให้ request)
+    return len(conns)
+
+
+class Warmup:
+    def __init__(self, pool_connections: int):
+        self.pool_connections = pool_connections
+        self.ready = False
+        self.timings_ms: dict[str, float] = {}
+        self.connections: dict[str, int] = {}
+        self.errors: dict[str, str] = {}
+
+    def _engines(self) -> dict[str, Engine]:
+        engines = {"primary": engine, **shard_engines}
+        engines.update({f"replica-{i}": eng for i, eng in enumerate(replica_router.engines)})
+        return engines
+
+    def _step(self, name: str, fn) -> None:
+        start = time.perf_counter()
+        try:
+            fn()
+        except Exception as exc:
+            # DB ล่มตอน boot ไม่ควรทำให้ worker ไม่ขึ้น: pool จะเปิด connection เองตอนใช้
+            logger.exception("warmup: %s failed", name)
+            self.errors[name] = repr(exc)
+        finally:
+            self.timings_ms[name] = round((time.perf_counter() - start) * 1000, 3)
+
+    def run(self) -> None:
+        """Blocking; call from a thread (anyio.to_thread.run_sync)."""
+        self._step("prime", prime)
+        for name, eng in self._engines().items():
+            def fill(name=name, eng=eng):
+                self.connections[name] = warm_pool(eng, self.pool_connections)
+
+            self._step(f"pool.{name}", fill)
+        self.ready = True
+
+    def metrics(self) -> dict:
+        return {
+            "ready": self.ready,
+            "pid": os.getpid(),
+            "preloaded": os.getpid() != _IMPORT_PID,
+            "timings_ms": self.timings_ms,
+            "connections": self.connections,
+            "errors": self.errors,
+        }
+
+
+# -1 = เต็ม pool_size (ทุก engine ใช้ DB_POOL_SIZE เดียวกัน)
+_pool_connections = settings.WARMUP_POOL_CONNECTIONS
+warmup = Warmup(settings.DB_POOL_SIZE if _pool_connections < 0 else min(_pool_connections, settings.DB_POOL_SIZE))
@@ -0,0 +1,36 @@
+from datetime import datetime
+from sqlalchemy import and_, or_, select
+from sqlalchemy.orm import Session
+
+from app.models.audit_event import AuditEvent
+
+
+def list_events(
+    db: Session,
+    since: datetime | None = None,
+    until: datetime | None = None,
+    after: tuple[datetime, int] | None = None,
+    user_id: int | None = None,
+    event_type: str | None = None,
+    limit: int = 100,
+) -> list[AuditEvent]:
+    # keyset pagination บน (created_at, id) ไม่ใช้ OFFSET
+    stmt = select(AuditEvent)
+    if since is not None:
+        stmt = stmt.where(AuditEvent.created_at >= since)
+    if until is not None:
+        stmt = stmt.where(AuditEvent.created_at < until)
+    if user_id is not None:
+        stmt = stmt.where(AuditEvent.user_id == user_id)
+    if event_type is not None:
+        stmt = stmt.where(AuditEvent.event_type == event_type)
+    if after is not None:
+        after_ts, after_id = after
+        stmt = stmt.where(
+            or_(
+                AuditEvent.created_at > after_ts,
+                and_(AuditEvent.created_at == after_ts, AuditEvent.id > after_id),
+            )
+        )
+    stmt = stmt.order_by(AuditEvent.created_at, AuditEvent.id).limit(limit)
+    return list(db.execute(stmt).scalars())
@@ -1,21 +1,36 @@
 from datetime import datetime, timezone
+from sqlalchemy import bindparam, select, update
 from sqlalchemy.orm import Session
 from app.models.password_reset_token import PasswordResetToken
+from app.core.timing import timed
+from app.db.sharding import shard_kwargs
 
+_by_hash = select(PasswordResetToken).where(PasswordResetToken.token_hash == bindparam("token_hash")).limit(1)
+# consume แบบ atomic: มีแค่ request เดียวที่ได้ rowcount == 1
+_mark_used = (
+    update(PasswordResetToken)
+    .where(PasswordResetToken.id == bindparam("b_id"), PasswordResetToken.used_at.is_(None))
+    .values(used_at=bindparam("b_now"))
+    .execution_options(synchronize_session=False)
+)
 
+
+@timed("db.create_reset_token")
 def create_reset_token(db: Session, user_id: int, token_hash: str, expires_at: datetime) -> PasswordResetToken:
     row = PasswordResetToken(user_id=user_id, token_hash=token_hash, expires_at=expires_at)
     db.add(row)
-    db.commit()
-    db.refresh(row)
+    db.flush()
     return row
 
 
+@timed("db.get_reset_by_hash")
 def get_by_hash(db: Session, token_hash: str) -> PasswordResetToken | None:
-    return db.query(PasswordResetToken).filter(PasswordResetToken.token_hash == token_hash).first()
+    return db.execute(_by_hash, {"token_hash": token_hash}).scalars().first()
 
 
-def mark_used(db: Session, row: PasswordResetToken) -> None:
-    row.used_at = datetime.now(timezone.utc)
-    db.add(row)
-    db.commit()
+@timed("db.mark_used")
+def mark_used(db: Session, row: PasswordResetToken) -> bool:
+    """False = token was consumed by someone else (concurrent reset) since it was read."""
+    now = datetime.now(timezone.utc)
+    result = db.execute(_mark_used, {"b_id": row.id, "b_now": now}, **shard_kwargs(db, row.user_id))
+    return result.rowcount == 1
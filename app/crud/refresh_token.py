@@ -1,10 +1,74 @@
 from datetime import datetime, timezone
 from sqlalchemy.orm import Session
-from sqlalchemy import and_
+from sqlalchemy import Integer, bindparam, func, select, update
 
 from app.models.refresh_token import RefreshToken
+from app.core.timing import timed
+from app.db.sharding import ids_by_shard, shard_kwargs
 
+_by_hash = select(RefreshToken).where(RefreshToken.token_hash == bindparam("token_hash")).limit(1)
 
+_rt = RefreshToken.__table__
+# alias ใน subquery: ไม่ให้ถูก correlate กับตารางของ UPDATE ตัวนอก
+_live = _rt.alias("live")
+
+# login ด้วย device_id เดิม: rotate แถวของ session ที่ยัง live แทนการ INSERT แถวใหม่
+# (derived table ซ้อนอีกชั้น: MySQL ห้าม subquery อ่านตารางเดียวกับที่ UPDATE ตรงๆ)
+_live_session_row = (
+    select(func.max(_live.c.id).label("id"))
+    .where(
+        _live.c.user_id == bindparam("b_user_id"),
+        _live.c.session_id == bindparam("b_session_id"),
+        _live.c.revoked_at.is_(None),
+    )
+    .subquery("live_session")
+)
+_rotate_session = (
+    update(_rt)
+    .where(_rt.c.id == select(_live_session_row.c.id).scalar_subquery())
+    .values(
+        token_hash=bindparam("b_token_hash"),
+        expires_at=bindparam("b_expires_at"),
+        last_used_at=bindparam("b_now"),
+        user_agent=bindparam("b_ua"),
+        ip=bindparam("b_ip"),
+    )
+)
+
+# cap จำนวน session ที่ live ต่อ user: revoke ที่ใช้ล่าสุดเก่าที่สุด (LRU) ใน UPDATE เดียว
+_keep_recent = (
+    select(_live.c.id)
+    .where(_live.c.user_id == bindparam("b_user_id"), _live.c.revoked_at.is_(None))
+    .order_by(_live.c.last_used_at.desc(), _live.c.id.desc())
+    .limit(bindparam("b_keep", type_=Integer))
+    .subquery("keep")
+)
+# SELECT ก่อน (MySQL ไม่มี UPDATE ... RETURNING): ต้องรู้ session_id ไว้เขียน revocation event
+_lru_victims = select(_rt.c.id, _rt.c.session_id).where(
+    _rt.c.user_id == bindparam("b_user_id"),
+    _rt.c.revoked_at.is_(None),
+    _rt.c.id.not_in(select(_keep_recent.c.id)),
+)
+_evict = (
+    update(_rt)
+    .where(_rt.c.id.in_(bindparam("b_ids", expanding=True)), _rt.c.revoked_at.is_(None))
+    .values(revoked_at=bindparam("b_now"))
+)
+
+_revoke_all = (
+    update(RefreshToken)
+    .where(RefreshToken.user_id == bindparam("b_user_id"), RefreshToken.revoked_at.is_(None))
+    .values(revoked_at=bindparam("b_now"), last_used_at=bindparam("b_now"))
+    .execution_options(synchronize_session=False)
+)
+_revoke_all_many = (
+    update(_rt)
+    .where(_rt.c.user_id.in_(bindparam("b_user_ids", expanding=True)), _rt.c.revoked_at.is_(None))
+    .values(revoked_at=bindparam("b_now"), last_used_at=bindparam("b_now"))
+)
+
+
+@timed("db.save_refresh")
 def create_refresh_token(
     db: Session,
     user_id: int,
@@ -19,35 +83,74 @@ def create_refresh_token(
         session_id=session_id,
         token_hash=token_hash,
         expires_at=expires_at,
+        last_used_at=datetime.now(timezone.utc),  # ใช้จัดลำดับ LRU ตอน evict
         user_agent=user_agent,
         ip=ip,
     )
     db.add(rt)
-    db.commit()
-    db.refresh(rt)
+    db.flush()
     return rt
 
 
-def get_by_hash(db: Session, token_hash: str) -> RefreshToken | None:
-    return db.query(RefreshToken).filter(RefreshToken.token_hash == token_hash).first()
+@timed("db.rotate_session")
+def rotate_session(
+    db: Session,
+    user_id: int,
+    session_id: str,
+    token_hash: str,
+    expires_at: datetime,
+    user_agent: str | None = None,
+    ip: str | None = None,
+) -> bool:
+    """Replace the token of the user's live `session_id` in place; False if there is none."""
+    params = {
+        "b_user_id": user_id,
+        "b_session_id": session_id,
+        "b_token_hash": token_hash,
+        "b_expires_at": expires_at,
+        "b_now": datetime.now(timezone.utc),
+        "b_ua": user_agent,
+        "b_ip": ip,
+    }
+    return db.execute(_rotate_session, params, **shard_kwargs(db, user_id)).rowcount > 0
+
+
+@timed("db.evict_sessions")
+def evict_lru_sessions(db: Session, user_id: int, keep: int) -> list[str]:
+    """Revoke all but the `keep` most recently used live sessions of the user; returns the evicted session ids."""
+    kw = shard_kwargs(db, user_id)
+    victims = db.execute(_lru_victims, {"b_user_id": user_id, "b_keep": keep}, **kw).all()
+    if victims:  # ปกติไม่เกิน cap => SELECT อย่างเดียว
+        db.execute(_evict, {"b_ids": [v[0] for v in victims], "b_now": datetime.now(timezone.utc)}, **kw)
+    return [v[1] for v in victims]
+
 
+@timed("db.get_refresh_by_hash")
+def get_by_hash(db: Session, token_hash: str, user_id: int | None = None) -> RefreshToken | None:
+    # user_id (sub ของ refresh JWT) = shard hint; ไม่มี => ค้นทุก shard
+    return db.execute(_by_hash, {"token_hash": token_hash}, **shard_kwargs(db, user_id)).scalars().first()
 
+
+@timed("db.revoke")
 def revoke(db: Session, rt: RefreshToken) -> None:
     now = datetime.now(timezone.utc)
     rt.revoked_at = now
     rt.last_used_at = now
-    db.commit()
-
 
 
+@timed("db.revoke_all_for_user")
 def revoke_all_for_user(db: Session, user_id: int) -> int:
     now = datetime.now(timezone.utc)
-    q = db.query(RefreshToken).filter(
-        RefreshToken.user_id == user_id,
-        RefreshToken.revoked_at.is_(None),
-    )
-    count = q.count()
-    q.update({"revoked_at": now, "last_used_at": now}, synchronize_session=False)
-    db.commit()
-    return count
+    # UPDATE เดียว ใช้ rowcount แทน SELECT COUNT(*) แยก
+    result = db.execute(_revoke_all, {"b_user_id": user_id, "b_now": now}, **shard_kwargs(db, user_id))
+    return result.rowcount
 
+
+@timed("db.revoke_all_for_users")
+def revoke_all_for_users(db: Session, user_ids: list[int]) -> int:
+    """revoke_all_for_user for many users: one UPDATE ... IN (...) per shard."""
+    now = datetime.now(timezone.utc)
+    n = 0
+    for kw, ids in ids_by_shard(db, user_ids):
+        n += db.execute(_revoke_all_many, {"b_user_ids": ids, "b_now": now}, **kw).rowcount
+    return n
@@ -0,0 +1,46 @@
+from datetime import datetime, timezone
+from sqlalchemy import bindparam, func, insert, select
+from sqlalchemy.orm import Session
+
+from app.models.revocation_event import RevocationEvent
+
+_ev = RevocationEvent.__table__
+
+# keyset ตาม id (= cursor ของ stream)
+_after = select(_ev).where(_ev.c.id > bindparam("b_after")).order_by(_ev.c.id).limit(bindparam("b_limit"))
+# catch-up ของ subscriber: ไม่เกิน head ที่ feed ยืนยันแล้ว (ดู RevocationFeed._accept)
+_between = _after.where(_ev.c.id <= bindparam("b_upto"))
+_head = select(func.max(_ev.c.id))
+
+
+def record_revocation(db: Session, user_id: int, reason: str, session_id: str | None = None) -> None:
+    """
+    Queue the event in the caller's unit of work (INSERT at commit). Same
+    transaction as the revoke on one database; sharded, it commits separately
+    on the directory (see app.core.revocation).
+    """
+    now = datetime.now(timezone.utc)
+    db.add(RevocationEvent(created_at=now, user_id=user_id, session_id=session_id, not_before=now, reason=reason))
+
+
+def record_revocations(db: Session, user_ids: list[int], reason: str) -> None:
+    """record_revocation (every session) for many users: one executemany INSERT."""
+    if not user_ids:
+        return
+    now = datetime.now(timezone.utc)
+    db.execute(
+        insert(RevocationEvent),
+        [{"created_at": now, "user_id": uid, "session_id": None, "not_before": now, "reason": reason} for uid in user_ids],
+    )
+
+
+def list_after(db: Session, after: int, upto: int | None = None, limit: int = 1000) -> list[dict]:
+    if upto is None:
+        rows = db.execute(_after, {"b_after": after, "b_limit": limit}).mappings()
+    else:
+        rows = db.execute(_between, {"b_after": after, "b_upto": upto, "b_limit": limit}).mappings()
+    return [dict(r) for r in rows]
+
+
+def latest_id(db: Session) -> int:
+    return db.execute(_head).scalar() or 0
@@ -1,15 +1,174 @@
+from datetime import datetime
+from typing import Iterator
+
+from sqlalchemy import and_, bindparam, or_, select, update
 from sqlalchemy.orm import Session
 from app.models.user import User
+from app.core.principal import Principal
+from app.core.security import UNUSABLE_PASSWORD
+from app.core.timing import timed
+from app.db.sharding import (
+    allocate_user_id,
+    email_shard_kwargs,
+    ids_by_shard,
+    lookup_user_ids,
+    release_user_id,
+    shard_kwargs,
+)
+
+# crud ไม่ commit เอง: flush อย่างเดียว, endpoint เป็นคน commit ครั้งเดียวต่อ request
+
+# statement สร้างครั้งเดียวตอน import (bound parameter) => ไม่ต้อง build/compile query ใหม่ทุก call
+_user_by_email = select(User).where(User.email == bindparam("email")).limit(1)
+
+# Core column-only query (ไม่สร้าง ORM instance / identity map)
+_users = User.__table__
+_principal_by_id = select(_users.c.id, _users.c.email, _users.c.is_active).where(_users.c.id == bindparam("user_id"))
+_profile_columns = (
+    _users.c.id, _users.c.email, _users.c.is_active, _users.c.created_at, _users.c.updated_at,
+    _users.c.full_name, _users.c.phone,
+)
+_profile_by_id = select(*_profile_columns).where(_users.c.id == bindparam("user_id"))
 
+# bulk (admin): IN (...) ทีละ chunk, ไม่วน ORM object
+_ids_in = _users.c.id.in_(bindparam("b_user_ids", expanding=True))
+_existing_ids = select(_users.c.id).where(or_(_ids_in, _users.c.email.in_(bindparam("b_emails", expanding=True))))
+# เฉพาะแถวที่ค่าเปลี่ยนจริง => rowcount = จำนวน user ที่ถูกเปลี่ยน
+_set_active = update(_users).where(_ids_in, _users.c.is_active != bindparam("b_active")).values(is_active=bindparam("b_active"))
+_force_reset = (
+    update(_users)
+    .where(_ids_in, _users.c.password_hash != UNUSABLE_PASSWORD)
+    .values(password_hash=UNUSABLE_PASSWORD)
+)
+
+
+@timed("db.get_user_by_email")
 def get_user_by_email(db: Session, email: str) -> User | None:
-    return db.query(User).filter(User.email == email).first()
+    kw = email_shard_kwargs(db, email)
+    if kw is None:
+        return None  # sharded: ไม่มีใน directory
+    return db.execute(_user_by_email, {"email": email}, **kw).scalars().first()
+
 
+@timed("db.create_user")
 def create_user(db: Session, email: str, password_hash: str) -> User:
-    user = User(email=email, password_hash=password_hash)
+    # sharded: id มาจาก directory (user_shards), ไม่ใช่ autoincrement ของ shard
+    user_id = allocate_user_id(db, email)
+    user = User(id=user_id, email=email, password_hash=password_hash)
     db.add(user)
-    db.commit()
-    db.refresh(user)
+    try:
+        db.flush()
+    except Exception:
+        db.rollback()
+        release_user_id(db, user_id)
+        raise
     return user
 
+
+@timed("db.get_user")
 def get_user(db: Session, user_id: int) -> User | None:
-    return db.query(User).filter(User.id == user_id).first()
+    # primary key lookup: ใช้ identity map ก่อน ถ้าไม่มีค่อย SELECT
+    return db.get(User, user_id)
+
+
+@timed("db.get_principal")
+def get_principal(db: Session, user_id: int, session_id: str | None = None) -> Principal | None:
+    row = db.execute(_principal_by_id, {"user_id": user_id}, **shard_kwargs(db, user_id)).first()
+    if row is None:
+        return None
+    return Principal(row[0], row[1], row[2], session_id)
+
+
+@timed("db.get_user_profile")
+def get_user_profile(db: Session, user_id: int) -> dict | None:
+    # คอลัมน์ของ UserOut เท่านั้น
+    row = db.execute(_profile_by_id, {"user_id": user_id}, **shard_kwargs(db, user_id)).first()
+    return dict(row._mapping) if row is not None else None
+
+
+@timed("db.resolve_user_ids")
+def resolve_user_ids(db: Session, user_ids: list[int], emails: list[str]) -> list[int]:
+    """Ids of the users that exist among user_ids / emails (one query)."""
+    found = lookup_user_ids(db, user_ids, emails)
+    if found is None:
+        found = db.execute(_existing_ids, {"b_user_ids": user_ids, "b_emails": emails}).scalars().all()
+    return sorted(set(found))
+
+
+def _update_many(db: Session, stmt, user_ids: list[int], params: dict | None = None) -> int:
+    n = 0
+    for kw, ids in ids_by_shard(db, user_ids):
+        n += db.execute(stmt, {"b_user_ids": ids, **(params or {})}, **kw).rowcount
+    return n
+
+
+@timed("db.set_active_many")
+def set_active_many(db: Session, user_ids: list[int], active: bool) -> int:
+    return _update_many(db, _set_active, user_ids, {"b_active": active})
+
+
+@timed("db.force_password_reset_many")
+def force_password_reset_many(db: Session, user_ids: list[int]) -> int:
+    return _update_many(db, _force_reset, user_ids)
+
+
+def _prefix(column, value: str):
+    # LIKE 'abc%' ใช้ index ได้; escape % และ _ ที่ผู้ใช้พิมพ์มา
+    escaped = value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return column.like(escaped + "%", escape="\\")
+
+
+@timed("db.list_users")
+def list_users(
+    db: Session,
+    order: str = "id",
+    after: tuple[datetime, int] | None = None,
+    email_prefix: str | None = None,
+    full_name: str | None = None,
+    phone: str | None = None,
+    limit: int = 100,
+) -> list[dict]:
+    """
+    One keyset page of UserOut columns, ordered by id or (created_at, id);
+    `after` is the (created_at, id) of the last row of the previous page.
+    """
+    stmt = select(*_profile_columns)
+    if email_prefix:
+        stmt = stmt.where(_prefix(_users.c.email, email_prefix))
+    if full_name:
+        stmt = stmt.where(_prefix(_users.c.full_name, full_name))
+    if phone:
+        stmt = stmt.where(_prefix(_users.c.phone, phone))
+
+    if order == "created_at":
+        if after is not None:
+            after_ts, after_id = after
+            stmt = stmt.where(
+                or_(
+                    _users.c.created_at > after_ts,
+                    and_(_users.c.created_at == after_ts, _users.c.id > after_id),
+                )
+            )
+        stmt = stmt.order_by(_users.c.created_at, _users.c.id)
+        key = lambda r: (r["created_at"], r["id"])
+    else:
+        if after is not None:
+            stmt = stmt.where(_users.c.id > after[1])
+        stmt = stmt.order_by(_users.c.id)
+        key = lambda r: r["id"]
+
+    rows = [dict(r._mapping) for r in db.execute(stmt.limit(limit))]
+    # sharded: ได้หน้าละ limit แถวจากทุก shard ต่อกัน => merge แล้วตัดเหลือ limit (ยังถูกต้องตาม keyset)
+    rows.sort(key=key)
+    return rows[:limit]
+
+
+def iter_users(db: Session, order: str = "id", batch_size: int = 1000, **filters) -> Iterator[dict]:
+    """Every matching user, batch_size rows per query (keyset; for exports)."""
+    after = None
+    while True:
+        rows = list_users(db, order=order, after=after, limit=batch_size, **filters)
+        yield from rows
+        if len(rows) < batch_size:
+            return
+        after = (rows[-1]["created_at"], rows[-1]["id"])
@@ -4,3 +4,6 @@ from app.db.base_class import Base
 from app.models.user import User  # noqa
 from app.models.refresh_token import RefreshToken  # noqa
 from app.models.password_reset_token import PasswordResetToken  # noqa
+from app.models.audit_event import AuditEvent  # noqa
+from app.models.user_shard import UserShard  # noqa
+from app.models.revocation_event import RevocationEvent  # noqa
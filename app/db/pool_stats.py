@@ -0,0 +1,206 @@
+"""
+Connection pool instrumentation.
+
+`PoolStats` records, per engine:
+- checkout wait: time spent inside QueuePool._do_get (waiting for a free
+  connection or opening a new one), plus checkout timeouts
+- hold time:     checkout -> checkin
+- overflow:      peak number of connections above pool_size
+- connects / invalidations (hard and soft)
+
+Wait time has no pool event, so engines are created with a QueuePool subclass
+bound to their PoolStats (`instrumented_pool_class`); everything else comes
+from pool events (`PoolStats.attach`).
+"""
+import logging
+import threading
+import time
+
+from sqlalchemy import event, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import TimeoutError as PoolTimeout
+from sqlalchemy.pool import QueuePool
+
+logger = logging.getLogger(__name__)
+
+_BUCKETS_MS = (1, 5, 10, 50, 100, 500, 1000, 5000)
+
+
+class _Histogram:
+    def __init__(self):
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.buckets = [0] * (len(_BUCKETS_MS) + 1)
+
+    def add(self, ms: float) -> None:
+        self.count += 1
+        self.total_ms += ms
+        self.max_ms = max(self.max_ms, ms)
+        for i, le in enumerate(_BUCKETS_MS):
+            if ms <= le:
+                self.buckets[i] += 1
+                return
+        self.buckets[-1] += 1
+
+    def snapshot(self) -> dict:
+        labels = [f"le_{b}ms" for b in _BUCKETS_MS] + ["inf"]
+        return {
+            "count": self.count,
+            "avg_ms": round(self.total_ms / self.count, 3) if self.count else 0.0,
+            "max_ms": round(self.max_ms, 3),
+            "buckets": dict(zip(labels, self.buckets)),
+        }
+
+
+class PoolStats:
+    def __init__(self, name: str):
+        self.name = name
+        self._lock = threading.Lock()
+        self.wait = _Histogram()
+        self.hold = _Histogram()
+        self.timeouts = 0
+        self.connects = 0
+        self.invalidations = 0
+        self.soft_invalidations = 0
+        self.overflow_peak = 0
+        self.pool: QueuePool | None = None
+
+    # ---------- recording ----------
+    def record_wait(self, ms: float, timed_out: bool = False) -> None:
+        with self._lock:
+            self.wait.add(ms)
+            if timed_out:
+                self.timeouts += 1
+
+    def _on_connect(self, dbapi_conn, record) -> None:
+        with self._lock:
+            self.connects += 1
+
+    def _on_checkout(self, dbapi_conn, record, proxy) -> None:
+        record.info["pool_stats_checkout_at"] = time.perf_counter()
+        pool = self.pool
+        if isinstance(pool, QueuePool):
+            overflow = pool.checkedout() - pool.size()
+            with self._lock:
+                self.overflow_peak = max(self.overflow_peak, overflow)
+
+    def _on_checkin(self, dbapi_conn, record) -> None:
+        t0 = record.info.pop("pool_stats_checkout_at", None)
+        if t0 is not None:
+            with self._lock:
+                self.hold.add((time.perf_counter() - t0) * 1000)
+
+    def _on_invalidate(self, dbapi_conn, record, exc) -> None:
+        with self._lock:
+            self.invalidations += 1
+
+    def _on_soft_invalidate(self, dbapi_conn, record, exc) -> None:
+        with self._lock:
+            self.soft_invalidations += 1
+
+    def attach(self, engine: Engine) -> "PoolStats":
+        self.pool = engine.pool
+        event.listen(engine, "connect", self._on_connect)
+        event.listen(engine, "checkout", self._on_checkout)
+        event.listen(engine, "checkin", self._on_checkin)
+        event.listen(engine, "invalidate", self._on_invalidate)
+        event.listen(engine, "soft_invalidate", self._on_soft_invalidate)
+        # engine.dispose() สร้าง pool ใหม่ => ตามไปอ่านสถานะจาก pool ปัจจุบัน
+        event.listen(engine, "engine_disposed", lambda e: setattr(self, "pool", e.pool))
+        return self
+
+    # ---------- reading ----------
+    def snapshot(self) -> dict:
+        pool = self.pool
+        status = {}
+        if isinstance(pool, QueuePool):
+            status = {
+                "pool_size": pool.size(),
+                "max_overflow": pool._max_overflow,
+                "checked_out": pool.checkedout(),
+                "checked_in": pool.checkedin(),
+                "overflow": pool.overflow(),
+                "timeout_seconds": pool.timeout(),
+            }
+        with self._lock:
+            return {
+                "name": self.name,
+                **status,
+                "overflow_peak": self.overflow_peak,
+                "checkout_wait": self.wait.snapshot(),
+                "checkout_timeouts": self.timeouts,
+                "hold": self.hold.snapshot(),
+                "connects": self.connects,
+                "invalidations": self.invalidations,
+                "soft_invalidations": self.soft_invalidations,
+            }
+
+
+class InstrumentedQueuePool(QueuePool):
+    stats: PoolStats
+
+    def _do_get(self):
+        t0 = time.perf_counter()
+        timed_out = False
+        try:
+            return super()._do_get()
+        except PoolTimeout:
+            timed_out = True
+            raise
+        finally:
+            self.stats.record_wait((time.perf_counter() - t0) * 1000, timed_out)
+
+
+def instrumented_pool_class(stats: PoolStats) -> type[QueuePool]:
+    # subclass ต่อ engine: pool.recreate() ใช้ self.__class__ => stats ติดไปด้วย
+    return type("InstrumentedQueuePool", (InstrumentedQueuePool,), {"stats": stats})
+
+
+# -----------------------------
+# Capacity check (startup)
+# -----------------------------
+def server_max_connections(engine: Engine) -> int | None:
+    queries = {
+        "mysql": "SELECT @@max_connections",
+        "mariadb": "SELECT @@max_connections",
+        "postgresql": "SHOW max_connections",
+    }
+    sql = queries.get(engine.dialect.name)
+    if sql is None:
+        return None
+    try:
+        with engine.connect() as conn:
+            return int(conn.execute(text(sql)).scalar())
+    except Exception:
+        logger.warning("could not read max_connections", exc_info=True)
+        return None
+
+
+def capacity_warnings(
+    workers: int,
+    threadpool_tokens: int,
+    pool_size: int,
+    max_overflow: int,
+    max_connections: int | None,
+) -> list[str]:
+    """Human-readable warnings when threads/workers can ask for more connections than exist."""
+    warnings = []
+    per_worker = pool_size + max_overflow
+    if threadpool_tokens > per_worker:
+        warnings.append(
+            f"threadpool ({threadpool_tokens} threads) > pool capacity ({pool_size}+{max_overflow}) per worker: "
+            f"sync endpoints will queue on pool checkout (DB_POOL_TIMEOUT) instead of on the threadpool"
+        )
+    if max_connections:
+        total = workers * per_worker
+        if total > max_connections:
+            warnings.append(
+                f"{workers} workers x {per_worker} pooled connections = {total} > database max_connections ({max_connections})"
+            )
+        threads = workers * threadpool_tokens
+        if threads > max_connections:
+            warnings.append(
+                f"{workers} workers x {threadpool_tokens} threads = {threads} concurrent DB users > database max_connections ({max_connections})"
+            )
+    return warnings
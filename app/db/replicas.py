@@ -0,0 +1,140 @@
+"""
+Read-replica routing.
+
+`ReplicaRouter.pick()` returns the next healthy replica engine (round robin)
+or None, meaning "use the primary". A replica is skipped while its last lag
+probe failed or reported more than REPLICA_MAX_LAG_SECONDS. Lag is probed
+lazily, at most once every REPLICA_LAG_CHECK_SECONDS per replica.
+
+The probe (connect + query) runs outside the router lock: the first thread
+that finds a replica's lag expired claims it and probes, every other thread
+keeps routing on the last known value (a replica that was never probed yet
+counts as unhealthy). A slow or black-holed replica therefore delays one
+request per probe, not every read.
+
+Only read-only dependencies use replicas (see app.api.deps.get_read_db);
+writes and read-your-writes paths (refresh rotation, logout) stay on the
+primary.
+"""
+import logging
+import threading
+import time
+from typing import Callable
+
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger(__name__)
+
+
+def probe_replica_lag(engine: Engine) -> float:
+    """Seconds behind the primary (0 for databases we cannot ask, e.g. SQLite)."""
+    dialect = engine.dialect.name
+    with engine.connect() as conn:
+        if dialect in ("mysql", "mariadb"):
+            row = conn.execute(text("SHOW REPLICA STATUS")).mappings().first()
+            if row is None:
+                return 0.0  # ไม่ใช่ replica (เช่น local dev ชี้ไปที่ primary)
+            lag = row.get("Seconds_Behind_Source", row.get("Seconds_Behind_Master"))
+            if lag is None:
+                raise RuntimeError("replication is not running")
+            return float(lag)
+        if dialect == "postgresql":
+            lag = conn.execute(
+                text("SELECT COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)")
+            ).scalar()
+            return float(lag or 0)
+    return 0.0
+
+
+class ReplicaRouter:
+    def __init__(
+        self,
+        engines: list[Engine] | None = None,
+        max_lag_seconds: float = 0.0,
+        check_interval: float = 5.0,
+        lag_probe: Callable[[Engine], float] = probe_replica_lag,
+    ):
+        self.engines = list(engines or [])
+        self.max_lag_seconds = max_lag_seconds
+        self.check_interval = check_interval
+        self.lag_probe = lag_probe
+        self._lock = threading.Lock()
+        self._next = 0
+        # engine index -> (checked_at, lag or None เมื่อ probe ล้มเหลว)
+        self._lag: dict[int, tuple[float, float | None]] = {}
+        self._probing: set[int] = set()
+
+        self.picks = [0] * len(self.engines)
+        self.primary_fallbacks = 0
+        self.probe_errors = 0
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.engines)
+
+    def _probe(self, i: int) -> float | None:
+        try:
+            return self.lag_probe(self.engines[i])
+        except Exception:
+            logger.warning("replica %d lag probe failed", i, exc_info=True)
+            with self._lock:
+                self.probe_errors += 1
+            return None
+
+    def _refresh(self) -> None:
+        now = time.monotonic()
+        with self._lock:
+            due = [
+                i
+                for i in range(len(self.engines))
+                if i not in self._probing and (i not in self._lag or now - self._lag[i][0] >= self.check_interval)
+            ]
+            self._probing.update(due)
+        # probe นอก lock: thread อื่นใช้ค่าเก่าไปก่อน ไม่ต้องรอ network
+        for i in due:
+            lag = None
+            try:
+                lag = self._probe(i)
+            finally:
+                with self._lock:
+                    self._lag[i] = (time.monotonic(), lag)
+                    self._probing.discard(i)
+
+    def _healthy(self, i: int) -> bool:
+        if self.max_lag_seconds <= 0:
+            return True
+        lag = self._lag.get(i, (None, None))[1]
+        return lag is not None and lag <= self.max_lag_seconds
+
+    def pick(self) -> Engine | None:
+        if not self.engines:
+            return None
+        if self.max_lag_seconds > 0:
+            self._refresh()
+        with self._lock:
+            n = len(self.engines)
+            for step in range(n):
+                i = (self._next + step) % n
+                if self._healthy(i):
+                    self._next = i + 1
+                    self.picks[i] += 1
+                    return self.engines[i]
+            self.primary_fallbacks += 1
+            return None
+
+    def metrics(self) -> dict:
+        with self._lock:
+            return {
+                "replicas": [
+                    {
+                        "url": e.url.render_as_string(hide_password=True),
+                        "picks": self.picks[i],
+                        "lag_seconds": self._lag.get(i, (None, None))[1],
+                    }
+                    for i, e in enumerate(self.engines)
+                ],
+                "max_lag_seconds": self.max_lag_seconds,
+                "primary_fallbacks": self.primary_fallbacks,
+                "probe_errors": self.probe_errors,
+            }
@@ -1,14 +1,87 @@
+import logging
+
 from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import Session, sessionmaker
 
 from app.core.config import settings
+from app.db.pool_stats import PoolStats, capacity_warnings, instrumented_pool_class, server_max_connections
+from app.db.replicas import ReplicaRouter
+from app.db.sharding import ShardDirectory, sharded_sessionmaker
+
+logger = logging.getLogger(__name__)
+
+pool_stats: dict[str, PoolStats] = {}
+pool_capacity_warnings: list[str] = []
+
+
+def _create_engine(url: str, name: str):
+    stats = PoolStats(name)
+    eng = create_engine(
+        url,
+        poolclass=instrumented_pool_class(stats),
+        pool_pre_ping=settings.DB_POOL_PRE_PING,
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_timeout=settings.DB_POOL_TIMEOUT,
+        pool_recycle=settings.DB_POOL_RECYCLE,
+    )
+    pool_stats[name] = stats.attach(eng)
+    return eng
+
 
-engine = create_engine(
-    settings.DATABASE_URL,
-    pool_pre_ping=True,
-    pool_size=10,
-    max_overflow=20,
-    pool_recycle=1800,
+engine = _create_engine(settings.DATABASE_URL, "primary")
+
+_replica_urls = [url.strip() for url in settings.DATABASE_REPLICA_URLS.split(",") if url.strip()]
+_shard_urls = [url.strip() for url in settings.SHARD_URLS.split(",") if url.strip()]
+if _replica_urls and _shard_urls:
+    raise RuntimeError("DATABASE_REPLICA_URLS and SHARD_URLS cannot be used together")
+
+if _shard_urls:
+    shard_engines = {f"shard-{i}": _create_engine(url, f"shard-{i}") for i, url in enumerate(_shard_urls)}
+    shard_directory = ShardDirectory(engine, list(shard_engines), cache_seconds=settings.SHARD_DIRECTORY_CACHE_SECONDS)
+    SessionLocal = sharded_sessionmaker(engine, shard_engines, shard_directory, autoflush=False, autocommit=False)
+else:
+    shard_engines = {}
+    shard_directory = None
+    SessionLocal = sessionmaker(bind=engine, autoflush=False, autocommit=False)
+
+# read replicas: session ถูก bind ตอนสร้าง (ReadSessionLocal(bind=replica_engine))
+replica_router = ReplicaRouter(
+    [_create_engine(url, f"replica-{i}") for i, url in enumerate(_replica_urls)],
+    max_lag_seconds=settings.REPLICA_MAX_LAG_SECONDS,
+    check_interval=settings.REPLICA_LAG_CHECK_SECONDS,
 )
+ReadSessionLocal = sessionmaker(autoflush=False, autocommit=False)
+
+
+def release_connection(db: Session) -> None:
+    """
+    End the current read-only transaction so the pooled connection goes back to
+    the pool before CPU-heavy work (bcrypt). The next query checks out a
+    connection again. Loaded objects are kept (not expired), so do not call this
+    with pending writes you still want to roll back.
+    """
+    if not db.in_transaction():
+        return
+    expire_on_commit = db.expire_on_commit
+    db.expire_on_commit = False
+    try:
+        db.commit()
+    finally:
+        db.expire_on_commit = expire_on_commit
+
 
-SessionLocal = sessionmaker(bind=engine, autoflush=False, autocommit=False)
+def check_pool_capacity() -> list[str]:
+    """Startup check: threadpool / workers vs. pool capacity vs. DB max_connections."""
+    max_connections = settings.DB_MAX_CONNECTIONS or server_max_connections(engine)
+    warnings = capacity_warnings(
+        workers=settings.WEB_CONCURRENCY,
+        threadpool_tokens=settings.THREADPOOL_TOKENS,
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        max_connections=max_connections,
+    )
+    for w in warnings:
+        logger.warning("db pool capacity: %s", w)
+    pool_capacity_warnings[:] = warnings
+    return warnings
@@ -0,0 +1,255 @@
+"""
+Horizontal sharding by user_id (opt-in: SHARD_URLS).
+
+Layout:
+- DATABASE_URL ("directory"): global tables (user_shards, audit_events,
+  revocation_events).
+- SHARD_URLS ("shard-0", "shard-1", ...): users, refresh_tokens,
+  password_reset_tokens. A user and all of their tokens live on one shard.
+
+Routing:
+- user_id -> shard comes from the user_shards directory (cached per worker
+  for SHARD_DIRECTORY_CACHE_SECONDS, so a resharded user is picked up after
+  at most that long).
+- email -> (user_id, shard) is a directory lookup (login, register,
+  forgot-password).
+- refresh tokens are JWTs whose `sub` is the user id, so refresh/logout route
+  by that hint. Reset tokens are rare and are looked up on every shard.
+- anything else without a routing key is sent to every shard and the results
+  are concatenated (ShardedSession's scatter/gather).
+
+Registering spans two databases without two-phase commit. The directory row
+is committed first (allocate_user_id reserves the global id), then the user
+row on its shard; if the shard INSERT/commit fails, release_user_id deletes
+the reservation so the email can register again. A worker killed between the
+two commits still leaves a directory row without a user.
+
+crud functions pass `**shard_kwargs(db, user_id)` to db.execute; for a
+normal Session it is an empty dict, so the unsharded layout is unchanged.
+"""
+import threading
+import time
+import zlib
+
+from sqlalchemy import bindparam, delete, insert, or_, select
+from sqlalchemy.engine import Engine
+from sqlalchemy.ext.horizontal_shard import ShardedSession
+from sqlalchemy.orm import Session, sessionmaker
+
+from app.models.user import User
+from app.models.user_shard import UserShard
+
+DIRECTORY = "directory"
+GLOBAL_TABLES = frozenset({"user_shards", "audit_events", "revocation_events"})
+
+_shard_by_user = select(UserShard.shard).where(UserShard.user_id == bindparam("b_user_id"))
+_user_by_email = select(UserShard.user_id, UserShard.shard).where(UserShard.email == bindparam("b_email"))
+_insert_entry = insert(UserShard).values(email=bindparam("b_email"), shard=bindparam("b_shard"))
+_delete_entry = delete(UserShard).where(UserShard.user_id == bindparam("b_user_id"))
+_users_by_ids_or_emails = select(UserShard.user_id, UserShard.shard).where(
+    or_(
+        UserShard.user_id.in_(bindparam("b_user_ids", expanding=True)),
+        UserShard.email.in_(bindparam("b_emails", expanding=True)),
+    )
+)
+
+
+class ShardRoutingError(RuntimeError):
+    pass
+
+
+class ShardDirectory:
+    def __init__(self, engine: Engine, shard_ids: list[str], cache_seconds: float = 30.0, cache_size: int = 100_000):
+        self.engine = engine
+        self.shard_ids = list(shard_ids)
+        self.cache_seconds = cache_seconds
+        self.cache_size = cache_size
+        self._cache: dict[int, tuple[float, str]] = {}
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+
+    def place(self, email: str) -> str:
+        # shard ของ user ใหม่: hash ของ email (ย้ายทีหลังได้ด้วย app.tools.reshard)
+        return self.shard_ids[zlib.crc32(email.lower().encode()) % len(self.shard_ids)]
+
+    def remember(self, user_id: int, shard: str) -> None:
+        with self._lock:
+            if len(self._cache) >= self.cache_size:
+                self._cache.clear()
+            self._cache[user_id] = (time.monotonic(), shard)
+
+    def forget(self, user_id: int) -> None:
+        with self._lock:
+            self._cache.pop(user_id, None)
+
+    def shard_of(self, user_id: int) -> str | None:
+        now = time.monotonic()
+        with self._lock:
+            cached = self._cache.get(user_id)
+            if cached is not None and now - cached[0] < self.cache_seconds:
+                self.hits += 1
+                return cached[1]
+            self.misses += 1
+
+        with self.engine.connect() as conn:
+            shard = conn.execute(_shard_by_user, {"b_user_id": user_id}).scalar()
+        if shard is not None:
+            self.remember(user_id, shard)
+        return shard
+
+    def lookup_email(self, email: str) -> tuple[int, str] | None:
+        with self.engine.connect() as conn:
+            row = conn.execute(_user_by_email, {"b_email": email}).first()
+        if row is None:
+            return None
+        self.remember(row[0], row[1])
+        return row[0], row[1]
+
+    def metrics(self) -> dict:
+        with self._lock:
+            return {
+                "shards": self.shard_ids,
+                "cached_users": len(self._cache),
+                "cache_seconds": self.cache_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+            }
+
+
+class RoutingSession(ShardedSession):
+    def __init__(self, *args, shard_directory: ShardDirectory, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.shard_directory = shard_directory
+
+
+def _statement_tables(statement) -> set[str]:
+    table = getattr(statement, "table", None)  # insert/update/delete
+    if table is not None:
+        return {table.name}
+    froms = statement.get_final_froms() if hasattr(statement, "get_final_froms") else []
+    return {t.name for t in froms if hasattr(t, "name")}
+
+
+def sharded_sessionmaker(directory_engine: Engine, shard_engines: dict[str, Engine], directory: ShardDirectory, **kw):
+    shard_ids = list(shard_engines)
+
+    def shard_chooser(mapper, instance, clause=None, **_):
+        if mapper is not None and mapper.local_table.name in GLOBAL_TABLES:
+            return DIRECTORY
+        if instance is not None:
+            user_id = instance.id if isinstance(instance, User) else getattr(instance, "user_id", None)
+            shard = directory.shard_of(user_id) if user_id is not None else None
+            if shard is not None:
+                return shard
+        raise ShardRoutingError(f"cannot route {mapper} without a user_id")
+
+    def identity_chooser(mapper, primary_key, *, lazy_loaded_from=None, **_):
+        if mapper.local_table.name in GLOBAL_TABLES:
+            return [DIRECTORY]
+        if lazy_loaded_from is not None:
+            return [lazy_loaded_from.identity_token]
+        if mapper.class_ is User:
+            shard = directory.shard_of(primary_key[0])
+            return [shard] if shard else []
+        return shard_ids
+
+    def execute_chooser(orm_context):
+        if _statement_tables(orm_context.statement) & GLOBAL_TABLES:
+            return [DIRECTORY]
+        if orm_context.lazy_loaded_from is not None:
+            return [orm_context.lazy_loaded_from.identity_token]
+        return shard_ids
+
+    return sessionmaker(
+        class_=RoutingSession,
+        shards={DIRECTORY: directory_engine, **shard_engines},
+        shard_chooser=shard_chooser,
+        identity_chooser=identity_chooser,
+        execute_chooser=execute_chooser,
+        shard_directory=directory,
+        **kw,
+    )
+
+
+# -----------------------------
+# helpers for crud
+# -----------------------------
+def _directory(db: Session) -> ShardDirectory | None:
+    return getattr(db, "shard_directory", None)
+
+
+def shard_kwargs(db: Session, user_id: int | None) -> dict:
+    """db.execute(..., **shard_kwargs(db, user_id)): pin the statement to the user's shard."""
+    directory = _directory(db)
+    if directory is None or user_id is None:
+        return {}
+    shard = directory.shard_of(user_id)
+    return {"bind_arguments": {"shard_id": shard}} if shard is not None else {}
+
+
+def email_shard_kwargs(db: Session, email: str) -> dict | None:
+    """Like shard_kwargs, by email; None = sharded and the email is not in the directory."""
+    directory = _directory(db)
+    if directory is None:
+        return {}
+    found = directory.lookup_email(email)
+    if found is None:
+        return None
+    return {"bind_arguments": {"shard_id": found[1]}}
+
+
+def allocate_user_id(db: Session, email: str) -> int | None:
+    """Sharded: reserve the global user id in the directory (committed on its own) and return it."""
+    directory = _directory(db)
+    if directory is None:
+        return None
+    # commit ก่อน INSERT ที่ shard: shard_of() ของ connection อื่นเห็น row นี้แล้ว ไม่ต้องยัด cache ล่วงหน้า
+    with directory.engine.begin() as conn:
+        result = conn.execute(_insert_entry, {"b_email": email, "b_shard": directory.place(email)})
+    return result.inserted_primary_key[0]
+
+
+def release_user_id(db: Session, user_id: int | None) -> None:
+    """Undo allocate_user_id after the shard INSERT/commit failed (otherwise the email stays taken)."""
+    directory = _directory(db)
+    if directory is None or user_id is None:
+        return
+    with directory.engine.begin() as conn:
+        conn.execute(_delete_entry, {"b_user_id": user_id})
+    directory.forget(user_id)
+
+
+def group_by_shard(db: Session, rows: list[dict], key: str) -> list[tuple[dict, list[dict]]]:
+    """Split executemany rows per shard by rows[i][key] (a user id)."""
+    directory = _directory(db)
+    if directory is None:
+        return [({}, rows)]
+    groups: dict[str | None, list[dict]] = {}
+    for row in rows:
+        groups.setdefault(directory.shard_of(row[key]), []).append(row)
+    return [({"bind_arguments": {"shard_id": shard}}, group) for shard, group in groups.items() if shard is not None]
+
+
+def lookup_user_ids(db: Session, user_ids: list[int], emails: list[str]) -> list[int] | None:
+    """Sharded: ids of the users that exist, from one directory query (shards cached); None = not sharded."""
+    directory = _directory(db)
+    if directory is None:
+        return None
+    with directory.engine.connect() as conn:
+        rows = conn.execute(_users_by_ids_or_emails, {"b_user_ids": user_ids, "b_emails": emails}).all()
+    for user_id, shard in rows:
+        directory.remember(user_id, shard)
+    return [user_id for user_id, _ in rows]
+
+
+def ids_by_shard(db: Session, user_ids: list[int]) -> list[tuple[dict, list[int]]]:
+    """Split user ids per shard: [(db.execute kwargs, ids), ...]."""
+    directory = _directory(db)
+    if directory is None:
+        return [({}, list(user_ids))]
+    groups: dict[str | None, list[int]] = {}
+    for user_id in user_ids:
+        groups.setdefault(directory.shard_of(user_id), []).append(user_id)
+    return [({"bind_arguments": {"shard_id": shard}}, ids) for shard, ids in groups.items() if shard is not None]
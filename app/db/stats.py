@@ -0,0 +1,59 @@
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+
+class StatementCounter:
+    """
+    Count SQL statements and DB round trips on an engine (SQLAlchemy events).
+
+        with StatementCounter(engine) as c:
+            client.post("/api/v1/auth/login", ...)
+        assert c.statements_count <= 2
+
+    executemany นับเป็น 1 statement (1 round trip), commit/rollback นับเป็น round trip ด้วย
+    """
+
+    def __init__(self, engine: Engine):
+        self.engine = engine
+        self.statements: list[str] = []
+        self.commits = 0
+        self.rollbacks = 0
+
+    def _before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        self.statements.append(statement)
+
+    def _commit(self, conn):
+        self.commits += 1
+
+    def _rollback(self, conn):
+        self.rollbacks += 1
+
+    @property
+    def statements_count(self) -> int:
+        return len(self.statements)
+
+    @property
+    def round_trips(self) -> int:
+        return len(self.statements) + self.commits + self.rollbacks
+
+    def start(self) -> "StatementCounter":
+        event.listen(self.engine, "before_cursor_execute", self._before_cursor_execute)
+        event.listen(self.engine, "commit", self._commit)
+        event.listen(self.engine, "rollback", self._rollback)
+        return self
+
+    def stop(self) -> None:
+        event.remove(self.engine, "before_cursor_execute", self._before_cursor_execute)
+        event.remove(self.engine, "commit", self._commit)
+        event.remove(self.engine, "rollback", self._rollback)
+
+    def __enter__(self) -> "StatementCounter":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+    def report(self) -> str:
+        lines = [f"{len(self.statements)} statements, {self.commits} commits, {self.rollbacks} rollbacks"]
+        lines += [f"  {s.strip().splitlines()[0]}" for s in self.statements]
+        return "\n".join(lines)
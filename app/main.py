@@ -1,3 +1,7 @@
+from contextlib import asynccontextmanager
+
+import anyio.to_thread
+
 from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 from starlette.middleware.trustedhost import TrustedHostMiddleware
@@ -9,6 +13,18 @@ from slowapi.errors import RateLimitExceeded
 from app.core.config import settings
 from app.api.v1.router import api_router
 from app.core.limiter import limiter
+from app.core.timing import start_trace, format_server_timing, record_if_slow
+from app.core.profiler import start_request_profile, finish_request_profile
+from app.core.telemetry import session_telemetry
+from app.core.admission import admission
+from app.core.audit import audit_log
+from app.api.deps_admin import admin_key_ok
+from app.db.session import check_pool_capacity
+from app.core.breached import breached_passwords
+from app.api.verify_socket import verify_socket
+from app.core.recorder import TrafficRecorderMiddleware, traffic_recorder
+from app.core.access_log import AccessLogMiddleware, access_log
+from app.core.warmup import warmup
 
 
 # -----------------------------
@@ -21,8 +37,46 @@ redoc_url = "/redoc" if docs_on else None
 openapi_url = "/openapi.json" if docs_on else None
 
 
+# -----------------------------
+# Lifespan: threadpool / pool check, background writers (start / flush on shutdown),
+# verify socket, warmup (mappers / bcrypt / jwt / pool) => /health ready
+# -----------------------------
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # sync endpoint ใช้ thread จาก AnyIO limiter นี้ (default 40)
+    anyio.to_thread.current_default_thread_limiter().total_tokens = settings.THREADPOOL_TOKENS
+    check_pool_capacity()
+    # เปิด index ตอน boot: path ผิด => worker start ไม่ขึ้น (ไม่ใช่ register พังทีหลัง)
+    breached_passwords.open()
+    if settings.SESSION_TELEMETRY_ENABLED:
+        session_telemetry.start()
+    if settings.AUDIT_ENABLED:
+        audit_log.start()
+    if settings.TRAFFIC_RECORD_ENABLED:
+        traffic_recorder.start()
+    if settings.ACCESS_LOG_ENABLED:
+        access_log.start()
+    if settings.VERIFY_SOCKET_PATH:
+        await verify_socket.start()
+    if settings.WARMUP_ENABLED:
+        await anyio.to_thread.run_sync(warmup.run)
+    warmup.ready = True
+    try:
+        yield
+    finally:
+        warmup.ready = False
+        await verify_socket.stop()
+        # flush ของที่ค้างก่อนปิด worker
+        session_telemetry.stop()
+        audit_log.stop()
+        if settings.TRAFFIC_RECORD_ENABLED:
+            traffic_recorder.stop()
+        access_log.stop()
+
+
 app = FastAPI(
     title=settings.APP_NAME,
+    lifespan=lifespan,
     docs_url=docs_url,
     redoc_url=redoc_url,
     openapi_url=openapi_url,
@@ -46,7 +100,31 @@ if settings.ENV == "prod" and settings.allowed_hosts_list:
     )
 
 # -----------------------------
-# CORS
+# Admission control: แยก concurrency budget ของ bcrypt / db / cheap routes
+# -----------------------------
+@app.middleware("http")
+async def admission_control(request: Request, call_next):
+    cls = None
+    if settings.ADMISSION_ENABLED and request.method != "OPTIONS":  # CORS preflight ไม่ต้องกิน budget
+        cls = admission.classify(request.url.path)
+    if cls is None:
+        return await call_next(request)
+
+    budget = admission.budgets[cls]
+    if not await budget.acquire():
+        return JSONResponse(
+            {"detail": "Server busy, retry later"},
+            status_code=503,
+            headers={"Retry-After": str(settings.ADMISSION_RETRY_AFTER_SECONDS)},
+        )
+    try:
+        return await call_next(request)
+    finally:
+        budget.release()
+
+
+# -----------------------------
+# CORS: เพิ่มหลัง admission = อยู่ชั้นนอกกว่า => 503 ตอนถูก shed ก็มี CORS header
 # -----------------------------
 if settings.allowed_origins_list:
     strict = (settings.ENV == "prod") and getattr(settings, "CORS_STRICT_IN_PROD", True)
@@ -107,8 +185,56 @@ async def security_and_docs_guard(request: Request, call_next):
     return resp
 
 
+# -----------------------------
+# Diagnostics: per-stage timing (Server-Timing + slow trace buffer)
+# and per-request sampling profile (x-profile: 1)
+# -----------------------------
+@app.middleware("http")
+async def request_diagnostics(request: Request, call_next):
+    trace = start_trace(request.method, request.url.path)
+    is_admin = bool(request.headers.get("x-admin-key")) and admin_key_ok(request)
+
+    profiler = None
+    if is_admin and request.headers.get("x-profile") == "1":
+        profiler = start_request_profile()
+
+    try:
+        resp: Response = await call_next(request)
+    finally:
+        if profiler is not None:
+            profile_id = finish_request_profile(profiler, request.method, request.url.path)
+    trace.finish(resp.status_code)
+
+    record_if_slow(trace)
+
+    # header เปิดทั้งระบบด้วย config หรือเปิดราย request ด้วย x-admin-key
+    if settings.SERVER_TIMING_ENABLED or is_admin:
+        resp.headers["Server-Timing"] = format_server_timing(trace)
+    if profiler is not None:
+        resp.headers["X-Profile-Id"] = profile_id
+
+    return resp
+
+
+# -----------------------------
+# Access log: JSON ต่อ request, encode/เขียนใน listener thread (ไม่ใช่บน event loop)
+# -----------------------------
+if settings.ACCESS_LOG_ENABLED:
+    app.add_middleware(AccessLogMiddleware, access_log=access_log)
+
+
+# -----------------------------
+# Traffic recorder (opt-in): เพิ่มทีหลังสุด = ชั้นนอกสุด => latency ตามที่ client เห็น
+# -----------------------------
+if settings.TRAFFIC_RECORD_ENABLED:
+    app.add_middleware(TrafficRecorderMiddleware, recorder=traffic_recorder)
+
+
 @app.get("/health")
 def health():
+    # 503 จนกว่า lifespan จะ warmup เสร็จ (load balancer ยังไม่ส่ง traffic มา)
+    if not warmup.ready:
+        return JSONResponse({"status": "starting", "service": settings.APP_NAME}, status_code=503)
     return {"status": "ok", "service": settings.APP_NAME}
 
 
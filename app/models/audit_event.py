@@ -0,0 +1,29 @@
+from datetime import datetime
+from sqlalchemy import BigInteger, Boolean, DateTime, Index, Integer, String, true
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.db.base_class import Base
+
+
+class AuditEvent(Base):
+    """Append-only security event log (ไม่มี FK: log ต้องอยู่ได้แม้ user ถูกลบ)"""
+
+    __tablename__ = "audit_events"
+
+    id: Mapped[int] = mapped_column(BigInteger().with_variant(Integer, "sqlite"), primary_key=True, autoincrement=True)
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
+
+    event_type: Mapped[str] = mapped_column(String(32), nullable=False)
+    success: Mapped[bool] = mapped_column(Boolean, nullable=False, default=True, server_default=true())
+
+    user_id: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    session_id: Mapped[str | None] = mapped_column(String(64), nullable=True)
+    ip: Mapped[str | None] = mapped_column(String(64), nullable=True)
+    user_agent: Mapped[str | None] = mapped_column(String(255), nullable=True)
+    detail: Mapped[str | None] = mapped_column(String(255), nullable=True)
+
+    __table_args__ = (
+        # keyset pagination ตามช่วงเวลา: (created_at, id)
+        Index("ix_audit_events_created_at_id", "created_at", "id"),
+        Index("ix_audit_events_user_id_created_at", "user_id", "created_at"),
+    )
@@ -1,5 +1,5 @@
 from datetime import datetime, timezone
-from sqlalchemy import String, DateTime, ForeignKey, Integer, func
+from sqlalchemy import String, DateTime, ForeignKey, Index, Integer, func
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from app.db.base_class import Base
@@ -23,4 +23,9 @@ class RefreshToken(Base):
     user_agent: Mapped[str | None] = mapped_column(String(255), nullable=True)
     ip: Mapped[str | None] = mapped_column(String(64), nullable=True)
 
-    user = relationship("User", back_populates="refresh_tokens")
\ No newline at end of file
+    user = relationship("User", back_populates="refresh_tokens")
+
+    __table_args__ = (
+        # live session ต่อ user (revoke_all / evict LRU / rotate ตาม device)
+        Index("ix_refresh_tokens_user_id_revoked_at_last_used_at", "user_id", "revoked_at", "last_used_at"),
+    )
\ No newline at end of file
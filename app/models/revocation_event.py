@@ -0,0 +1,24 @@
+from datetime import datetime
+from sqlalchemy import BigInteger, DateTime, Integer, String
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.db.base_class import Base
+
+
+class RevocationEvent(Base):
+    """
+    Outbox ของ revocation (logout / logout_all / เปลี่ยน-reset password / evict) ให้ resource server
+    ที่ cache ผล /verify ตาม stream (id = cursor). DB เดียว: transaction เดียวกับการ revoke;
+    sharded: commit แยกที่ directory (ดู app.core.revocation)
+    """
+
+    __tablename__ = "revocation_events"
+
+    id: Mapped[int] = mapped_column(BigInteger().with_variant(Integer, "sqlite"), primary_key=True, autoincrement=True)
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
+
+    user_id: Mapped[int] = mapped_column(Integer, nullable=False)
+    session_id: Mapped[str | None] = mapped_column(String(64), nullable=True)  # None = ทุก session ของ user
+    # token ของ user นี้ (หรือของ session นี้) ที่ iat < not_before ใช้ไม่ได้แล้ว
+    not_before: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
+    reason: Mapped[str] = mapped_column(String(32), nullable=False)
@@ -1,6 +1,6 @@
 from datetime import datetime, timezone
 from datetime import timezone
-from sqlalchemy import String, Boolean, DateTime, func
+from sqlalchemy import String, Boolean, DateTime, Index, func
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from app.db.base_class import Base
@@ -34,3 +34,10 @@ class User(Base):
         back_populates="user",
         cascade="all, delete-orphan",
     )
+
+    __table_args__ = (
+        # admin listing / search (keyset): created_at + id, prefix ของ full_name / phone
+        Index("ix_users_created_at_id", "created_at", "id"),
+        Index("ix_users_full_name", "full_name"),
+        Index("ix_users_phone", "phone"),
+    )
@@ -0,0 +1,17 @@
+from sqlalchemy import Integer, String
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.db.base_class import Base
+
+
+class UserShard(Base):
+    """
+    Shard directory (อยู่ที่ DATABASE_URL เท่านั้น): user_id -> shard, email -> user_id.
+    user_id ออกจากตารางนี้ => id ไม่ชนกันข้าม shard
+    """
+
+    __tablename__ = "user_shards"
+
+    user_id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    email: Mapped[str] = mapped_column(String(255), unique=True, index=True, nullable=False)
+    shard: Mapped[str] = mapped_column(String(32), nullable=False)
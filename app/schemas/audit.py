@@ -0,0 +1,23 @@
+from datetime import datetime
+from typing import List, Optional
+
+from pydantic import BaseModel, ConfigDict
+
+
+class AuditEventOut(BaseModel):
+    id: int
+    created_at: datetime
+    event_type: str
+    success: bool
+    user_id: Optional[int] = None
+    session_id: Optional[str] = None
+    ip: Optional[str] = None
+    user_agent: Optional[str] = None
+    detail: Optional[str] = None
+
+    model_config = ConfigDict(from_attributes=True)
+
+
+class AuditEventPage(BaseModel):
+    items: List[AuditEventOut]
+    next_cursor: Optional[str] = None
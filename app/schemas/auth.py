@@ -1,10 +1,17 @@
-from pydantic import BaseModel, EmailStr, Field
+from pydantic import BaseModel, EmailStr, Field, field_validator
 from typing import Optional
 
+from app.core.breached import check_not_breached
+
 class RegisterRequest(BaseModel):
     email: EmailStr
     password: str = Field(min_length=4, max_length=256)
 
+    @field_validator("password")
+    @classmethod
+    def not_breached(cls, v: str) -> str:
+        return check_not_breached(v)
+
 class LoginRequest(BaseModel):
     email: EmailStr
     password: str
@@ -17,9 +24,19 @@ class ChangePasswordRequest(BaseModel):
     old_password: str
     new_password: str = Field(min_length=8, max_length=256)
 
+    @field_validator("new_password")
+    @classmethod
+    def not_breached(cls, v: str) -> str:
+        return check_not_breached(v)
+
 class ForgotPasswordRequest(BaseModel):
     email: EmailStr
 
 class ResetPasswordRequest(BaseModel):
     token: str
     new_password: str = Field(min_length=8, max_length=256)
+
+    @field_validator("new_password")
+    @classmethod
+    def not_breached(cls, v: str) -> str:
+        return check_not_breached(v)
@@ -1,7 +1,7 @@
 from datetime import datetime
-from typing import Optional
+from typing import List, Literal, Optional
 
-from pydantic import BaseModel, EmailStr, ConfigDict
+from pydantic import BaseModel, EmailStr, ConfigDict, Field
 
 
 class UserOut(BaseModel):
@@ -17,8 +17,37 @@ class UserOut(BaseModel):
     model_config = ConfigDict(from_attributes=True)
 
 
+class UserPage(BaseModel):
+    items: List[UserOut]
+    next_cursor: Optional[str] = None
+
+
 class ProfileUpdateRequest(BaseModel):
     full_name: Optional[str] = None
     phone: Optional[str] = None
 
     model_config = ConfigDict(extra="forbid")
+
+
+class BulkUsersRequest(BaseModel):
+    action: Literal["deactivate", "reactivate", "revoke_sessions", "force_password_reset"]
+    user_ids: List[int] = Field(default_factory=list, max_length=100_000)
+    emails: List[str] = Field(default_factory=list, max_length=100_000)
+
+    model_config = ConfigDict(extra="forbid")
+
+
+class BulkChunkResult(BaseModel):
+    requested: int
+    matched: int
+    users_updated: int
+    sessions_revoked: int
+
+
+class BulkUsersResult(BaseModel):
+    action: str
+    requested: int
+    matched: int
+    users_updated: int
+    sessions_revoked: int
+    chunks: List[BulkChunkResult]
@@ -0,0 +1 @@
+# app/tools: operational CLIs (รันด้วย `python -m app.tools.<name>`)
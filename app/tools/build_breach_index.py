@@ -0,0 +1,159 @@
+"""
+Build the breached-password index used by app.core.breached.
+
+Input: one entry per line, either
+- a hex SHA-1, optionally followed by ":count" (the HIBP ordered-by-hash dump), or
+- a plaintext password (--plaintext).
+
+Entries are truncated to --width bytes (8 by default: 8 GB for 1B entries,
+false-positive rate ~count / 2**64), sorted and de-duplicated with an
+external merge sort, so the input does not have to fit in memory.
+Malformed lines (not hex, or shorter than --width bytes) are skipped and
+counted instead of aborting the build.
+
+    python -m app.tools.build_breach_index pwned-passwords-sha1-ordered-by-hash.txt breached.idx
+    python -m app.tools.build_breach_index --plaintext rockyou.txt breached.idx --width 20
+"""
+import argparse
+import hashlib
+import heapq
+import os
+import sys
+import tempfile
+from array import array
+from typing import Callable, Iterable, Iterator
+
+from app.core.breached import FANOUT_SIZE, HEADER, MAGIC
+
+
+def _keys(
+    lines: Iterable[str],
+    width: int,
+    plaintext: bool,
+    on_skip: Callable[[int, str], None] | None = None,
+) -> Iterator[bytes]:
+    for lineno, line in enumerate(lines, 1):
+        line = line.rstrip("\r\n")
+        if not line:
+            continue
+        if plaintext:
+            yield hashlib.sha1(line.encode("utf-8")).digest()[:width]
+            continue
+        try:
+            key = bytes.fromhex(line.split(":", 1)[0].strip())[:width]
+        except ValueError:
+            key = b""
+        # record ต้องยาว width พอดี ไม่งั้น layout fixed-width ของไฟล์เพี้ยน
+        if len(key) != width:
+            if on_skip is not None:
+                on_skip(lineno, line)
+            continue
+        yield key
+
+
+def _write_run(keys: list[bytes], tmpdir: str) -> str:
+    keys.sort()
+    fd, path = tempfile.mkstemp(dir=tmpdir, suffix=".run")
+    with os.fdopen(fd, "wb") as f:
+        f.write(b"".join(keys))
+    return path
+
+
+def _read_run(path: str, width: int) -> Iterator[bytes]:
+    with open(path, "rb") as f:
+        while True:
+            block = f.read(width * 65536)
+            if not block:
+                return
+            for i in range(0, len(block), width):
+                yield block[i:i + width]
+
+
+def build_index(
+    lines: Iterable[str],
+    out_path: str,
+    width: int = 8,
+    plaintext: bool = False,
+    chunk_size: int = 10_000_000,
+    on_skip: Callable[[int, str], None] | None = None,
+) -> int:
+    """Write the index to out_path; returns the number of unique entries. on_skip(lineno, line) sees malformed lines."""
+    if not 2 <= width <= 20:
+        raise ValueError("width must be between 2 and 20 bytes")
+
+    out_dir = os.path.dirname(os.path.abspath(out_path))
+    with tempfile.TemporaryDirectory(dir=out_dir) as tmpdir:
+        # 1) sorted runs ขนาด chunk_size
+        runs, chunk = [], []
+        for key in _keys(lines, width, plaintext, on_skip):
+            chunk.append(key)
+            if len(chunk) >= chunk_size:
+                runs.append(_write_run(chunk, tmpdir))
+                chunk = []
+        if chunk or not runs:
+            runs.append(_write_run(chunk, tmpdir))
+
+        # 2) k-way merge + dedupe ลงไฟล์ records, นับ fanout ไปพร้อมกัน
+        fanout = array("Q", bytes(FANOUT_SIZE * 8))
+        records_path = os.path.join(tmpdir, "records")
+        count, prev = 0, None
+        with open(records_path, "wb") as f:
+            buf = []
+            for key in heapq.merge(*(_read_run(p, width) for p in runs)):
+                if key == prev:
+                    continue
+                prev = key
+                buf.append(key)
+                fanout[(key[0] << 8) | key[1]] += 1
+                count += 1
+                if len(buf) >= 65536:
+                    f.write(b"".join(buf))
+                    buf = []
+            f.write(b"".join(buf))
+
+        # 3) header + fanout สะสม + records
+        total = 0
+        for i in range(FANOUT_SIZE):
+            total += fanout[i]
+            fanout[i] = total
+        if sys.byteorder == "big":
+            fanout.byteswap()
+
+        tmp_out = out_path + ".tmp"
+        with open(tmp_out, "wb") as out, open(records_path, "rb") as records:
+            out.write(HEADER.pack(MAGIC, width, 0, count))
+            out.write(fanout.tobytes())
+            while block := records.read(1 << 20):
+                out.write(block)
+        os.replace(tmp_out, out_path)  # worker ที่ map ไฟล์เก่าอยู่ยังอ่านต่อได้
+    return count
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("dump", help="input file ('-' = stdin)")
+    parser.add_argument("out", help="index file to write")
+    parser.add_argument("--width", type=int, default=8, help="bytes of SHA-1 kept per entry (2-20)")
+    parser.add_argument("--plaintext", action="store_true", help="input lines are passwords, not SHA-1 hex")
+    parser.add_argument("--chunk-size", type=int, default=10_000_000, help="entries per in-memory sort run")
+    args = parser.parse_args()
+
+    skipped = 0
+
+    def on_skip(lineno: int, line: str) -> None:
+        nonlocal skipped
+        skipped += 1
+        if skipped <= 10:
+            print(f"skipping malformed line {lineno}: {line[:80]!r}", file=sys.stderr)
+
+    src = sys.stdin if args.dump == "-" else open(args.dump, encoding="utf-8", errors="replace")
+    with src:
+        count = build_index(
+            src, args.out, width=args.width, plaintext=args.plaintext, chunk_size=args.chunk_size, on_skip=on_skip
+        )
+    size = os.path.getsize(args.out)
+    print(f"{args.out}: {count:,} entries, {args.width} bytes each, {size / 1e6:,.1f} MB, {skipped:,} lines skipped")
+
+
+if __name__ == "__main__":
+    main()
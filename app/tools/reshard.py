@@ -0,0 +1,223 @@
+"""
+Move users between shards while the app keeps serving them.
+
+For a batch of users (steps 1-2 per user, then one wait for the batch):
+1. copy the user row and all of their tokens from the source to the target
+2. flip the directory entry (user_shards.shard) to the target
+3. wait SHARD_DIRECTORY_CACHE_SECONDS so every worker's directory cache
+   has expired and stopped routing to the source
+4. copy again: writes that reached the source in the meantime are merged in
+   (refresh/reset tokens by token_hash; revocation and used_at are kept from
+   either side, the newer users.updated_at wins)
+5. delete the user's rows from the source
+
+Token ids are per-shard autoincrement values, so tokens are matched by
+token_hash and re-inserted without their id. User ids are global (they come
+from the directory), so users keep their id.
+
+    python -m app.tools.reshard status
+    python -m app.tools.reshard move --to shard-1 --user-id 12 --user-id 13
+    python -m app.tools.reshard rebalance --from shard-0 --to shard-1 --limit 100
+"""
+import argparse
+import logging
+import time
+from dataclasses import dataclass
+from typing import Callable
+
+from sqlalchemy import delete, func, insert, select, update
+from sqlalchemy.engine import Connection, Engine
+
+from app.db.sharding import ShardDirectory
+from app.models.password_reset_token import PasswordResetToken
+from app.models.refresh_token import RefreshToken
+from app.models.user import User
+from app.models.user_shard import UserShard
+
+logger = logging.getLogger(__name__)
+
+_users = User.__table__
+_refresh = RefreshToken.__table__
+_resets = PasswordResetToken.__table__
+_directory = UserShard.__table__
+
+
+@dataclass
+class MoveResult:
+    user_id: int
+    source: str | None
+    target: str
+    moved: bool
+    refresh_tokens: int = 0
+    reset_tokens: int = 0
+
+
+def _later(a, b):
+    if a is None or b is None:
+        return a or b
+    return max(a, b)
+
+
+def _earlier(a, b):
+    if a is None or b is None:
+        return a or b
+    return min(a, b)
+
+
+def _merge_tokens(src: Connection, dst: Connection, table, user_id: int, merge: Callable[[dict, dict], dict]) -> int:
+    rows = src.execute(select(table).where(table.c.user_id == user_id)).mappings().all()
+    for row in rows:
+        existing = dst.execute(select(table).where(table.c.token_hash == row["token_hash"])).mappings().first()
+        if existing is None:
+            dst.execute(insert(table).values({k: v for k, v in row.items() if k != "id"}))
+        else:
+            changes = merge(dict(row), dict(existing))
+            if changes:
+                dst.execute(update(table).where(table.c.id == existing["id"]).values(changes))
+    return len(rows)
+
+
+def _merge_refresh(src: dict, dst: dict) -> dict:
+    # revoke แล้วต้อง revoke ตลอด (ไม่ให้ copy รอบสองย้อน revoke กลับ)
+    changes = {
+        "revoked_at": _earlier(src["revoked_at"], dst["revoked_at"]),
+        "last_used_at": _later(src["last_used_at"], dst["last_used_at"]),
+    }
+    return {k: v for k, v in changes.items() if v != dst[k]}
+
+
+def _merge_reset(src: dict, dst: dict) -> dict:
+    used_at = _earlier(src["used_at"], dst["used_at"])
+    return {"used_at": used_at} if used_at != dst["used_at"] else {}
+
+
+def copy_user(src: Connection, dst: Connection, user_id: int) -> tuple[int, int]:
+    """Upsert the user and merge their tokens from src into dst (idempotent)."""
+    user = src.execute(select(_users).where(_users.c.id == user_id)).mappings().first()
+    if user is None:
+        return 0, 0
+    existing = dst.execute(select(_users.c.updated_at).where(_users.c.id == user_id)).first()
+    if existing is None:
+        dst.execute(insert(_users).values(dict(user)))
+    elif user["updated_at"] is not None and (existing[0] is None or user["updated_at"] > existing[0]):
+        dst.execute(update(_users).where(_users.c.id == user_id).values({k: v for k, v in user.items() if k != "id"}))
+
+    n_refresh = _merge_tokens(src, dst, _refresh, user_id, _merge_refresh)
+    n_reset = _merge_tokens(src, dst, _resets, user_id, _merge_reset)
+    return n_refresh, n_reset
+
+
+def _copy(source: Engine, target: Engine, user_id: int) -> tuple[int, int]:
+    with source.connect() as src, target.begin() as dst:
+        return copy_user(src, dst, user_id)
+
+
+def _flip(directory: ShardDirectory, user_id: int, source: str, target: str) -> None:
+    # เปลี่ยนเฉพาะถ้ายังอยู่ที่ source => กันสอง process ย้าย user เดียวกันพร้อมกัน
+    with directory.engine.begin() as conn:
+        flipped = conn.execute(
+            update(_directory)
+            .where(_directory.c.user_id == user_id, _directory.c.shard == source)
+            .values(shard=target)
+        ).rowcount
+    directory.forget(user_id)
+    if not flipped:
+        raise RuntimeError(f"user {user_id} moved concurrently")
+
+
+def _delete_user(engine: Engine, user_id: int) -> None:
+    with engine.begin() as conn:
+        conn.execute(delete(_refresh).where(_refresh.c.user_id == user_id))
+        conn.execute(delete(_resets).where(_resets.c.user_id == user_id))
+        conn.execute(delete(_users).where(_users.c.id == user_id))
+
+
+def move_users(
+    directory: ShardDirectory,
+    shard_engines: dict[str, Engine],
+    user_ids: list[int],
+    target: str,
+    drain_seconds: float | None = None,
+    sleep: Callable[[float], None] = time.sleep,
+) -> list[MoveResult]:
+    """Move a batch of users; the cache drain (step 3) is waited once per batch."""
+    if target not in shard_engines:
+        raise ValueError(f"unknown shard {target!r}")
+
+    results = []
+    for user_id in user_ids:
+        directory.forget(user_id)
+        source = directory.shard_of(user_id)
+        result = MoveResult(user_id, source, target, moved=source is not None and source != target)
+        if result.moved:
+            _copy(shard_engines[source], shard_engines[target], user_id)  # 1)
+            _flip(directory, user_id, source, target)                     # 2)
+        results.append(result)
+
+    moved = [r for r in results if r.moved]
+    if not moved:
+        return results
+
+    sleep(directory.cache_seconds if drain_seconds is None else drain_seconds)  # 3)
+    for r in moved:
+        r.refresh_tokens, r.reset_tokens = _copy(shard_engines[r.source], shard_engines[target], r.user_id)  # 4)
+        _delete_user(shard_engines[r.source], r.user_id)  # 5)
+        logger.info(
+            "moved user %s %s -> %s (%d refresh, %d reset tokens)",
+            r.user_id, r.source, target, r.refresh_tokens, r.reset_tokens,
+        )
+    return results
+
+
+def move_user(directory, shard_engines, user_id: int, target: str, **kw) -> MoveResult:
+    return move_users(directory, shard_engines, [user_id], target, **kw)[0]
+
+
+def shard_counts(directory: ShardDirectory) -> dict[str, int]:
+    with directory.engine.connect() as conn:
+        rows = conn.execute(select(_directory.c.shard, func.count()).group_by(_directory.c.shard)).all()
+    return {shard: n for shard, n in rows}
+
+
+def _pick_users(directory: ShardDirectory, source: str, limit: int) -> list[int]:
+    with directory.engine.connect() as conn:
+        return list(
+            conn.execute(
+                select(_directory.c.user_id).where(_directory.c.shard == source).order_by(_directory.c.user_id).limit(limit)
+            ).scalars()
+        )
+
+
+def main() -> None:
+    from app.db.session import shard_directory, shard_engines
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    sub.add_parser("status")
+    p_move = sub.add_parser("move")
+    p_move.add_argument("--to", required=True)
+    p_move.add_argument("--user-id", type=int, action="append", required=True)
+    p_move.add_argument("--drain-seconds", type=float, default=None)
+    p_reb = sub.add_parser("rebalance")
+    p_reb.add_argument("--from", dest="source", required=True)
+    p_reb.add_argument("--to", required=True)
+    p_reb.add_argument("--limit", type=int, default=100)
+    p_reb.add_argument("--drain-seconds", type=float, default=None)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    if shard_directory is None:
+        parser.error("SHARD_URLS is not configured")
+
+    if args.cmd == "status":
+        for shard, n in sorted(shard_counts(shard_directory).items()):
+            print(f"{shard}\t{n}")
+        return
+
+    user_ids = args.user_id if args.cmd == "move" else _pick_users(shard_directory, args.source, args.limit)
+    for r in move_users(shard_directory, shard_engines, user_ids, args.to, drain_seconds=args.drain_seconds):
+        print(f"{r.user_id}\t{r.source} -> {r.target}\t{'moved' if r.moved else 'skipped'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,7 @@
+# benchmarks/__init__.py
+# micro-benchmarks: รันด้วย `python -m benchmarks.<module>` (ไม่ใช่ส่วนของ pytest suite)
+import os
+
+os.environ.setdefault("JWT_SECRET", "bench-secret-please-change-32-chars-minimum")
+os.environ.setdefault("ENV", "dev")
+os.environ.setdefault("DATABASE_URL", "sqlite+pysqlite:///./bench.db")
@@ -0,0 +1,143 @@
+"""
+Breached-password index: lookup latency and resident memory.
+
+Builds a synthetic index of random 8-byte SHA-1 prefixes (--entries, default
+5M = 40 MB), then measures warm lookups (hit / miss), cold lookups after the
+file's pages are dropped from the page cache (posix_fadvise DONTNEED), and
+the resident size of the mapping (/proc/self/smaps) after N random lookups.
+
+    python -m benchmarks.bench_breached
+    python -m benchmarks.bench_breached --entries 1000000000 --dir /data   # 8 GB
+"""
+import benchmarks  # noqa: F401  (env defaults)
+
+import argparse
+import hashlib
+import os
+import math
+import random
+import sys
+import tempfile
+import time
+from array import array
+
+from app.core.breached import FANOUT_SIZE, HEADER, MAGIC, BreachedPasswordIndex
+from benchmarks.harness import measure, print_results
+
+WIDTH = 8
+
+
+def _write_synthetic(path: str, entries: int, chunk: int = 1 << 22) -> list[bytes]:
+    # key แบบสุ่มเรียงลำดับ: สร้างทีละ bucket ของ 2 byte แรก (ไม่ต้อง sort ทั้งไฟล์ในหน่วยความจำ)
+    rng = random.Random(1)
+    per_bucket = [0] * FANOUT_SIZE
+    for _ in range(entries):
+        per_bucket[rng.getrandbits(16)] += 1
+    fanout = array("Q", bytes(FANOUT_SIZE * 8))
+    total = 0
+    for i, n in enumerate(per_bucket):
+        total += n
+        fanout[i] = total
+    if sys.byteorder == "big":
+        fanout.byteswap()
+
+    samples = []
+    with open(path, "wb") as f:
+        f.write(HEADER.pack(MAGIC, WIDTH, 0, entries))
+        f.write(fanout.tobytes())
+        buf = []
+        for bucket, n in enumerate(per_bucket):
+            prefix = bucket.to_bytes(2, "big")
+            tails = sorted({os.urandom(WIDTH - 2) for _ in range(n)})
+            while len(tails) < n:  # ชนกัน (แทบไม่เกิด) => เติมให้ครบ count
+                tails = sorted(set(tails) | {os.urandom(WIDTH - 2)})
+            keys = [prefix + t for t in tails]
+            if keys and len(samples) < 100_000:
+                samples.append(keys[len(keys) // 2])
+            buf.extend(keys)
+            if len(buf) >= chunk:
+                f.write(b"".join(buf))
+                buf = []
+        f.write(b"".join(buf))
+    return samples
+
+
+def _mapping_rss_kb(path: str) -> int:
+    real = os.path.realpath(path)
+    rss, inside = 0, False
+    with open("/proc/self/smaps") as f:
+        for line in f:
+            if "-" in line.split(" ", 1)[0]:
+                inside = line.rstrip().endswith(real)
+            elif inside and line.startswith("Rss:"):
+                rss += int(line.split()[1])
+    return rss
+
+
+def _drop_page_cache(path: str) -> None:
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_DONTNEED)
+    finally:
+        os.close(fd)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--entries", type=int, default=5_000_000)
+    parser.add_argument("--dir", default=None)
+    parser.add_argument("--lookups", type=int, default=20_000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(dir=args.dir) as tmp:
+        path = os.path.join(tmp, "breached.idx")
+        t0 = time.perf_counter()
+        samples = _write_synthetic(path, args.entries)
+        size_mb = os.path.getsize(path) / 1e6
+        print(f"index: {args.entries:,} entries, {size_mb:,.1f} MB, built in {time.perf_counter() - t0:.1f}s")
+
+        index = BreachedPasswordIndex(path)
+        hits = iter(samples * (1 + 200_000 // len(samples)))
+        misses = [hashlib.sha1(os.urandom(16)).digest() for _ in range(10_000)]
+        miss_iter = iter(misses * 50)
+
+        # ---- cold: page cache ว่าง (lookup แรกๆ หลัง deploy / ไฟล์ใหญ่กว่า RAM) ----
+        _drop_page_cache(path)
+        rng = random.Random(2)
+        cold = []
+        for _ in range(200):
+            key = os.urandom(WIDTH)
+            t = time.perf_counter()
+            index.contains_hash(key)
+            cold.append((time.perf_counter() - t) * 1e6)
+        cold.sort()
+        print(f"cold lookup: p50 {cold[len(cold) // 2]:.1f} us, p99 {cold[int(len(cold) * 0.99)]:.1f} us")
+
+        # ---- warm ----
+        print_results(
+            [
+                measure("hit (prefix)", lambda: index.contains_hash(next(hits)), number=20_000),
+                measure("miss (prefix)", lambda: index.contains_hash(next(miss_iter)), number=20_000),
+                measure("miss (sha1 + lookup)", lambda: "correct horse battery staple" in index, number=20_000),
+            ]
+        )
+
+        _drop_page_cache(path)
+        for _ in range(args.lookups):
+            index.contains_hash(rng.randbytes(WIDTH))
+        rss_kb = _mapping_rss_kb(path)
+        print(f"resident after {args.lookups:,} random lookups: {rss_kb / 1024:,.1f} MB of {size_mb:,.1f} MB mapped")
+        index.close()
+
+    # 1B entries: bucket ~15k records => ~14 probes; ที่เหลือคือขนาดไฟล์ที่ page cache ต้องรับ
+    per_bucket = 1_000_000_000 / FANOUT_SIZE
+    print(
+        f"1B entries (extrapolated): {1_000_000_000 * WIDTH / 1e9:.0f} GB file, "
+        f"~{math.ceil(math.log2(per_bucket))} probes per lookup "
+        f"(here ~{math.ceil(math.log2(max(args.entries / FANOUT_SIZE, 2)))}), "
+        f"resident grows with the distinct buckets touched, not the file size"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""
+Per-call Python overhead of the crud lookups: legacy `db.query(...).filter(...).first()`
+vs. the prebuilt 2.0 `select()` statements in app.crud, against in-memory SQLite.
+
+    python -m benchmarks.bench_crud
+"""
+import benchmarks  # noqa: F401  (env defaults)
+
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.db.base import Base
+from app.models.refresh_token import RefreshToken
+from app.models.user import User
+from app.crud import refresh_token as rt_crud
+from app.crud import user as user_crud
+from benchmarks.harness import measure, print_results
+
+N_USERS = 1000
+
+
+def setup():
+    engine = create_engine("sqlite+pysqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(engine)
+    Session = sessionmaker(bind=engine, autoflush=False)
+    with Session() as db:
+        exp = datetime.now(timezone.utc) + timedelta(days=1)
+        for i in range(N_USERS):
+            db.add(User(id=i + 1, email=f"user{i}@bench.test", password_hash="x"))
+            db.add(RefreshToken(user_id=i + 1, session_id=f"s{i}", token_hash=f"{i:064x}", expires_at=exp))
+        db.commit()
+    return Session
+
+
+def main():
+    Session = setup()
+    db = Session()
+    email = f"user{N_USERS // 2}@bench.test"
+    token_hash = f"{N_USERS // 2:064x}"
+    user_id = N_USERS // 2
+
+    def legacy_by_email():
+        db.query(User).filter(User.email == email).first()
+        db.expunge_all()
+
+    def new_by_email():
+        user_crud.get_user_by_email(db, email)
+        db.expunge_all()
+
+    def legacy_get_user():
+        db.query(User).filter(User.id == user_id).first()
+        db.expunge_all()
+
+    def new_get_user():
+        user_crud.get_user(db, user_id)
+        db.expunge_all()
+
+    def legacy_by_hash():
+        db.query(RefreshToken).filter(RefreshToken.token_hash == token_hash).first()
+        db.expunge_all()
+
+    def new_by_hash():
+        rt_crud.get_by_hash(db, token_hash)
+        db.expunge_all()
+
+    # expunge_all ทุก call: วัดแบบ request ใหม่ (identity map ว่าง) ให้ยุติธรรมกับทั้งสองแบบ
+    for pair in (
+        [measure("legacy get_user_by_email", legacy_by_email), measure("select get_user_by_email", new_by_email)],
+        [measure("legacy get_user", legacy_get_user), measure("db.get get_user", new_get_user)],
+        [measure("legacy get_by_hash", legacy_by_hash), measure("select get_by_hash", new_by_hash)],
+    ):
+        print_results(pair, baseline=pair[0].name)
+        print()
+
+    db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""
+/verify with the slotted Principal (column-only query) vs. the full ORM User.
+
+Measures per-call latency and allocated bytes (tracemalloc) for the lookup
+itself and for the whole /verify request through TestClient.
+
+    python -m benchmarks.bench_principal
+"""
+import benchmarks  # noqa: F401  (env defaults)
+
+import gc
+import os
+import tracemalloc
+
+# access log เขียน stdout ทุก request: กลบส่วนต่างระหว่างสองฝั่ง
+os.environ.setdefault("ACCESS_LOG_ENABLED", "false")
+
+from fastapi import Depends, HTTPException
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.api.deps import get_db
+from app.api.deps_auth import _access_token_claims, bearer_scheme, get_current_user
+from app.core.tokens import create_access_token
+from app.crud.user import get_principal, get_user
+from app.db.base import Base
+from app.main import app
+from app.models.user import User
+from benchmarks.harness import measure, print_results
+
+
+def _alloc_per_call(fn, n: int = 500) -> float:
+    fn()
+    gc.collect()
+    tracemalloc.start()
+    total = 0
+    for _ in range(n):
+        # peak ของ call นี้เทียบกับก่อน call (ไม่ใช่ก่อน loop: ขยะ cycle ที่ยังไม่โดน gc จะสะสมเข้ามา)
+        before = tracemalloc.get_traced_memory()[0]
+        tracemalloc.reset_peak()
+        fn()
+        total += tracemalloc.get_traced_memory()[1] - before
+    tracemalloc.stop()
+    return total / n
+
+
+def main():
+    engine = create_engine("sqlite+pysqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(engine)
+    Session = sessionmaker(bind=engine, autoflush=False)
+    with Session() as db:
+        db.add(User(id=1, email="bench@bench.test", password_hash="x"))
+        db.commit()
+
+    # ---- lookup only (session ใหม่ทุก call เหมือน request จริง) ----
+    def orm_lookup():
+        with Session() as db:
+            u = get_user(db, 1)
+            return u.id, u.email, u.is_active
+
+    def principal_lookup():
+        with Session() as db:
+            p = get_principal(db, 1)
+            return p.id, p.email, p.is_active
+
+    results = [measure("orm User lookup", orm_lookup), measure("Principal lookup", principal_lookup)]
+    print_results(results, baseline="orm User lookup")
+    print(f"  allocated/call: orm {_alloc_per_call(orm_lookup):,.0f} B, principal {_alloc_per_call(principal_lookup):,.0f} B")
+    print()
+
+    # ---- /verify end-to-end ----
+    def override_get_db():
+        db = Session()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    def legacy_get_current_user(creds=Depends(bearer_scheme), db=Depends(get_db)):
+        user_id, _ = _access_token_claims(creds)
+        user = get_user(db, user_id)
+        if not user or not user.is_active:
+            raise HTTPException(status_code=401, detail="User not found/inactive")
+        return user
+
+    app.dependency_overrides[get_db] = override_get_db
+    headers = {"Authorization": f"Bearer {create_access_token('1')}"}
+    with TestClient(app) as client:
+        def verify():
+            r = client.get("/api/v1/auth/verify", headers=headers)
+            assert r.status_code == 200
+
+        principal_res = measure("/verify Principal", verify, number=300, repeat=3)
+        principal_alloc = _alloc_per_call(verify, n=100)
+
+        app.dependency_overrides[get_current_user] = legacy_get_current_user
+        orm_res = measure("/verify ORM User", verify, number=300, repeat=3)
+        orm_alloc = _alloc_per_call(verify, n=100)
+
+    app.dependency_overrides.clear()
+    print_results([orm_res, principal_res], baseline="/verify ORM User")
+    print(f"  allocated/request: orm {orm_alloc:,.0f} B, principal {principal_alloc:,.0f} B")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,47 @@
+"""
+Access-token encode/decode: python-jose vs. the precomputed HS256 codec.
+
+    python -m benchmarks.bench_tokens
+"""
+import benchmarks  # noqa: F401  (env defaults)
+
+import secrets
+import time
+
+from app.core.config import settings
+from app.core.jwt_codec import HS256Codec, JoseCodec
+from benchmarks.harness import measure, print_results
+
+
+def _payload() -> dict:
+    now = int(time.time())
+    return {
+        "sub": "12345",
+        "type": "access",
+        "iat": now,
+        "jti": secrets.token_hex(16),
+        "exp": now + 900,
+        "sid": secrets.token_urlsafe(16),
+    }
+
+
+def main():
+    jose = JoseCodec(settings.JWT_SECRET)
+    fast = HS256Codec(settings.JWT_SECRET)
+    payload = _payload()
+    token = jose.encode(payload)
+    assert fast.encode(payload) == token
+
+    print_results(
+        [measure("jose encode", lambda: jose.encode(payload)), measure("hs256 encode", lambda: fast.encode(payload))],
+        baseline="jose encode",
+    )
+    print()
+    print_results(
+        [measure("jose decode", lambda: jose.decode(token)), measure("hs256 decode", lambda: fast.decode(token))],
+        baseline="jose decode",
+    )
+
+
+if __name__ == "__main__":
+    main()
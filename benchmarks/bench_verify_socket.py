@@ -0,0 +1,93 @@
+"""
+/verify over HTTP (uvicorn, keep-alive) vs. the Unix-domain-socket sidecar,
+one request at a time and pipelined. Both run in the same uvicorn process
+against the same SQLite file, so the difference is transport + framework.
+
+    python -m benchmarks.bench_verify_socket
+"""
+import os
+import tempfile
+
+_tmp = tempfile.mkdtemp(prefix="bench-verify-")
+os.environ.setdefault("VERIFY_SOCKET_PATH", os.path.join(_tmp, "verify.sock"))
+os.environ.setdefault("DATABASE_URL", f"sqlite+pysqlite:///{_tmp}/bench.db")
+os.environ.setdefault("SESSION_TELEMETRY_FLUSH_SECONDS", "3600")
+
+import benchmarks  # noqa: E402,F401  (env defaults)
+
+import http.client  # noqa: E402
+import socket  # noqa: E402
+import threading  # noqa: E402
+import time  # noqa: E402
+
+import uvicorn  # noqa: E402
+
+from app.api.verify_socket import OK, VerifyClient  # noqa: E402
+from app.core.config import settings  # noqa: E402
+from app.core.tokens import create_access_token  # noqa: E402
+from app.db.base import Base  # noqa: E402
+from app.db.session import SessionLocal, engine  # noqa: E402
+from app.main import app  # noqa: E402
+from app.models.user import User  # noqa: E402
+from benchmarks.harness import measure, print_results  # noqa: E402
+
+PIPELINE = 32
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def main():
+    Base.metadata.create_all(engine)
+    with SessionLocal() as db:
+        db.add(User(id=1, email="bench@bench.test", password_hash="x"))
+        db.commit()
+    token = create_access_token("1", "bench-session")
+
+    port = _free_port()
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.05)
+
+    try:
+        conn = http.client.HTTPConnection("127.0.0.1", port)
+        headers = {"Authorization": f"Bearer {token}"}
+
+        def http_verify():
+            conn.request("GET", "/api/v1/auth/verify", headers=headers)
+            r = conn.getresponse()
+            r.read()
+            assert r.status == 200
+
+        client = VerifyClient(settings.VERIFY_SOCKET_PATH)
+
+        def socket_verify():
+            assert client.verify(token).status == OK
+
+        batch = [token] * PIPELINE
+
+        def socket_pipelined():
+            for r in client.verify_many(batch):
+                assert r.status == OK
+
+        http_res = measure("http /verify", http_verify, number=500, repeat=3)
+        sock_res = measure("uds verify", socket_verify, number=2000, repeat=3)
+        pipe = measure(f"uds verify x{PIPELINE} pipelined", socket_pipelined, number=100, repeat=3)
+        # ต่อ token: หารด้วยขนาด batch
+        pipe.name = f"uds pipelined (per token, x{PIPELINE})"
+        pipe.per_call_us /= PIPELINE
+        pipe.ops_per_sec *= PIPELINE
+        print_results([http_res, sock_res, pipe], baseline="http /verify")
+        client.close()
+    finally:
+        server.should_exit = True
+        thread.join(10)
+
+
+if __name__ == "__main__":
+    main()
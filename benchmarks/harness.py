@@ -0,0 +1,36 @@
+import time
+from dataclasses import dataclass
+from typing import Callable
+
+
+@dataclass
+class Result:
+    name: str
+    per_call_us: float  # best of `repeat` runs
+    ops_per_sec: float
+    number: int
+
+
+def measure(name: str, fn: Callable[[], object], number: int = 2000, repeat: int = 5, warmup: int = 100) -> Result:
+    for _ in range(warmup):
+        fn()
+
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        for _ in range(number):
+            fn()
+        best = min(best, time.perf_counter() - t0)
+
+    per_call = best / number
+    return Result(name=name, per_call_us=per_call * 1e6, ops_per_sec=1 / per_call, number=number)
+
+
+def print_results(results: list[Result], baseline: str | None = None) -> None:
+    base = next((r for r in results if r.name == baseline), None)
+    width = max(len(r.name) for r in results)
+    for r in results:
+        line = f"{r.name:<{width}}  {r.per_call_us:10.2f} us/call  {r.ops_per_sec:12,.0f} ops/s"
+        if base is not None and r is not base:
+            line += f"  ({base.per_call_us / r.per_call_us:.2f}x vs {base.name})"
+        print(line)
@@ -0,0 +1,510 @@
+"""
+Micro-benchmark suite for the auth primitives, with a stored baseline and
+regression thresholds.
+
+Every benchmark is registered with @bench. The decorated function does the
+setup and returns the zero-argument callable that gets timed (best of
+`repeat` runs of `number` calls, see harness.measure).
+
+    python -m benchmarks.suite                          # run all, compare with benchmarks/baseline.json
+    python -m benchmarks.suite -k tokens -k crud.get    # substring filters
+    python -m benchmarks.suite --save results.json      # keep the results (CI artifact)
+    python -m benchmarks.suite --update-baseline        # accept the current numbers
+    python -m benchmarks.suite --quick                  # 1 call each: smoke test only, no compare
+
+Exit status 1 if any benchmark is slower than its baseline by more than its
+threshold: --threshold (default 25%) or the per-benchmark value. Each run also
+times a fixed pure-Python calibration loop. Ratios are divided by the
+calibration ratio, so a slower or busier machine does not show up as a
+regression (--no-normalize turns this off). Still, regenerate the baseline
+per CI runner class; the meta block records where it came from.
+"""
+import benchmarks  # noqa: F401  (env defaults)
+
+import argparse
+import fnmatch
+import hashlib
+import json
+import os
+import platform
+import subprocess
+import sys
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Callable
+
+from benchmarks.harness import Result, measure
+
+BASELINE_PATH = os.path.join(os.path.dirname(__file__), "baseline.json")
+DEFAULT_THRESHOLD = 0.25
+
+
+@dataclass
+class Bench:
+    name: str
+    setup: Callable[[], Callable[[], object]]
+    number: int
+    repeat: int
+    threshold: float | None
+
+
+BENCHMARKS: dict[str, Bench] = {}
+
+
+def bench(name: str, number: int = 2000, repeat: int = 5, threshold: float | None = None):
+    def register(setup):
+        if name in BENCHMARKS:
+            raise ValueError(f"duplicate benchmark {name}")
+        BENCHMARKS[name] = Bench(name, setup, number, repeat, threshold)
+        return setup
+
+    return register
+
+
+# -----------------------------
+# security (bcrypt): ช้าโดยตั้งใจ => จำนวนรอบน้อย, threshold กว้างกว่า
+# -----------------------------
+@bench("security.hash_password", number=3, repeat=3, threshold=0.5)
+def _hash_password():
+    from app.core.security import hash_password
+    return lambda: hash_password("correct horse battery staple")
+
+
+@bench("security.verify_password", number=3, repeat=3, threshold=0.5)
+def _verify_password():
+    from app.core.security import hash_password, verify_password
+    h = hash_password("correct horse battery staple")
+    return lambda: verify_password("correct horse battery staple", h)
+
+
+# -----------------------------
+# tokens
+# -----------------------------
+@bench("tokens.create_access_token")
+def _create_access_token():
+    from app.core.tokens import create_access_token
+    return lambda: create_access_token("12345", "session-abc")
+
+
+@bench("tokens.create_refresh_token")
+def _create_refresh_token():
+    from app.core.tokens import create_refresh_token
+    return lambda: create_refresh_token("12345")
+
+
+@bench("tokens.decode_token")
+def _decode_token():
+    from app.core.tokens import create_access_token, decode_token
+    token = create_access_token("12345", "session-abc")
+    return lambda: decode_token(token)
+
+
+@bench("auth._sha256", number=20000)
+def _sha256():
+    from app.api.v1.endpoints.auth import _sha256
+    from app.core.tokens import create_refresh_token
+    token, _ = create_refresh_token("12345")
+    return lambda: _sha256(token)
+
+
+# -----------------------------
+# access log: งานที่เกิดบน event loop ต่อ request (สร้าง dict + put_nowait; JSON อยู่ใน listener thread)
+# -----------------------------
+@bench("access_log.request", number=20000)
+def _access_log_request():
+    from app.core.access_log import AccessLog
+    log = AccessLog(max_queue=0)
+    scope = {"type": "http", "method": "GET", "path": "/api/v1/auth/verify", "client": ("10.0.0.1", 1),
+             "state": {"user_id": 1, "session_id": "s1"}}
+    pending = log.queue.queue
+
+    def run():
+        log.request(scope, 200, 1.5)
+        pending.clear()  # ไม่มี listener: ทิ้งเองไม่ให้คิวโต
+
+    return run
+
+
+# -----------------------------
+# schemas (pydantic): EmailStr เรียก email-validator ทุกครั้ง
+# -----------------------------
+@bench("schemas.LoginRequest.validate")
+def _login_request():
+    from app.schemas.auth import LoginRequest
+    data = {"email": "someone@example.com", "password": "abcd1234", "device_id": "laptop"}
+    return lambda: LoginRequest.model_validate(data)
+
+
+@bench("schemas.LoginRequest.validate_json")
+def _login_request_json():
+    from app.schemas.auth import LoginRequest
+    raw = json.dumps({"email": "someone@example.com", "password": "abcd1234", "device_id": "laptop"})
+    return lambda: LoginRequest.model_validate_json(raw)
+
+
+@bench("schemas.RegisterRequest.validate")
+def _register_request():
+    from app.schemas.auth import RegisterRequest
+    data = {"email": "someone@example.com", "password": "abcd1234"}
+    return lambda: RegisterRequest.model_validate(data)
+
+
+@bench("schemas.UserOut.from_orm.dump_json")
+def _user_out_orm():
+    from app.models.user import User
+    from app.schemas.user import UserOut
+    user = User(id=1, email="someone@example.com", password_hash="x", is_active=True, created_at=datetime.now(timezone.utc))
+    return lambda: UserOut.model_validate(user).model_dump_json()
+
+
+@bench("schemas.UserOut.from_dict.dump_json")
+def _user_out_dict():
+    from app.schemas.user import UserOut
+    profile = {"id": 1, "email": "someone@example.com", "is_active": True, "created_at": datetime.now(timezone.utc)}
+    return lambda: UserOut.model_validate(profile).model_dump_json()
+
+
+# -----------------------------
+# crud against in-memory SQLite (session ใหม่ต่อ call เหมือน request จริง;
+# write ต้อง rollback ทุกครั้ง => เวลารวม rollback)
+# -----------------------------
+N_USERS = 1000
+_db_state: dict = {}
+
+
+def _sessionmaker():
+    if "Session" not in _db_state:
+        from sqlalchemy import create_engine
+        from sqlalchemy.orm import sessionmaker
+        from sqlalchemy.pool import StaticPool
+
+        from app.db.base import Base
+        from app.models.password_reset_token import PasswordResetToken
+        from app.models.refresh_token import RefreshToken
+        from app.models.user import User
+
+        engine = create_engine("sqlite+pysqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+        Base.metadata.create_all(engine)
+        Session = sessionmaker(bind=engine, autoflush=False)
+        exp = datetime.now(timezone.utc) + timedelta(days=1)
+        with Session() as db:
+            for i in range(1, N_USERS + 1):
+                db.add(User(id=i, email=f"user{i}@bench.test", password_hash="x"))
+                db.add(RefreshToken(user_id=i, session_id=f"s{i}", token_hash=f"{i:064x}", expires_at=exp,
+                                    last_used_at=datetime.now(timezone.utc)))
+                db.add(PasswordResetToken(user_id=i, token_hash=f"r{i:063x}", expires_at=exp))
+            db.commit()
+        _db_state["Session"] = Session
+    return _db_state["Session"]
+
+
+def _read(fn):
+    Session = _sessionmaker()
+
+    def run():
+        with Session() as db:
+            return fn(db)
+
+    return run
+
+
+def _write(fn):
+    Session = _sessionmaker()
+
+    def run():
+        with Session() as db:
+            fn(db)
+            db.flush()
+            db.rollback()
+
+    return run
+
+
+@bench("crud.get_user_by_email", number=1000)
+def _get_user_by_email():
+    from app.crud.user import get_user_by_email
+    return _read(lambda db: get_user_by_email(db, "user500@bench.test"))
+
+
+@bench("crud.get_user", number=1000)
+def _get_user():
+    from app.crud.user import get_user
+    return _read(lambda db: get_user(db, 500))
+
+
+@bench("crud.get_principal", number=1000)
+def _get_principal():
+    from app.crud.user import get_principal
+    return _read(lambda db: get_principal(db, 500, "s500"))
+
+
+@bench("crud.get_user_profile", number=1000)
+def _get_user_profile():
+    from app.crud.user import get_user_profile
+    return _read(lambda db: get_user_profile(db, 500))
+
+
+@bench("crud.list_users", number=200)
+def _list_users():
+    from app.crud.user import list_users
+    return _read(lambda db: list_users(db, order="created_at", email_prefix="user5", limit=100))
+
+
+@bench("crud.create_user", number=500)
+def _create_user():
+    from app.crud.user import create_user
+    return _write(lambda db: create_user(db, "new@bench.test", "x"))
+
+
+@bench("crud.refresh_token.create", number=500)
+def _create_refresh():
+    from app.crud.refresh_token import create_refresh_token
+    exp = datetime.now(timezone.utc) + timedelta(days=1)
+    return _write(lambda db: create_refresh_token(db, 500, "new-session", "f" * 64, exp, user_agent="bench", ip="127.0.0.1"))
+
+
+@bench("crud.refresh_token.rotate_session", number=500)
+def _rotate_session():
+    from app.crud.refresh_token import rotate_session
+    exp = datetime.now(timezone.utc) + timedelta(days=1)
+    return _write(lambda db: rotate_session(db, 500, "s500", "e" * 64, exp, user_agent="bench", ip="127.0.0.1"))
+
+
+@bench("crud.refresh_token.evict_lru_sessions", number=500)
+def _evict_lru():
+    from app.crud.refresh_token import evict_lru_sessions
+    return _write(lambda db: evict_lru_sessions(db, 500, 20))
+
+
+@bench("crud.refresh_token.get_by_hash", number=1000)
+def _get_refresh_by_hash():
+    from app.crud.refresh_token import get_by_hash
+    return _read(lambda db: get_by_hash(db, f"{500:064x}", user_id=500))
+
+
+@bench("crud.refresh_token.revoke", number=500)
+def _revoke():
+    from app.crud.refresh_token import get_by_hash, revoke
+    return _write(lambda db: revoke(db, get_by_hash(db, f"{500:064x}")))
+
+
+@bench("crud.refresh_token.revoke_all_for_user", number=500)
+def _revoke_all():
+    from app.crud.refresh_token import revoke_all_for_user
+    return _write(lambda db: revoke_all_for_user(db, 500))
+
+
+@bench("crud.refresh_token.revoke_all_for_users", number=100)
+def _revoke_all_many():
+    from app.crud.refresh_token import revoke_all_for_users
+    return _write(lambda db: revoke_all_for_users(db, list(range(1, 1001))))
+
+
+@bench("crud.set_active_many", number=100)
+def _set_active_many():
+    from app.crud.user import set_active_many
+    return _write(lambda db: set_active_many(db, list(range(1, 1001)), False))
+
+
+@bench("crud.password_reset.create", number=500)
+def _create_reset():
+    from app.crud.password_reset_token import create_reset_token
+    exp = datetime.now(timezone.utc) + timedelta(minutes=15)
+    return _write(lambda db: create_reset_token(db, 500, "n" * 64, exp))
+
+
+@bench("crud.password_reset.get_by_hash", number=1000)
+def _get_reset_by_hash():
+    from app.crud.password_reset_token import get_by_hash
+    return _read(lambda db: get_by_hash(db, f"r{500:063x}"))
+
+
+@bench("crud.password_reset.mark_used", number=500)
+def _mark_used():
+    from app.crud.password_reset_token import get_by_hash, mark_used
+    return _write(lambda db: mark_used(db, get_by_hash(db, f"r{500:063x}")))
+
+
+@bench("crud.revocation_event.record", number=500)
+def _record_revocation():
+    from app.crud.revocation_event import record_revocation
+    return _write(lambda db: record_revocation(db, 500, "logout_all"))
+
+
+@bench("crud.revocation_event.list_after", number=1000)
+def _list_revocations():
+    from app.crud.revocation_event import list_after
+    return _read(lambda db: list_after(db, 0, limit=100))
+
+
+@bench("crud.audit_event.list_events", number=1000)
+def _list_audit_events():
+    from app.crud.audit_event import list_events
+    return _read(lambda db: list_events(db, user_id=500, limit=100))
+
+
+# -----------------------------
+# run / compare
+# -----------------------------
+def select_benches(patterns: list[str] | None) -> list[Bench]:
+    if not patterns:
+        return list(BENCHMARKS.values())
+    return [b for b in BENCHMARKS.values() if any(p in b.name or fnmatch.fnmatch(b.name, p) for p in patterns)]
+
+
+def run(benches: list[Bench], quick: bool = False) -> dict[str, Result]:
+    results = {}
+    for b in benches:
+        fn = b.setup()
+        if quick:
+            results[b.name] = measure(b.name, fn, number=1, repeat=1, warmup=0)
+        else:
+            results[b.name] = measure(b.name, fn, number=b.number, repeat=b.repeat, warmup=min(100, b.number))
+    return results
+
+
+def _calibration_fn():
+    # งาน CPU ล้วน ขนาดคงที่: วัดความเร็วเครื่อง ณ ตอนรัน
+    data = [str(i) for i in range(200)]
+
+    def work():
+        d = {}
+        for s in data:
+            d[s] = hashlib.sha256(s.encode()).digest()
+        return sorted(d)
+
+    return work
+
+
+def calibrate() -> float:
+    return measure("calibration", _calibration_fn(), number=200, repeat=5, warmup=20).per_call_us
+
+
+def _git_sha() -> str | None:
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, timeout=5)
+        return out.stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def _meta() -> dict:
+    import pydantic
+    import sqlalchemy
+
+    return {
+        "created_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "git": _git_sha(),
+        "python": platform.python_version(),
+        "machine": f"{platform.system()} {platform.machine()} {platform.processor() or ''}".strip(),
+        "cpus": os.cpu_count(),
+        "sqlalchemy": sqlalchemy.__version__,
+        "pydantic": pydantic.__version__,
+    }
+
+
+def to_json(results: dict[str, Result], calibration_us: float | None = None) -> dict:
+    return {
+        "meta": {**_meta(), "calibration_us": round(calibration_us, 3) if calibration_us else None},
+        "results": {name: {"per_call_us": round(r.per_call_us, 3), "number": r.number} for name, r in results.items()},
+    }
+
+
+def compare(current: dict, baseline: dict, threshold: float = DEFAULT_THRESHOLD, normalize: bool = True) -> list[dict]:
+    """One row per benchmark; status = regression | improved | ok | new."""
+    base = baseline.get("results", {})
+    scale = 1.0
+    cur_cal = current.get("meta", {}).get("calibration_us")
+    base_cal = baseline.get("meta", {}).get("calibration_us")
+    if normalize and cur_cal and base_cal:
+        scale = base_cal / cur_cal  # เครื่องช้าลง 20% => หารเวลาออก 20%
+    rows = []
+    for name, cur in current["results"].items():
+        bench_threshold = BENCHMARKS[name].threshold if name in BENCHMARKS and BENCHMARKS[name].threshold else threshold
+        row = {"name": name, "current_us": cur["per_call_us"], "baseline_us": None, "ratio": None,
+               "threshold": bench_threshold, "status": "new"}
+        if name in base:
+            ratio = cur["per_call_us"] * scale / base[name]["per_call_us"]
+            row.update(baseline_us=base[name]["per_call_us"], ratio=round(ratio, 3))
+            if ratio > 1 + bench_threshold:
+                row["status"] = "regression"
+            elif ratio < 1 / (1 + bench_threshold):
+                row["status"] = "improved"
+            else:
+                row["status"] = "ok"
+        rows.append(row)
+    return rows
+
+
+def print_comparison(rows: list[dict]) -> None:
+    width = max(len(r["name"]) for r in rows)
+    for r in rows:
+        line = f"{r['name']:<{width}}  {r['current_us']:12.2f} us"
+        if r["baseline_us"] is not None:
+            line += f"  base {r['baseline_us']:12.2f} us  {r['ratio']:5.2f}x  (+{r['threshold']:.0%} allowed)"
+        print(f"{line}  {r['status'].upper() if r['status'] == 'regression' else r['status']}")
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("-k", dest="patterns", action="append", help="run benchmarks whose name contains / matches this")
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD, help="allowed slowdown (0.25 = 25%%)")
+    parser.add_argument("--save", help="write results JSON here")
+    parser.add_argument("--update-baseline", action="store_true", help="merge the results into the baseline file")
+    parser.add_argument("--quick", action="store_true", help="one call per benchmark (smoke test, no compare)")
+    parser.add_argument("--no-normalize", action="store_true", help="compare raw times (no calibration scaling)")
+    parser.add_argument("--list", action="store_true")
+    args = parser.parse_args(argv)
+
+    benches = select_benches(args.patterns)
+    if args.list:
+        for b in benches:
+            print(b.name)
+        return 0
+    if not benches:
+        print("no benchmarks match", file=sys.stderr)
+        return 2
+
+    calibration = None if args.quick else calibrate()
+    results = run(benches, quick=args.quick)
+    if calibration is not None:
+        # วัดซ้ำหลังรัน: ใช้ค่าที่เร็วกว่า (best-of เหมือน measure)
+        calibration = min(calibration, calibrate())
+    current = to_json(results, calibration)
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump(current, f, indent=2, sort_keys=True)
+
+    if args.quick:
+        print(f"{len(benches)} benchmarks ran once (quick mode, no compare)")
+        return 0
+
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        if baseline.get("meta", {}).get("machine") != current["meta"]["machine"]:
+            print(f"warning: baseline was recorded on {baseline.get('meta', {}).get('machine')!r}", file=sys.stderr)
+
+    rows = compare(current, baseline, args.threshold, normalize=not args.no_normalize)
+    print_comparison(rows)
+
+    if args.update_baseline:
+        # merge: -k รันบางตัว ไม่ลบตัวอื่นออกจาก baseline
+        merged = {"meta": current["meta"], "results": {**baseline.get("results", {}), **current["results"]}}
+        with open(args.baseline, "w") as f:
+            json.dump(merged, f, indent=2, sort_keys=True)
+            f.write("\n")
+        print(f"baseline updated: {args.baseline}")
+        return 0
+
+    regressions = [r for r in rows if r["status"] == "regression"]
+    if regressions:
+        print(f"\n{len(regressions)} regression(s): {', '.join(r['name'] for r in regressions)}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,4 +1,13 @@
 # tests/conftest.py
+import os
+
+# background writers (audit/telemetry) flush ตอน test สั่งหรือตอน shutdown เท่านั้น:
+# SQLite StaticPool ใช้ connection เดียวร่วมกันทุก thread
+os.environ.setdefault("AUDIT_FLUSH_SECONDS", "3600")
+os.environ.setdefault("SESSION_TELEMETRY_FLUSH_SECONDS", "3600")
+# เปิด CORSMiddleware ใน stack จริง (ALLOWED_ORIGINS ว่าง = ไม่ถูกเพิ่ม)
+os.environ.setdefault("ALLOWED_ORIGINS", "http://app.test")
+
 import pytest
 from fastapi.testclient import TestClient
 
@@ -7,7 +16,10 @@ from sqlalchemy.orm import sessionmaker
 from sqlalchemy.pool import StaticPool
 
 from app.main import app as fastapi_app              # ✅ ต้องเป็น FastAPI instance
-from app.api.deps import get_db
+from app.api.deps import close_read_db, get_db
+from app.core.telemetry import session_telemetry
+from app.core.audit import audit_log
+from app.core.revocation import revocation_feed
 
 from app.db.base import Base                         # Base = declarative_base()
 import app.models                                    # ✅ ให้มัน import models ทั้งหมดเพื่อให้ metadata รู้จัก table
@@ -51,11 +63,17 @@ def db(SessionLocal):
 
 
 @pytest.fixture()
-def client(db):
+def client(db, SessionLocal):
     def override_get_db():
-        yield db
+        try:
+            yield db
+        finally:
+            close_read_db(db)
 
     fastapi_app.dependency_overrides[get_db] = override_get_db
+    session_telemetry.session_factory = SessionLocal  # background flush ไปที่ test DB
+    audit_log.sink.session_factory = SessionLocal
+    revocation_feed.session_factory = SessionLocal
     with TestClient(fastapi_app) as c:
         yield c
     fastapi_app.dependency_overrides.clear()
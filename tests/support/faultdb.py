@@ -0,0 +1,226 @@
+"""
+Fault-injecting DBAPI wrapper for capacity tests.
+
+Wraps every DBAPI connection an engine opens (via `creator=`), so SQLAlchemy's
+pool, pre-ping and disconnect handling run unchanged on top of it:
+
+- latency_ms / jitter_ms: sleep before every statement (network round trip)
+- commit_latency_ms:      extra sleep on COMMIT (fsync / replication ack)
+- connect_latency_ms:     sleep when the pool opens a new connection
+- drop_rate:              chance that a statement finds the connection dropped
+- commit_drop_rate:       chance that COMMIT finds the connection dropped
+                          (the statements before it went through)
+- idle_timeout_ms:        server closes connections idle longer than this
+                          (MySQL wait_timeout, a NAT / load balancer idle cut)
+
+A dropped connection is really closed, so the driver raises its own "closed
+connection" error and the dialect's is_disconnect() treats it like a server
+that went away (pool invalidation, pre-ping reconnect).
+
+    faults = FaultInjector(FaultConfig(latency_ms=2, jitter_ms=1))
+    engine = faults.create_sqlite_engine(path, pool_size=5, max_overflow=0)
+"""
+import random
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from typing import Callable
+
+from sqlalchemy import create_engine
+from sqlalchemy.engine import Engine
+
+
+@dataclass
+class FaultConfig:
+    latency_ms: float = 0.0
+    jitter_ms: float = 0.0
+    commit_latency_ms: float = 0.0
+    connect_latency_ms: float = 0.0
+    drop_rate: float = 0.0
+    commit_drop_rate: float = 0.0
+    idle_timeout_ms: float = 0.0
+    seed: int | None = None
+
+
+class FaultInjector:
+    def __init__(self, config: FaultConfig | None = None):
+        self.config = config or FaultConfig()
+        self._rng = random.Random(self.config.seed)
+        self._lock = threading.Lock()
+        self._live: set["FaultyConnection"] = set()
+
+        self.connects = 0
+        self.statements = 0
+        self.commits = 0
+        self.drops = 0
+
+    # ---------- fault decisions ----------
+    def _sleep(self, ms: float) -> None:
+        if ms > 0:
+            time.sleep(ms / 1000)
+
+    def statement_delay(self) -> None:
+        cfg = self.config
+        with self._lock:
+            self.statements += 1
+            jitter = self._rng.uniform(0, cfg.jitter_ms) if cfg.jitter_ms else 0.0
+        self._sleep(cfg.latency_ms + jitter)
+
+    def commit_delay(self) -> None:
+        with self._lock:
+            self.commits += 1
+        self._sleep(self.config.commit_latency_ms)
+
+    def should_drop(self, idle_ms: float) -> bool:
+        cfg = self.config
+        if cfg.drop_rate <= 0 and cfg.idle_timeout_ms <= 0:
+            return False
+        with self._lock:
+            drop = (cfg.idle_timeout_ms > 0 and idle_ms > cfg.idle_timeout_ms) or (
+                cfg.drop_rate > 0 and self._rng.random() < cfg.drop_rate
+            )
+            if drop:
+                self.drops += 1
+        return drop
+
+    def should_drop_commit(self) -> bool:
+        if self.config.commit_drop_rate <= 0:
+            return False
+        with self._lock:
+            drop = self._rng.random() < self.config.commit_drop_rate
+            if drop:
+                self.drops += 1
+        return drop
+
+    def drop_all(self) -> int:
+        """Close every live connection (e.g. a primary failover)."""
+        with self._lock:
+            live = list(self._live)
+            self.drops += len(live)
+        for conn in live:
+            conn.drop()
+        return len(live)
+
+    # ---------- wiring ----------
+    def wrap(self, dbapi_conn) -> "FaultyConnection":
+        with self._lock:
+            self.connects += 1
+        self._sleep(self.config.connect_latency_ms)
+        conn = FaultyConnection(dbapi_conn, self)
+        with self._lock:
+            self._live.add(conn)
+        return conn
+
+    def _forget(self, conn: "FaultyConnection") -> None:
+        with self._lock:
+            self._live.discard(conn)
+
+    def creator(self, connect: Callable[[], object]) -> Callable[[], "FaultyConnection"]:
+        return lambda: self.wrap(connect())
+
+    def create_engine(self, url: str, connect: Callable[[], object], **kw) -> Engine:
+        # url เลือก dialect อย่างเดียว, connection จริงมาจาก connect()
+        return create_engine(url, creator=self.creator(connect), **kw)
+
+    def create_sqlite_engine(self, path: str, **kw) -> Engine:
+        return self.create_engine(
+            f"sqlite+pysqlite:///{path}",
+            lambda: sqlite3.connect(path, check_same_thread=False),
+            **kw,
+        )
+
+    def metrics(self) -> dict:
+        with self._lock:
+            return {
+                "connects": self.connects,
+                "statements": self.statements,
+                "commits": self.commits,
+                "drops": self.drops,
+                "live": len(self._live),
+            }
+
+
+class FaultyConnection:
+    """DBAPI connection proxy; anything not overridden goes to the real connection."""
+
+    def __init__(self, conn, faults: FaultInjector):
+        object.__setattr__(self, "_conn", conn)
+        object.__setattr__(self, "_faults", faults)
+        self._touch()
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+    def __setattr__(self, name, value):
+        setattr(self._conn, name, value)
+
+    def drop(self) -> None:
+        try:
+            self._conn.close()
+        except Exception:
+            pass
+        self._faults._forget(self)
+
+    def _maybe_drop(self) -> None:
+        now = time.monotonic()
+        if self._faults.should_drop((now - self._last_used) * 1000):
+            self.drop()
+        self._touch()
+
+    def _touch(self) -> None:
+        # idle นับจากตอนที่ statement ล่าสุดทำเสร็จ
+        object.__setattr__(self, "_last_used", time.monotonic())
+
+    def cursor(self, *args, **kwargs):
+        return FaultyCursor(self._conn.cursor(*args, **kwargs), self)
+
+    def commit(self):
+        self._faults.commit_delay()
+        self._maybe_drop()
+        if self._faults.should_drop_commit():
+            self.drop()
+        try:
+            return self._conn.commit()
+        finally:
+            self._touch()
+
+    def rollback(self):
+        return self._conn.rollback()
+
+    def close(self):
+        self._faults._forget(self)
+        return self._conn.close()
+
+
+class FaultyCursor:
+    def __init__(self, cursor, conn: FaultyConnection):
+        object.__setattr__(self, "_cursor", cursor)
+        object.__setattr__(self, "_conn", conn)
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+    def __setattr__(self, name, value):
+        setattr(self._cursor, name, value)
+
+    def __iter__(self):
+        return iter(self._cursor)
+
+    def _before(self) -> None:
+        self._conn._faults.statement_delay()
+        self._conn._maybe_drop()
+
+    def execute(self, *args, **kwargs):
+        self._before()
+        try:
+            return self._cursor.execute(*args, **kwargs)
+        finally:
+            self._conn._touch()
+
+    def executemany(self, *args, **kwargs):
+        self._before()
+        try:
+            return self._cursor.executemany(*args, **kwargs)
+        finally:
+            self._conn._touch()
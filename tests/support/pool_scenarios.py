@@ -0,0 +1,216 @@
+"""
+Pool behaviour under injected network latency / connection drops.
+
+Each scenario runs `threads` workers against a file-backed SQLite engine
+wrapped by FaultInjector. A request checks out a connection, runs a
+login-shaped transaction (SELECT, optional INSERT, COMMIT) and optionally
+holds the connection for `work_ms` (app work inside the transaction), then
+sleeps `think_ms` before the next request.
+
+Writes are off by default: SQLite has a single writer lock, which would
+measure SQLite rather than the pool.
+
+    python -m tests.support.pool_scenarios
+    python -m tests.support.pool_scenarios --threads 64 --requests 100 --latency-ms 5
+"""
+import argparse
+import os
+import statistics
+import tempfile
+import threading
+import time
+from dataclasses import dataclass, field
+
+from sqlalchemy import text
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.exc import TimeoutError as PoolTimeout
+
+from tests.support.faultdb import FaultConfig, FaultInjector
+
+
+@dataclass
+class Scenario:
+    name: str
+    pool_size: int = 5
+    max_overflow: int = 10
+    pool_timeout: float = 1.0
+    pre_ping: bool = False
+    recycle: float = -1
+    faults: FaultConfig = field(default_factory=FaultConfig)
+    threads: int = 16
+    requests: int = 20
+    work_ms: float = 0.0
+    writes: bool = False
+    think_ms: float = 0.0
+
+
+@dataclass
+class ScenarioResult:
+    name: str
+    ok: int
+    pool_timeouts: int
+    disconnects: int
+    other_errors: int
+    seconds: float
+    latency_ms: list[float]
+    wait_ms: list[float]
+    faults: dict
+
+    @property
+    def throughput(self) -> float:
+        return self.ok / self.seconds if self.seconds else 0.0
+
+    def pct(self, values: list[float], q: float) -> float:
+        if not values:
+            return 0.0
+        values = sorted(values)
+        return values[min(int(len(values) * q), len(values) - 1)]
+
+    def row(self) -> dict:
+        return {
+            "scenario": self.name,
+            "ok": self.ok,
+            "timeouts": self.pool_timeouts,
+            "disconnects": self.disconnects,
+            "errors": self.other_errors,
+            "req/s": round(self.throughput, 1),
+            "p50_ms": round(self.pct(self.latency_ms, 0.50), 2),
+            "p95_ms": round(self.pct(self.latency_ms, 0.95), 2),
+            "p99_ms": round(self.pct(self.latency_ms, 0.99), 2),
+            "wait_p95_ms": round(self.pct(self.wait_ms, 0.95), 2),
+            "wait_avg_ms": round(statistics.fmean(self.wait_ms), 2) if self.wait_ms else 0.0,
+            "connects": self.faults["connects"],
+        }
+
+
+def _prepare(path: str) -> None:
+    import sqlite3
+
+    with sqlite3.connect(path) as conn:
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("CREATE TABLE IF NOT EXISTS users (id INTEGER PRIMARY KEY, email TEXT)")
+        conn.execute("CREATE TABLE IF NOT EXISTS sessions (id INTEGER PRIMARY KEY, user_id INTEGER)")
+        conn.executemany("INSERT INTO users (id, email) VALUES (?, ?)", [(i, f"u{i}@a.com") for i in range(1, 101)])
+
+
+def run_scenario(sc: Scenario, path: str | None = None) -> ScenarioResult:
+    tmpdir = None
+    if path is None:
+        tmpdir = tempfile.TemporaryDirectory()
+        path = os.path.join(tmpdir.name, "pool.db")
+    _prepare(path)
+
+    faults = FaultInjector(sc.faults)
+    engine = faults.create_engine(
+        f"sqlite+pysqlite:///{path}",
+        # timeout = busy wait ของ sqlite เอง (writer ต่อคิวกัน), ไม่ใช่ pool_timeout
+        lambda: __import__("sqlite3").connect(path, check_same_thread=False, timeout=30),
+        pool_size=sc.pool_size,
+        max_overflow=sc.max_overflow,
+        pool_timeout=sc.pool_timeout,
+        pool_pre_ping=sc.pre_ping,
+        pool_recycle=sc.recycle,
+    )
+
+    lock = threading.Lock()
+    latency: list[float] = []
+    waits: list[float] = []
+    counts = {"ok": 0, "timeout": 0, "disconnect": 0, "error": 0}
+
+    def worker(n: int) -> None:
+        for i in range(sc.requests):
+            t0 = time.perf_counter()
+            outcome = "ok"
+            wait = None
+            try:
+                with engine.connect() as conn:
+                    wait = (time.perf_counter() - t0) * 1000
+                    conn.execute(text("SELECT id, email FROM users WHERE id = :id"), {"id": (n * i) % 100 + 1})
+                    if sc.work_ms:
+                        time.sleep(sc.work_ms / 1000)
+                    if sc.writes:
+                        conn.execute(text("INSERT INTO sessions (user_id) VALUES (:uid)"), {"uid": n})
+                    conn.commit()
+            except PoolTimeout:
+                outcome = "timeout"
+            except DBAPIError as e:
+                outcome = "disconnect" if e.connection_invalidated else "error"
+            elapsed = (time.perf_counter() - t0) * 1000
+            with lock:
+                counts[outcome] += 1
+                if outcome == "ok":
+                    latency.append(elapsed)
+                if wait is not None:
+                    waits.append(wait)
+            if sc.think_ms:
+                time.sleep(sc.think_ms / 1000)
+
+    threads = [threading.Thread(target=worker, args=(n,)) for n in range(sc.threads)]
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    seconds = time.perf_counter() - start
+
+    engine.dispose()
+    if tmpdir is not None:
+        tmpdir.cleanup()
+
+    return ScenarioResult(
+        name=sc.name,
+        ok=counts["ok"],
+        pool_timeouts=counts["timeout"],
+        disconnects=counts["disconnect"],
+        other_errors=counts["error"],
+        seconds=seconds,
+        latency_ms=latency,
+        wait_ms=waits,
+        faults=faults.metrics(),
+    )
+
+
+def default_scenarios(threads: int, requests: int, latency_ms: float, jitter_ms: float) -> list[Scenario]:
+    net = dict(latency_ms=latency_ms, jitter_ms=jitter_ms, commit_latency_ms=latency_ms * 2, connect_latency_ms=latency_ms * 5)
+    load = dict(threads=threads, requests=requests, work_ms=latency_ms * 2)
+    # server ตัด connection ที่ idle นานกว่า 150ms, client เว้นช่วง 200ms ระหว่าง request
+    idle = dict(threads=threads // 2 or 1, requests=max(requests // 4, 3), think_ms=200)
+    idle_net = dict(net, idle_timeout_ms=150)
+
+    return [
+        Scenario("small pool (5+0)", pool_size=5, max_overflow=0, pool_timeout=0.5, faults=FaultConfig(**net), **load),
+        Scenario("default pool (10+20)", pool_size=10, max_overflow=20, faults=FaultConfig(**net), **load),
+        Scenario("pool = threads", pool_size=threads, max_overflow=0, faults=FaultConfig(**net), **load),
+        Scenario("idle kill, no pre_ping", pool_size=threads, faults=FaultConfig(**idle_net), **idle),
+        Scenario("idle kill, pre_ping", pool_size=threads, pre_ping=True, faults=FaultConfig(**idle_net), **idle),
+        Scenario("idle kill, recycle 0.1s", pool_size=threads, recycle=0.1, faults=FaultConfig(**idle_net), **idle),
+    ]
+
+
+def print_results(results: list[ScenarioResult]) -> None:
+    rows = [r.row() for r in results]
+    cols = list(rows[0])
+    widths = {c: max(len(c), *(len(str(r[c])) for r in rows)) for c in cols}
+    print("  ".join(c.ljust(widths[c]) for c in cols))
+    for r in rows:
+        print("  ".join(str(r[c]).ljust(widths[c]) for c in cols))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--threads", type=int, default=32)
+    parser.add_argument("--requests", type=int, default=20)
+    parser.add_argument("--latency-ms", type=float, default=2.0)
+    parser.add_argument("--jitter-ms", type=float, default=1.0)
+    parser.add_argument("--writes", action="store_true", help="INSERT in every request (serialises on SQLite)")
+    args = parser.parse_args()
+
+    scenarios = default_scenarios(args.threads, args.requests, args.latency_ms, args.jitter_ms)
+    for sc in scenarios:
+        sc.writes = args.writes
+    results = [run_scenario(sc) for sc in scenarios]
+    print_results(results)
+
+
+if __name__ == "__main__":
+    main()
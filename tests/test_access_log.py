@@ -0,0 +1,77 @@
+# tests/test_access_log.py
+import json
+import logging
+import secrets
+
+import pytest
+
+from app.core.access_log import AccessLog, JSONFormatter, parse_sample_rates
+from app.core.config import Settings
+
+
+BASE = "/api/v1/auth"
+
+
+class ListHandler(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.setFormatter(JSONFormatter())
+        self.lines = []
+
+    def emit(self, record):
+        self.lines.append(json.loads(self.format(record)))
+
+
+def _scope(route="/api/v1/auth/login", state=None):
+    return {"type": "http", "method": "POST", "path": route, "client": ("10.0.0.1", 1), "state": state or {}}
+
+
+def test_requests_are_logged_with_user_and_session(client):
+    from app.core.access_log import access_log
+
+    handler = ListHandler()
+    access_log.stop()
+    access_log.start(target=handler)
+
+    email = f"al_{secrets.token_hex(4)}@a.com"
+    client.post(f"{BASE}/register", json={"email": email, "password": "abcd1234"})
+    tokens = client.post(f"{BASE}/login", json={"email": email, "password": "abcd1234", "device_id": "al-dev"}).json()
+    client.get(f"{BASE}/view-profile", headers={"Authorization": f"Bearer {tokens['access_token']}"})
+    access_log.stop()
+
+    by_route = {line["route"]: line for line in handler.lines}
+    login, profile = by_route[f"{BASE}/login"], by_route[f"{BASE}/view-profile"]
+    assert (login["status"], login["session_id"], login["method"]) == (200, "al-dev", "POST")
+    assert profile["user_id"] == login["user_id"] and profile["session_id"] == "al-dev"
+    assert by_route[f"{BASE}/register"]["user_id"] is None
+    assert profile["duration_ms"] > 0 and profile["sample_rate"] == 1.0
+
+
+def test_sampling_keeps_errors_and_reports_rate_limit(monkeypatch):
+    log = AccessLog(sample_rates={"/api/v1/auth/login": 0.0})
+    handler = ListHandler()
+    log.start(target=handler)
+    monkeypatch.setattr("app.core.access_log.route_template", lambda scope: scope["path"])
+
+    log.request(_scope(state={"view_rate_limit": ("5/minute", [])}), 200, 1.0)
+    log.request(_scope(state={"view_rate_limit": ("5/minute", [])}), 429, 1.0)
+    log.request(_scope(), 500, 1.0)
+    log.request(_scope("/api/v1/auth/verify", {"view_rate_limit": ("5/minute", [])}), 200, 1.0)
+    log.stop()
+
+    assert [(line["status"], line["rate_limit"]) for line in handler.lines] == [(429, "limited"), (500, None), (200, "ok")]
+    assert log.metrics()["sampled_out"] == 1
+
+
+def test_full_queue_drops_instead_of_blocking(monkeypatch):
+    log = AccessLog(max_queue=2)  # ไม่ start listener: ไม่มีใครระบายคิว
+    monkeypatch.setattr("app.core.access_log.route_template", lambda scope: scope["path"])
+    for _ in range(5):
+        log.request(_scope(), 200, 1.0)
+    assert (log.metrics()["queued"], log.metrics()["dropped"]) == (2, 3)
+
+
+def test_sample_spec_is_validated():
+    assert parse_sample_rates("/a=0.5, /b=1") == {"/a": 0.5, "/b": 1.0}
+    with pytest.raises(ValueError):
+        Settings(ACCESS_LOG_SAMPLE="/a=2")
@@ -0,0 +1,64 @@
+# tests/test_admin_bulk.py
+import secrets
+
+from app.core.config import settings
+from app.crud.revocation_event import latest_id, list_after
+
+
+BASE = "/api/v1/auth"
+BULK = "/api/v1/admin/users/bulk"
+
+
+def _users(client, n: int) -> list[dict]:
+    users = []
+    for _ in range(n):
+        email = f"bulk_{secrets.token_hex(4)}@a.com"
+        client.post(f"{BASE}/register", json={"email": email, "password": "abcd1234"})
+        tokens = client.post(f"{BASE}/login", json={"email": email, "password": "abcd1234"}).json()
+        user_id = client.get(f"{BASE}/verify", headers={"Authorization": f"Bearer {tokens['access_token']}"}).json()["user_id"]
+        users.append({"id": user_id, "email": email, "tokens": tokens})
+    return users
+
+
+def test_deactivate_and_reactivate_in_chunks(client, db, monkeypatch):
+    monkeypatch.setattr(settings, "ADMIN_BULK_CHUNK_SIZE", 2)
+    users = _users(client, 3)
+    head = latest_id(db)
+
+    r = client.post(BULK, json={"action": "deactivate", "user_ids": [u["id"] for u in users] + [999999]})
+    assert r.status_code == 200, r.text
+    body = r.json()
+    assert (body["requested"], body["matched"], body["users_updated"], body["sessions_revoked"]) == (4, 3, 3, 3)
+    assert [c["requested"] for c in body["chunks"]] == [2, 2]
+
+    access = users[0]["tokens"]["access_token"]
+    assert client.get(f"{BASE}/verify", headers={"Authorization": f"Bearer {access}"}).status_code == 401
+    # บัญชีที่ถูกปิด login ใหม่ไม่ได้ (401 เดียวกับรหัสผ่านผิด) และไม่ได้ session ใหม่
+    r = client.post(f"{BASE}/login", json={"email": users[0]["email"], "password": "abcd1234"})
+    assert r.status_code == 401 and r.json()["detail"] == "Invalid credentials"
+    assert client.post(f"{BASE}/refresh-access-token", json={"refresh_token": users[0]["tokens"]["refresh_token"]}).status_code == 401
+    events = list_after(db, head)
+    assert sorted(e["user_id"] for e in events) == sorted(u["id"] for u in users)
+    assert {e["reason"] for e in events} == {"admin_deactivate"}
+
+    emails = [u["email"] for u in users]
+    assert client.post(BULK, json={"action": "reactivate", "emails": emails}).json()["users_updated"] == 3
+    assert client.post(f"{BASE}/login", json={"email": emails[0], "password": "abcd1234"}).status_code == 200
+    assert client.post(BULK, json={"action": "reactivate", "emails": emails}).json()["users_updated"] == 0
+
+
+def test_force_password_reset(client):
+    user = _users(client, 1)[0]
+    r = client.post(BULK, json={"action": "force_password_reset", "emails": [user["email"]]})
+    assert r.json()["users_updated"] == 1 and r.json()["sessions_revoked"] == 1
+
+    assert client.post(f"{BASE}/login", json={"email": user["email"], "password": "abcd1234"}).status_code == 401
+    token = client.post(f"{BASE}/forgot-password", json={"email": user["email"]}).json()["reset_token"]
+    assert client.post(f"{BASE}/reset-password", json={"token": token, "new_password": "new-pass-123"}).status_code == 200
+    assert client.post(f"{BASE}/login", json={"email": user["email"], "password": "new-pass-123"}).status_code == 200
+
+
+def test_empty_request_and_unknown_action(client):
+    r = client.post(BULK, json={"action": "deactivate"})
+    assert r.status_code == 200 and r.json()["chunks"] == []
+    assert client.post(BULK, json={"action": "delete", "user_ids": [1]}).status_code == 422
@@ -0,0 +1,61 @@
+# tests/test_admin_users.py
+import json
+import secrets
+from datetime import datetime
+
+from app.crud.user import create_user
+
+
+ADMIN = "/api/v1/admin"
+
+
+def _seed(db, n: int) -> str:
+    tag = secrets.token_hex(4)
+    # created_at ซ้ำกันทุกแถว => ต้องตัดสินด้วย id (SQLite: ตั้งเองให้ format ตรงกับ bound parameter)
+    created_at = datetime(2026, 1, 1)
+    for i in range(n):
+        user = create_user(db, f"adm{tag}_{i}@a.com", "x")
+        user.full_name = f"Name{tag} {i}"
+        user.phone = f"+66{tag}{i}"
+        user.created_at = created_at
+    create_user(db, f"adm{tag}x{n}@a.com", "x").created_at = created_at  # ตรงกับ "adm{tag}_" ถ้าไม่ escape "_"
+    db.commit()
+    return tag
+
+
+def _pages(client, **params):
+    seen, cursor = [], None
+    while True:
+        r = client.get(f"{ADMIN}/users", params={**params, **({"cursor": cursor} if cursor else {})})
+        assert r.status_code == 200, r.text
+        page = r.json()
+        seen += page["items"]
+        cursor = page["next_cursor"]
+        if not cursor:
+            return seen
+
+
+def test_keyset_pages_by_id_and_created_at(client, db):
+    tag = _seed(db, 5)
+
+    by_id = _pages(client, email_prefix=f"adm{tag}_", limit=2)
+    assert [u["email"] for u in by_id] == [f"adm{tag}_{i}@a.com" for i in range(5)]
+    assert set(by_id[0]) == {"id", "email", "is_active", "created_at", "updated_at", "full_name", "phone"}
+
+    by_created = _pages(client, email_prefix=f"adm{tag}", order="created_at", limit=4)
+    keys = [(u["created_at"], u["id"]) for u in by_created]
+    assert keys == sorted(keys) and len(by_created) == 6
+
+    assert [u["phone"] for u in _pages(client, phone=f"+66{tag}3")] == [f"+66{tag}3"]
+    assert len(_pages(client, full_name=f"Name{tag}", limit=3)) == 5
+    assert client.get(f"{ADMIN}/users", params={"cursor": "!!"}).status_code == 400
+
+
+def test_export_streams_ndjson(client, db):
+    tag = _seed(db, 3)
+    r = client.get(f"{ADMIN}/users/export", params={"full_name": f"Name{tag}"})
+    assert r.status_code == 200
+    assert r.headers["content-type"].startswith("application/x-ndjson")
+    rows = [json.loads(line) for line in r.text.splitlines()]
+    assert [u["full_name"] for u in rows] == [f"Name{tag} {i}" for i in range(3)]
+    assert "password_hash" not in rows[0]
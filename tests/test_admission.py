@@ -0,0 +1,65 @@
+# tests/test_admission.py
+import asyncio
+
+from app.core.admission import Budget, admission
+
+
+BASE = "/api/v1/auth"
+
+
+def test_budget_queues_then_rejects_after_max_wait():
+    async def scenario():
+        b = Budget("t", limit=1, max_wait_ms=20, max_queue=10)
+        assert await b.acquire() is True
+
+        # ช่องเต็ม: รอเกิน max_wait => reject
+        assert await b.acquire() is False
+        assert b.rejected_timeout == 1
+
+        # มีคนคืน slot ระหว่างรอ => ได้ slot ต่อ
+        waiter = asyncio.ensure_future(b.acquire())
+        await asyncio.sleep(0)
+        b.release()
+        assert await waiter is True
+        assert b.in_flight == 1
+        b.release()
+        assert b.in_flight == 0
+
+    asyncio.run(scenario())
+
+
+def test_budget_rejects_when_queue_full():
+    async def scenario():
+        b = Budget("t", limit=0, max_wait_ms=50, max_queue=0)
+        assert await b.acquire() is False
+        assert b.rejected_queue_full == 1
+
+    asyncio.run(scenario())
+
+
+def test_hash_routes_shed_with_503_while_cheap_routes_serve(client, monkeypatch):
+    hash_budget = admission.budgets["hash"]
+    monkeypatch.setattr(hash_budget, "limit", 0)
+    monkeypatch.setattr(hash_budget, "max_wait_ms", 10)
+
+    r = client.post(f"{BASE}/login", json={"email": "x@a.com", "password": "abcd1234"}, headers={"Origin": "http://app.test"})
+    assert r.status_code == 503, r.text
+    assert r.headers["retry-after"] == "1"
+    # CORS อยู่นอก admission: browser อ่าน 503 / Retry-After ได้
+    assert r.headers["access-control-allow-origin"] == "http://app.test"
+
+    r = client.get("/health")
+    assert r.status_code == 200, r.text
+
+    m = client.get("/api/v1/admin/admission").json()
+    assert m["budgets"]["hash"]["rejected_timeout"] >= 1
+    assert m["budgets"]["cheap"]["admitted"] >= 1
+
+
+def test_revocation_feed_is_not_admission_controlled(client, monkeypatch):
+    db_budget = admission.budgets["db"]
+    monkeypatch.setattr(db_budget, "limit", 0)
+    monkeypatch.setattr(db_budget, "max_wait_ms", 10)
+
+    # subscriber long-poll ค้างนาน => ห้ามกิน budget ของ API (และต้องใช้ได้ตอน overload)
+    assert client.get("/api/v1/revocations").status_code == 200
@@ -0,0 +1,87 @@
+# tests/test_audit.py
+import json
+import secrets
+
+from app.core.audit import AuditLog, NDJSONAuditSink, audit_log
+
+
+BASE = "/api/v1/auth"
+
+
+class ListSink:
+    def __init__(self):
+        self.batches = []
+
+    def write(self, rows):
+        self.batches.append(rows)
+
+
+def test_overflow_policies():
+    log = AuditLog(ListSink(), max_queue=2, overflow="drop_oldest")
+    for i in range(3):
+        log.record("login", detail=str(i))
+    log.flush()
+    assert [r["detail"] for r in log.sink.batches[0]] == ["1", "2"]
+    assert log.metrics()["dropped"] == 1
+
+    log = AuditLog(ListSink(), max_queue=2, overflow="drop_newest")
+    for i in range(3):
+        log.record("login", detail=str(i))
+    log.flush()
+    assert [r["detail"] for r in log.sink.batches[0]] == ["0", "1"]
+
+    log = AuditLog(ListSink(), max_queue=1, overflow="block", block_timeout_ms=10)
+    log.record("login")
+    log.record("login")  # รอไม่เกิน 10ms แล้ว drop
+    assert log.metrics()["dropped"] == 1
+
+
+def test_flush_writes_in_batches():
+    sink = ListSink()
+    log = AuditLog(sink, batch_size=2)
+    for _ in range(5):
+        log.record("refresh")
+    assert log.flush() == 5
+    assert [len(b) for b in sink.batches] == [2, 2, 1]
+
+
+def test_ndjson_sink_rotates(tmp_path):
+    path = tmp_path / "audit.ndjson"
+    log = AuditLog(NDJSONAuditSink(str(path), max_bytes=300, backup_count=2), batch_size=1)
+    for i in range(10):
+        log.record("login", user_id=i)
+    log.flush()
+
+    assert path.exists() and (tmp_path / "audit.ndjson.1").exists()
+    first = json.loads(path.read_text().splitlines()[0])
+    assert first["event_type"] == "login"
+
+
+def test_login_events_are_queryable_with_keyset_pages(client):
+    email = f"u_{secrets.token_hex(4)}@a.com"
+    client.post(f"{BASE}/register", json={"email": email, "password": "abcd1234"})
+    for password in ("abcd1234", "abcd1234", "wrong-pass", "abcd1234"):
+        client.post(f"{BASE}/login", json={"email": email, "password": password})
+    audit_log.flush()
+
+    seen = []
+    cursor = None
+    while True:
+        params = {"event_type": "login", "limit": 2}
+        if cursor:
+            params["cursor"] = cursor
+        r = client.get("/api/v1/admin/audit-events", params=params)
+        assert r.status_code == 200, r.text
+        page = r.json()
+        seen += page["items"]
+        cursor = page["next_cursor"]
+        if not cursor:
+            break
+
+    ids = [e["id"] for e in seen]
+    assert ids == sorted(ids) and len(ids) == len(set(ids))
+
+    user_id = seen[-1]["user_id"]
+    mine = [e for e in seen if e["user_id"] == user_id]
+    assert [e["success"] for e in mine] == [True, True, False, True]
+    assert mine[2]["detail"] == "invalid_credentials"
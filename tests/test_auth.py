@@ -1,6 +1,8 @@
 # tests/test_auth.py
 import secrets
 
+from app.crud.user import get_user_by_email
+
 
 BASE = "/api/v1/auth"
 
@@ -98,6 +100,24 @@ def test_refresh_rotation(client):
     assert r.status_code == 401, r.text
 
 
+def test_refresh_for_inactive_user_still_revokes_token(client, db):
+    email = f"u_{secrets.token_hex(4)}@a.com"
+    client.post(f"{BASE}/register", json={"email": email, "password": "1234"})
+    tokens = client.post(f"{BASE}/login", json={"email": email, "password": "1234"}).json()
+
+    user = get_user_by_email(db, email)
+    user.is_active = False
+    db.commit()
+    r = client.post(f"{BASE}/refresh-access-token", json={"refresh_token": tokens["refresh_token"]})
+    assert r.status_code == 401, r.text
+    db.rollback()  # ของที่ไม่ได้ commit หายไป
+
+    user.is_active = True
+    db.commit()
+    r = client.post(f"{BASE}/refresh-access-token", json={"refresh_token": tokens["refresh_token"]})
+    assert r.status_code == 401, r.text
+
+
 def test_logout_makes_refresh_invalid(client):
     email = f"u_{secrets.token_hex(4)}@a.com"
     password = "1234"
@@ -302,3 +322,28 @@ def test_reset_password_revokes_existing_refresh_tokens(client):
     # login with new should work
     r = client.post(f"{BASE}/login", json={"email": email, "password": new_password, "device_id": "dev2"})
     assert r.status_code == 200, r.text
+
+
+def test_concurrent_resets_with_same_token_only_one_wins(client, monkeypatch):
+    from app.api.v1.endpoints import auth as auth_endpoints
+
+    email = f"u_{secrets.token_hex(4)}@a.com"
+    client.post(f"{BASE}/register", json={"email": email, "password": "abcd1234"})
+    token = client.post(f"{BASE}/forgot-password", json={"email": email}).json()["reset_token"]
+
+    # reset ตัวที่สองเข้ามาระหว่างที่ตัวแรกกำลัง hash (ผ่าน check used_at ไปแล้วทั้งคู่)
+    real_hash, statuses = auth_endpoints.hash_password, []
+
+    def hash_then_race(password):
+        if not statuses:
+            statuses.append(None)
+            r = client.post(f"{BASE}/reset-password", json={"token": token, "new_password": "second-pw"})
+            statuses.append(r.status_code)
+        return real_hash(password)
+
+    monkeypatch.setattr(auth_endpoints, "hash_password", hash_then_race)
+    r = client.post(f"{BASE}/reset-password", json={"token": token, "new_password": "first-pw1"})
+    assert (statuses[1], r.status_code) == (200, 401), r.text
+
+    assert client.post(f"{BASE}/login", json={"email": email, "password": "second-pw"}).status_code == 200
+    assert client.post(f"{BASE}/login", json={"email": email, "password": "first-pw1"}).status_code == 401
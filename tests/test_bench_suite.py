@@ -0,0 +1,39 @@
+# tests/test_bench_suite.py
+import json
+
+from benchmarks import suite
+
+
+def _results(**per_call_us):
+    return {"results": {name: {"per_call_us": us, "number": 1} for name, us in per_call_us.items()}}
+
+
+def test_compare_flags_regressions_with_per_benchmark_thresholds():
+    baseline = _results(**{"tokens.decode_token": 10.0, "security.verify_password": 1000.0, "auth._sha256": 1.0})
+    current = _results(**{
+        "tokens.decode_token": 13.0,          # +30% > default 25%
+        "security.verify_password": 1400.0,  # +40% < bcrypt threshold 50%
+        "auth._sha256": 0.5,
+        "crud.get_user": 100.0,
+    })
+
+    status = {r["name"]: r["status"] for r in suite.compare(current, baseline)}
+    assert status == {
+        "tokens.decode_token": "regression",
+        "security.verify_password": "ok",
+        "auth._sha256": "improved",
+        "crud.get_user": "new",
+    }
+
+
+def test_every_primitive_is_registered_and_runs(tmp_path):
+    names = set(suite.BENCHMARKS)
+    for required in ("security.hash_password", "tokens.decode_token", "auth._sha256",
+                     "schemas.LoginRequest.validate", "schemas.UserOut.from_orm.dump_json", "crud.get_principal"):
+        assert required in names
+
+    out = tmp_path / "results.json"
+    assert suite.main(["-k", "tokens.", "-k", "crud.refresh_token", "--quick", "--save", str(out)]) == 0
+    saved = json.loads(out.read_text())
+    assert "tokens.create_access_token" in saved["results"] and "crud.refresh_token.rotate_session" in saved["results"]
+    assert saved["meta"]["python"]
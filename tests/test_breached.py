@@ -0,0 +1,76 @@
+# tests/test_breached.py
+import hashlib
+import secrets
+
+import pytest
+from pydantic import ValidationError
+
+from app.core.breached import BreachedPasswordChecker, BreachedPasswordIndex
+from app.schemas.auth import ChangePasswordRequest, ResetPasswordRequest
+from app.tools.build_breach_index import build_index
+
+
+BASE = "/api/v1/auth"
+BREACHED = ["password123", "qwerty2024", "iloveyou!!", "letmein123"]
+
+
+def _sha1_hex(p: str) -> str:
+    return hashlib.sha1(p.encode()).hexdigest().upper()
+
+
+@pytest.fixture()
+def index_path(tmp_path):
+    # รูปแบบ HIBP "SHA1:count" + ซ้ำ + chunk เล็ก => ผ่าน external merge หลาย run
+    lines = [f"{_sha1_hex(p)}:{i + 1}\n" for i, p in enumerate(BREACHED)]
+    lines += lines[:2] + [f"{secrets.token_hex(20).upper()}:1\n" for _ in range(50)]
+    path = str(tmp_path / "breached.idx")
+    assert build_index(lines, path, chunk_size=7) == len(BREACHED) + 50
+    return path
+
+
+def test_index_lookup(index_path):
+    index = BreachedPasswordIndex(index_path)
+    assert all(p in index for p in BREACHED)
+    assert "correct horse battery staple" not in index
+    index.close()
+
+
+def test_plaintext_full_width(tmp_path):
+    path = str(tmp_path / "full.idx")
+    build_index(["hunter22\n", "hunter22\n", "trustno1\n"], path, width=20, plaintext=True)
+    index = BreachedPasswordIndex(path)
+    assert index.count == 2 and index.width == 20
+    assert "trustno1" in index and "trustno2" not in index
+
+
+def test_build_skips_malformed_lines(tmp_path):
+    path, skipped = str(tmp_path / "skip.idx"), []
+    lines = ["not-hex:3\n", f"{_sha1_hex('hunter22')}:1\n", "ABCD:7\n", f"{_sha1_hex('trustno1')}\n"]
+    count = build_index(lines, path, on_skip=lambda lineno, line: skipped.append(lineno))
+    assert count == 2 and skipped == [1, 3]  # "ABCD" = 2 bytes < width 8
+    index = BreachedPasswordIndex(path)
+    assert "hunter22" in index and "trustno1" in index
+    index.close()
+
+
+def test_rejects_non_index_file(tmp_path):
+    path = tmp_path / "junk.idx"
+    path.write_bytes(b"x" * 100)
+    with pytest.raises(ValueError):
+        BreachedPasswordIndex(str(path))
+
+
+def test_schemas_reject_breached_passwords(client, index_path, monkeypatch):
+    monkeypatch.setattr("app.core.breached.breached_passwords", BreachedPasswordChecker(index_path))
+
+    r = client.post(f"{BASE}/register", json={"email": f"u_{secrets.token_hex(4)}@a.com", "password": "password123"})
+    assert r.status_code == 422
+    assert "breach" in r.text
+    r = client.post(f"{BASE}/register", json={"email": f"u_{secrets.token_hex(4)}@a.com", "password": "abcd1234"})
+    assert r.status_code == 200, r.text
+
+    with pytest.raises(ValidationError):
+        ChangePasswordRequest(old_password="abcd1234", new_password="letmein123")
+    with pytest.raises(ValidationError):
+        ResetPasswordRequest(token="t", new_password="qwerty2024")
+    assert ResetPasswordRequest(token="t", new_password="not-in-the-dump").new_password
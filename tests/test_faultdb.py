@@ -0,0 +1,70 @@
+# tests/test_faultdb.py
+import time
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.exc import DBAPIError
+
+from tests.support.faultdb import FaultConfig, FaultInjector
+from tests.support.pool_scenarios import Scenario, run_scenario
+
+
+def test_latency_and_slow_commit(tmp_path):
+    faults = FaultInjector(FaultConfig(latency_ms=20, commit_latency_ms=30))
+    engine = faults.create_sqlite_engine(str(tmp_path / "f.db"))
+
+    with engine.connect() as conn:
+        t0 = time.perf_counter()
+        assert conn.execute(text("SELECT 1")).scalar() == 1
+        conn.commit()
+        elapsed = time.perf_counter() - t0
+
+    assert elapsed >= 0.05
+    m = faults.metrics()
+    assert m["statements"] >= 1 and m["commits"] == 1
+    engine.dispose()
+
+
+def test_dropped_connection_needs_pre_ping(tmp_path):
+    path = str(tmp_path / "f.db")
+
+    faults = FaultInjector()
+    engine = faults.create_sqlite_engine(path, pool_size=1, max_overflow=0)
+    with engine.connect() as conn:
+        conn.execute(text("SELECT 1"))
+    faults.drop_all()
+    with pytest.raises(DBAPIError) as exc:
+        with engine.connect() as conn:
+            conn.execute(text("SELECT 1"))
+    assert exc.value.connection_invalidated
+    engine.dispose()
+
+    faults = FaultInjector()
+    engine = faults.create_sqlite_engine(path, pool_size=1, max_overflow=0, pool_pre_ping=True)
+    with engine.connect() as conn:
+        conn.execute(text("SELECT 1"))
+    faults.drop_all()
+    with engine.connect() as conn:
+        assert conn.execute(text("SELECT 2")).scalar() == 2
+    assert faults.metrics()["connects"] == 2
+    engine.dispose()
+
+
+def test_pool_exhaustion_under_latency(tmp_path):
+    common = dict(threads=4, requests=1, work_ms=150, faults=FaultConfig(latency_ms=5))
+
+    small = run_scenario(Scenario("small", pool_size=1, max_overflow=0, pool_timeout=0.05, **common), str(tmp_path / "a.db"))
+    assert small.pool_timeouts > 0
+
+    sized = run_scenario(Scenario("sized", pool_size=4, max_overflow=0, pool_timeout=0.05, **common), str(tmp_path / "b.db"))
+    assert sized.pool_timeouts == 0 and sized.ok == 4
+
+
+def test_idle_kill_recycle(tmp_path):
+    common = dict(threads=2, requests=3, think_ms=80, faults=FaultConfig(idle_timeout_ms=50))
+
+    stale = run_scenario(Scenario("stale", pool_size=2, **common), str(tmp_path / "a.db"))
+    assert stale.disconnects > 0
+
+    recycled = run_scenario(Scenario("recycled", pool_size=2, recycle=0.03, **common), str(tmp_path / "b.db"))
+    assert recycled.disconnects == 0 and recycled.ok == 6
@@ -0,0 +1,69 @@
+# tests/test_jwt_codec.py
+import base64
+import json
+import time
+
+import pytest
+from jose import jwt
+
+from app.core.jwt_codec import HS256Codec, JoseCodec, build_codec
+
+SECRET = "golden-secret-please-change-32-chars"
+PAYLOAD = {
+    "sub": "42",
+    "type": "access",
+    "iat": 1760000000,
+    "jti": "0123456789abcdef0123456789abcdef",
+    "exp": 4102444800,
+    "sid": "s-1",
+}
+# ออกด้วย python-jose (codec เดิม) => ต้อง encode/decode ได้เหมือนเดิมทุก byte
+GOLDEN = (
+    "eyJhbGciOiJIUzI1NiIsInR5cCI6IkpXVCJ9"
+    ".eyJzdWIiOiI0MiIsInR5cGUiOiJhY2Nlc3MiLCJpYXQiOjE3NjAwMDAwMDAsImp0aSI6IjAxMjM0NTY3ODlhYmNkZWYwMTIzNDU2Nzg5YWJjZGVmIiwiZXhwIjo0MTAyNDQ0ODAwLCJzaWQiOiJzLTEifQ"
+    ".33erQ0OPjHGpFTHln4QhUQ8lgu-p8Tfg-cMeV_y41Gg"
+)
+
+
+def _b64(obj) -> str:
+    return base64.urlsafe_b64encode(json.dumps(obj, separators=(",", ":")).encode()).rstrip(b"=").decode()
+
+
+def test_hs256_matches_jose_byte_for_byte():
+    fast, jose = HS256Codec(SECRET), JoseCodec(SECRET)
+    assert fast.encode(PAYLOAD) == GOLDEN
+    assert jose.encode(PAYLOAD) == GOLDEN
+    assert fast.decode(GOLDEN) == jose.decode(GOLDEN) == PAYLOAD
+
+    now = int(time.time())
+    refresh = {"sub": "7", "type": "refresh", "iat": now, "jti": "ab" * 16, "exp": now + 60}
+    assert fast.encode(refresh) == jwt.encode(refresh, SECRET, algorithm="HS256")
+    assert jose.decode(fast.encode(refresh)) == refresh
+
+
+@pytest.mark.parametrize(
+    "token",
+    [
+        GOLDEN[:-2] + "AA",                                   # signature แก้
+        GOLDEN.rsplit(".", 1)[0] + ".",                       # ไม่มี signature
+        _b64({"alg": "none", "typ": "JWT"}) + "." + GOLDEN.split(".")[1] + ".",
+        HS256Codec("another-secret-please-change-32-chars").encode(PAYLOAD),
+        HS256Codec(SECRET).encode({**PAYLOAD, "exp": int(time.time()) - 1}),
+        HS256Codec(SECRET).encode({"type": "access", "exp": 4102444800}),   # ไม่มี sub
+        HS256Codec(SECRET).encode({"sub": "1", "type": "access"}),          # ไม่มี exp
+        "not-a-token",
+        "a.b.c",
+        "ฮ.ฮ.ฮ",
+    ],
+)
+def test_hs256_rejects(token):
+    with pytest.raises(ValueError):
+        HS256Codec(SECRET).decode(token)
+
+
+def test_build_codec_selection():
+    assert isinstance(build_codec(SECRET, "HS256", "auto"), HS256Codec)
+    assert isinstance(build_codec(SECRET, "HS256", "jose"), JoseCodec)
+    assert isinstance(build_codec(SECRET, "HS512", "auto"), JoseCodec)
+    with pytest.raises(ValueError):
+        build_codec(SECRET, "HS512", "fast")
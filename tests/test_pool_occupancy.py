@@ -0,0 +1,60 @@
+# tests/test_pool_occupancy.py
+import secrets
+import time
+
+from sqlalchemy import event
+
+import app.api.v1.endpoints.auth as auth_endpoints
+
+
+BASE = "/api/v1/auth"
+
+
+class PoolHoldTimer:
+    """รวมเวลาที่ connection ถูก checkout ออกจาก pool (checkout -> checkin)"""
+
+    def __init__(self, engine):
+        self.engine = engine
+        self.held = 0.0
+        self._t0: dict[int, float] = {}
+
+    def _checkout(self, dbapi_conn, record, proxy):
+        self._t0[id(record)] = time.perf_counter()
+
+    def _checkin(self, dbapi_conn, record):
+        t0 = self._t0.pop(id(record), None)
+        if t0 is not None:
+            self.held += time.perf_counter() - t0
+
+    def __enter__(self):
+        event.listen(self.engine, "checkout", self._checkout)
+        event.listen(self.engine, "checkin", self._checkin)
+        return self
+
+    def __exit__(self, *exc):
+        event.remove(self.engine, "checkout", self._checkout)
+        event.remove(self.engine, "checkin", self._checkin)
+
+
+def _login_hold_time(client, engine, email, password, n=3) -> float:
+    total = 0.0
+    for _ in range(n):
+        with PoolHoldTimer(engine) as t:
+            r = client.post(f"{BASE}/login", json={"email": email, "password": password})
+        assert r.status_code == 200, r.text
+        total += t.held
+    return total / n
+
+
+def test_login_releases_connection_during_bcrypt(client, engine, monkeypatch):
+    email = f"u_{secrets.token_hex(4)}@a.com"
+    password = "abcd1234"
+    client.post(f"{BASE}/register", json={"email": email, "password": password})
+
+    released = _login_hold_time(client, engine, email, password)
+
+    # พฤติกรรมเดิม: ถือ connection ไว้ตั้งแต่ SELECT จนถึง commit (ครอบ bcrypt)
+    monkeypatch.setattr(auth_endpoints, "release_connection", lambda db: None)
+    held_through_bcrypt = _login_hold_time(client, engine, email, password)
+
+    assert released * 10 < held_through_bcrypt, (released, held_through_bcrypt)
@@ -0,0 +1,63 @@
+# tests/test_pool_stats.py
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import TimeoutError as PoolTimeout
+
+from app.db.pool_stats import PoolStats, capacity_warnings, instrumented_pool_class
+
+
+def test_pool_stats_wait_hold_overflow_timeouts(tmp_path):
+    stats = PoolStats("t")
+    engine = create_engine(
+        f"sqlite+pysqlite:///{tmp_path / 'p.db'}",
+        poolclass=instrumented_pool_class(stats),
+        pool_size=1,
+        max_overflow=1,
+        pool_timeout=0.05,
+    )
+    stats.attach(engine)
+
+    c1 = engine.connect()
+    c2 = engine.connect()  # overflow
+    with pytest.raises(PoolTimeout):
+        engine.connect()
+    c2.invalidate()
+    c1.close()
+    c2.close()
+
+    snap = stats.snapshot()
+    assert snap["checkout_timeouts"] == 1
+    assert snap["checkout_wait"]["count"] == 3
+    assert snap["checkout_wait"]["max_ms"] >= 50
+    assert snap["hold"]["count"] == 2
+    assert snap["overflow_peak"] == 1
+    assert snap["invalidations"] == 1
+    assert snap["connects"] == 2
+
+    # dispose() สร้าง pool ใหม่ (recreate) => ยังนับต่อได้
+    engine.dispose()
+    with engine.connect() as conn:
+        conn.execute(text("SELECT 1"))
+    assert stats.snapshot()["checkout_wait"]["count"] == 4
+    engine.dispose()
+
+
+def test_capacity_warnings():
+    assert capacity_warnings(2, 20, 10, 20, 151) == []
+
+    warnings = capacity_warnings(4, 40, 10, 20, 100)
+    assert len(warnings) == 3
+    assert "threadpool" in warnings[0]
+    assert "4 workers x 30 pooled connections = 120" in warnings[1]
+
+    # ไม่รู้ max_connections => เช็คแค่ threadpool vs pool
+    assert len(capacity_warnings(4, 40, 10, 20, None)) == 1
+
+
+def test_admin_pool_endpoint(client):
+    r = client.get("/api/v1/admin/pool")
+    assert r.status_code == 200, r.text
+    body = r.json()
+    assert body["engines"][0]["name"] == "primary"
+    assert body["threadpool"]["total_tokens"] > 0
+    assert isinstance(body["capacity_warnings"], list)
@@ -0,0 +1,47 @@
+# tests/test_principal.py
+import dataclasses
+import secrets
+
+import pytest
+
+from app.core.principal import Principal
+from app.crud.user import get_principal, get_user_by_email
+from app.db.stats import StatementCounter
+
+
+BASE = "/api/v1/auth"
+
+
+def test_principal_is_slotted_and_frozen():
+    p = Principal(1, "a@a.com", True, "s1")
+    assert not hasattr(p, "__dict__")
+    with pytest.raises(dataclasses.FrozenInstanceError):
+        p.email = "b@a.com"
+
+
+def test_get_principal_does_not_touch_identity_map(client, db):
+    email = f"u_{secrets.token_hex(4)}@a.com"
+    client.post(f"{BASE}/register", json={"email": email, "password": "abcd1234"})
+    user_id = get_user_by_email(db, email).id
+    db.expunge_all()
+
+    p = get_principal(db, user_id, "sid-1")
+    assert p == Principal(user_id, email, True, "sid-1")
+    assert len(db.identity_map) == 0
+
+
+def test_verify_and_view_profile_use_one_query(client, engine):
+    email = f"u_{secrets.token_hex(4)}@a.com"
+    client.post(f"{BASE}/register", json={"email": email, "password": "abcd1234"})
+    tokens = client.post(f"{BASE}/login", json={"email": email, "password": "abcd1234"}).json()
+    headers = {"Authorization": f"Bearer {tokens['access_token']}"}
+
+    with StatementCounter(engine) as c:
+        r = client.get(f"{BASE}/view-profile", headers=headers)
+    assert r.status_code == 200, r.text
+    assert r.json()["email"] == email
+    assert c.statements_count == 1, c.report()
+
+    r = client.get(f"{BASE}/verify", headers=headers)
+    assert r.status_code == 200, r.text
+    assert r.json()["email"] == email
@@ -0,0 +1,66 @@
+# tests/test_profiler.py
+import marshal
+import secrets
+import threading
+
+from app.core.profiler import SamplingProfiler
+
+
+BASE = "/api/v1/auth"
+
+
+def _busy(stop: threading.Event):
+    while not stop.is_set():
+        sum(range(1000))
+
+
+def test_sampling_profiler_collapsed_and_pstats():
+    stop = threading.Event()
+    t = threading.Thread(target=_busy, args=(stop,))
+    t.start()
+    try:
+        prof = SamplingProfiler(interval=0.001).run_for(0.2)
+    finally:
+        stop.set()
+        t.join()
+
+    assert prof.sample_count > 0
+    collapsed = prof.collapsed()
+    assert "_busy (test_profiler.py:" in collapsed
+    # ทุกบรรทัดต้องเป็น "stack count"
+    for line in collapsed.strip().splitlines():
+        assert line.rsplit(" ", 1)[1].isdigit()
+
+    stats = marshal.loads(prof.pstats_dump())
+    busy = [k for k in stats if k[2] == "_busy"]
+    assert busy
+    cc, nc, tt, ct, callers = stats[busy[0]]
+    assert nc > 0 and ct > 0
+
+
+def test_admin_profile_endpoint(client):
+    r = client.get("/api/v1/admin/profile", params={"seconds": 0.2, "interval_ms": 2})
+    assert r.status_code == 200, r.text
+    assert r.headers["content-type"].startswith("text/plain")
+    assert int(r.headers["x-profile-samples"]) > 0
+
+    r = client.get("/api/v1/admin/profile", params={"seconds": 0.1, "format": "pstats"})
+    assert r.status_code == 200, r.text
+    assert isinstance(marshal.loads(r.content), dict)
+
+
+def test_per_request_profile_header(client):
+    email = f"u_{secrets.token_hex(4)}@a.com"
+    r = client.post(
+        f"{BASE}/register",
+        json={"email": email, "password": "abcd1234"},
+        headers={"x-admin-key": "dev", "x-profile": "1"},
+    )
+    assert r.status_code == 200, r.text
+    profile_id = r.headers["x-profile-id"]
+
+    r = client.get(f"/api/v1/admin/profile/requests/{profile_id}")
+    assert r.status_code == 200, r.text
+
+    r = client.get("/api/v1/admin/profile/requests/nope")
+    assert r.status_code == 404
@@ -0,0 +1,64 @@
+# tests/test_rate_sketch.py
+import math
+import random
+from collections import Counter
+
+from limits import parse
+from slowapi import Limiter
+
+from app.core import rate_sketch
+from app.core.rate_sketch import CountMinSketch, SketchStorage
+
+
+def test_sketch_never_undercounts_and_stays_within_bound():
+    rng = random.Random(7)
+    sketch = CountMinSketch(width=2048, depth=4)
+    exact = Counter()
+    for _ in range(50_000):
+        key = f"10.{rng.randrange(256)}.{rng.randrange(256)}.{rng.randrange(64)}"
+        exact[key] += 1
+        sketch.add(key)
+
+    bound = math.e / sketch.width * sketch.total
+    over = [sketch.estimate(k) - n for k, n in exact.items()]
+    assert min(over) >= 0
+    assert sum(o > bound for o in over) / len(over) <= math.exp(-sketch.depth)
+
+
+def test_memory_is_constant_in_key_cardinality():
+    storage = SketchStorage("sketch://?width=1024&depth=3&heavy_hitters=16&promote_at=3")
+    item = parse("5/minute")
+    for i in range(100_000):
+        storage.incr(item.key_for(f"ip-{i}"), item.get_expiry())
+
+    window = storage._windows[60]
+    assert len(storage._windows) == 1 and len(window.heavy) <= 16
+    assert [len(row) for row in window.sketch.rows] == [1024] * 3
+    assert storage.metrics()["windows"]["60"]["tail_hits"] == 100_000
+
+
+def test_heavy_hitters_are_counted_exactly_and_reset_per_window(monkeypatch):
+    now = [1_000_000.0]
+    monkeypatch.setattr(rate_sketch.time, "time", lambda: now[0])
+    storage = SketchStorage("sketch://?width=64&depth=2&promote_at=3")
+    key = parse("5/minute").key_for("1.2.3.4")
+
+    counts = [storage.incr(key, 60) for _ in range(10)]
+    assert counts[-1] >= 10 and counts == sorted(counts)
+    assert key in storage._windows[60].heavy
+    tail = storage._windows[60].sketch.total
+    storage.incr(key, 60)
+    assert storage._windows[60].sketch.total == tail  # heavy hitter ไม่ลง sketch แล้ว
+
+    now[0] += 60
+    assert storage.get(key) == 0
+    assert storage.get_expiry(key) == (now[0] // 60 + 1) * 60
+
+
+def test_plugs_into_slowapi_limiter():
+    limiter = Limiter(key_func=lambda: "x", storage_uri="sketch://?width=4096")
+    assert isinstance(limiter.limiter.storage, SketchStorage)
+
+    item = parse("3/minute")
+    assert [limiter.limiter.hit(item, "198.51.100.7") for _ in range(4)] == [True, True, True, False]
+    assert limiter.limiter.hit(item, "198.51.100.8")
@@ -0,0 +1,81 @@
+# tests/test_recorder.py
+import secrets
+
+from fastapi.testclient import TestClient
+
+from app.core.recorder import TrafficRecorder, TrafficRecorderMiddleware, anonymize, pseudonym
+from app.core.tokens import create_refresh_token
+from app.main import app as fastapi_app
+from app.tools.replay import Replayer, load, report
+
+
+BASE = "/api/v1/auth"
+
+
+def test_anonymize_keeps_structure_without_secrets():
+    refresh, _ = create_refresh_token("42")
+    body = {
+        "email": "Alice@Example.com",
+        "password": "hunter22",
+        "device_id": "phone-1",
+        "refresh_token": refresh,
+        "profile": {"full_name": "Alice", "age": 30, "tags": ["a", "bb"]},
+    }
+    out = anonymize(body)
+    assert out == {
+        "email": f"<email:{pseudonym('alice@example.com')}>",
+        "password": "<password:8>",
+        "device_id": f"<device:{pseudonym('phone-1')}>",
+        "refresh_token": f"<refresh:{pseudonym('uid:42')}>",
+        "profile": {"full_name": "<str:5>", "age": 30, "tags": ["<str:1>", "<str:2>"]},
+    }
+    assert anonymize({"refresh_token": "garbage", "token": "abc"}) == {"refresh_token": "<refresh:invalid>", "token": "<token:3>"}
+
+
+def test_sampling_is_per_client(tmp_path):
+    rec = TrafficRecorder(str(tmp_path / "t.ndjson"), sample_rate=0.25)
+    clients = [f"10.0.{i // 256}.{i % 256}" for i in range(4000)]
+    picked = [c for c in clients if rec.sampled(c)]
+    assert 800 < len(picked) < 1200
+    assert all(rec.sampled(c) for c in picked)  # client เดิมถูกเลือกเสมอ
+    assert not TrafficRecorder(str(tmp_path / "t.ndjson"), sample_rate=0).sampled("10.0.0.1")
+
+
+def test_record_then_replay_matches_statuses(client, tmp_path):
+    path = tmp_path / "traffic.ndjson"
+    rec = TrafficRecorder(str(path), sample_rate=1.0)
+    recording = TestClient(TrafficRecorderMiddleware(fastapi_app, rec))
+
+    email, password = f"rec_{secrets.token_hex(4)}@a.com", "Rec-pass-1"
+    assert recording.post(f"{BASE}/register", json={"email": email, "password": password}).status_code == 200
+    assert recording.post(f"{BASE}/login", json={"email": email, "password": "wrong-pw"}).status_code == 401
+    tokens = recording.post(f"{BASE}/login", json={"email": email, "password": password, "device_id": "rec-device-1"}).json()
+    auth = {"Authorization": f"Bearer {tokens['access_token']}"}
+    assert recording.get(f"{BASE}/verify", headers=auth).status_code == 200
+    assert recording.post(f"{BASE}/refresh-access-token").status_code == 200
+    assert recording.post(f"{BASE}/logout").status_code == 200
+    recording.get("/api/v1/admin/traces/slow")  # admin ไม่ถูกอัด
+    assert rec.flush() == 6
+
+    text = path.read_text()
+    for secret in (email, password, tokens["access_token"], tokens["refresh_token"], "rec-device-1"):
+        assert secret not in text
+    rows = load([str(path)])
+    assert [(r["route"], r["status"]) for r in rows] == [
+        (f"{BASE}/register", 200),
+        (f"{BASE}/login", 401),
+        (f"{BASE}/login", 200),
+        (f"{BASE}/verify", 200),
+        (f"{BASE}/refresh-access-token", 200),
+        (f"{BASE}/logout", 200),
+    ]
+    assert rows[3]["auth"].startswith("<access:") and rows[4]["cookie"].startswith("<refresh:")
+    assert len({r["client"] for r in rows}) == 1
+
+    replayer = Replayer(rows, TestClient(fastapi_app), speed=0, concurrency=1)
+    assert replayer.seed() == 0  # ผู้ใช้ถูกสร้างโดย /register ใน trace เอง
+    results = replayer.run()
+    assert [r.status for r in results] == [r["status"] for r in rows]
+    summary = {r["route"]: r for r in report(results)}
+    assert summary[f"POST {BASE}/login"]["count"] == 2
+    assert all(r["status_mismatches"] == 0 for r in summary.values())
@@ -0,0 +1,128 @@
+# tests/test_replicas.py
+import secrets
+import threading
+import time
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.core.security import hash_password
+from app.core.tokens import create_access_token
+from app.db.base import Base
+from app.db.replicas import ReplicaRouter
+from app.models.user import User
+
+
+BASE = "/api/v1/auth"
+
+
+@pytest.fixture()
+def replica(tmp_path, monkeypatch):
+    # replica = SQLite อีกไฟล์ (ไม่มี replication จริง: test ใส่ข้อมูลเองเพื่อจำลอง lag)
+    engine = create_engine(f"sqlite+pysqlite:///{tmp_path / 'replica.db'}", connect_args={"check_same_thread": False})
+    Base.metadata.create_all(engine)
+    router = ReplicaRouter([engine])
+    monkeypatch.setattr("app.api.deps.replica_router", router)
+    monkeypatch.setattr("app.api.v1.endpoints.admin.replica_router", router)
+    yield router, sessionmaker(bind=engine)
+    engine.dispose()
+
+
+def test_login_falls_back_to_primary_when_replica_misses(client, replica):
+    router, _ = replica
+    email = f"u_{secrets.token_hex(4)}@a.com"
+    client.post(f"{BASE}/register", json={"email": email, "password": "abcd1234"})
+
+    r = client.post(f"{BASE}/login", json={"email": email, "password": "abcd1234"})
+    assert r.status_code == 200, r.text
+    assert router.picks == [1]
+
+
+def test_new_user_verifies_before_replica_catches_up(client, replica):
+    # replica ว่าง (ยังไม่ได้ replicate อะไรเลย): register -> login -> /verify, /view-profile
+    email = f"u_{secrets.token_hex(4)}@a.com"
+    client.post(f"{BASE}/register", json={"email": email, "password": "abcd1234"})
+    tokens = client.post(f"{BASE}/login", json={"email": email, "password": "abcd1234"}).json()
+    headers = {"Authorization": f"Bearer {tokens['access_token']}"}
+
+    r = client.get(f"{BASE}/verify", headers=headers)
+    assert r.status_code == 200 and r.json()["email"] == email
+    r = client.get(f"{BASE}/view-profile", headers=headers)
+    assert r.status_code == 200 and r.json()["email"] == email
+
+
+def test_login_rechecks_primary_on_stale_password_hash(client, db, replica):
+    _, ReplicaSession = replica
+    email = f"u_{secrets.token_hex(4)}@a.com"
+    client.post(f"{BASE}/register", json={"email": email, "password": "abcd1234"})
+    user_id = db.query(User.id).filter(User.email == email).scalar()
+
+    # replica ยังมี hash ของรหัสผ่านเก่า
+    with ReplicaSession() as rdb:
+        rdb.add(User(id=user_id, email=email, password_hash=hash_password("oldpass12")))
+        rdb.commit()
+
+    r = client.post(f"{BASE}/login", json={"email": email, "password": "abcd1234"})
+    assert r.status_code == 200, r.text
+
+
+def test_verify_reads_from_replica(client, replica):
+    router, ReplicaSession = replica
+    with ReplicaSession() as rdb:
+        rdb.add(User(id=10**6, email="only-on-replica@a.com", password_hash="x"))
+        rdb.commit()
+
+    r = client.get(f"{BASE}/verify", headers={"Authorization": f"Bearer {create_access_token(str(10**6))}"})
+    assert r.status_code == 200, r.text
+    assert r.json()["email"] == "only-on-replica@a.com"
+
+    r = client.get("/api/v1/admin/replicas")
+    assert r.status_code == 200
+    assert r.json()["replicas"][0]["picks"] == router.picks[0] == 1
+
+
+def test_router_skips_lagging_and_failing_replicas():
+    a, b = create_engine("sqlite://"), create_engine("sqlite://")
+    lag = {a: 0.5, b: 30.0}
+
+    def probe(engine):
+        if lag[engine] is None:
+            raise RuntimeError("replica down")
+        return lag[engine]
+
+    router = ReplicaRouter([a, b], max_lag_seconds=5, check_interval=0, lag_probe=probe)
+    assert {router.pick() for _ in range(4)} == {a}
+
+    lag[a] = None
+    assert router.pick() is None
+    assert router.primary_fallbacks == 1 and router.probe_errors == 1
+
+    lag[b] = 1.0
+    assert router.pick() is b
+
+
+def test_slow_probe_does_not_block_other_reads():
+    a = create_engine("sqlite://")
+    release, probing = threading.Event(), threading.Event()
+    stalled = {"on": False}
+
+    def probe(engine):
+        if stalled["on"]:  # replica ค้าง (black-holed)
+            probing.set()
+            release.wait(5)
+        return 0.5
+
+    router = ReplicaRouter([a], max_lag_seconds=5, check_interval=0, lag_probe=probe)
+    assert router.pick() is a
+
+    stalled["on"] = True
+    slow = threading.Thread(target=router.pick)
+    slow.start()
+    assert probing.wait(5)
+    # probe ค้างอยู่ใน thread อื่น: pick ตอบทันทีด้วย lag ล่าสุด
+    start = time.monotonic()
+    assert router.pick() is a
+    assert time.monotonic() - start < 1
+    release.set()
+    slow.join(5)
@@ -0,0 +1,162 @@
+# tests/test_revocations.py
+import asyncio
+import json
+import math
+import secrets
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from app.api.v1.endpoints.revocations import revocation_stream
+from app.core.config import settings
+from app.core.revocation import RevocationFeed, event_payload
+from app.core.tokens import decode_token
+
+
+BASE = "/api/v1/auth"
+FEED = "/api/v1/revocations"
+FEED_KEY = "feed-test"
+
+
+@pytest.fixture
+def feed(client, monkeypatch):
+    monkeypatch.setattr(settings, "REVOCATION_FEED_KEY", FEED_KEY)
+
+    def get(path="", **params):
+        return client.get(f"{FEED}{path}", params=params, headers={"x-revocation-key": FEED_KEY}).json()
+
+    return get
+
+
+def _login(client, device_id=None):
+    email = f"rv_{secrets.token_hex(4)}@a.com"
+    client.post(f"{BASE}/register", json={"email": email, "password": "abcd1234"})
+    body = {"email": email, "password": "abcd1234"}
+    if device_id:
+        body["device_id"] = device_id
+    return email, client.post(f"{BASE}/login", json=body).json()
+
+
+def _me(client, tokens):
+    return client.get(f"{BASE}/verify", headers={"Authorization": f"Bearer {tokens['access_token']}"}).json()["user_id"]
+
+
+def test_long_poll_returns_events_after_cursor(client, feed):
+    cursor = feed()["cursor"]
+
+    _, tokens = _login(client, device_id="laptop")
+    user_id = _me(client, tokens)
+    client.post(f"{BASE}/logout", json={"refresh_token": tokens["refresh_token"]})
+    _, tokens2 = _login(client)
+    client.post(f"{BASE}/logout-all", headers={"Authorization": f"Bearer {tokens2['access_token']}"})
+
+    page = feed(cursor=cursor, wait=5)
+    events = page["events"]
+    assert [(e["user_id"], e["session_id"], e["reason"]) for e in events] == [
+        (user_id, "laptop", "logout"),
+        (_me(client, tokens2), None, "logout_all"),
+    ]
+    assert page["cursor"] == events[-1]["id"] > cursor
+    # ปัดขึ้นเป็นวินาทีถัดไป: token ที่ login ไว้ก่อน (iat ในวินาทีเดียวกัน) ต้อง iat < not_before
+    assert events[0]["not_before"] > decode_token(tokens["access_token"])["iat"]
+    assert events[0]["not_before"] <= math.ceil(datetime.now(timezone.utc).timestamp())
+
+    # ไม่มีอะไรใหม่ => คืนว่าง, cursor เดิม
+    assert feed(cursor=page["cursor"]) == {
+        "events": [],
+        "cursor": page["cursor"],
+    }
+    # cursor เก่ากว่า buffer => catch-up จากตาราง
+    assert feed(cursor=0)["events"][0]["id"] >= 1
+
+
+def test_password_reset_emits_user_wide_event(client, feed):
+    email, _ = _login(client)
+    cursor = feed()["cursor"]
+
+    token = client.post(f"{BASE}/forgot-password", json={"email": email}).json()["reset_token"]
+    client.post(f"{BASE}/reset-password", json={"token": token, "new_password": "zzzz9999"})
+
+    events = feed(cursor=cursor, wait=5)["events"]
+    assert [(e["session_id"], e["reason"]) for e in events] == [(None, "password_reset")]
+
+
+def test_idle_feed_starts_new_subscribers_at_the_current_head(client, feed):
+    feed()  # subscriber ออกไป => poller หยุด
+    _, tokens = _login(client)
+    client.post(f"{BASE}/logout-all", headers={"Authorization": f"Bearer {tokens['access_token']}"})
+
+    cursor = feed()["cursor"]
+    # head ค้าง => cursor ชี้ก่อน logout-all และ poll รอบแรกจะคืน event นั้นกลับมา
+    assert feed(cursor=cursor, wait=0.5)["events"] == []
+
+
+def test_sse_stream_resumes_from_last_event_id(client, feed):
+    cursor = feed()["cursor"]
+    _, tokens = _login(client)
+    client.post(f"{BASE}/logout-all", headers={"Authorization": f"Bearer {tokens['access_token']}"})
+
+    # TestClient อ่าน response จนจบก่อนคืน => stream ไม่รู้จบต้องอ่าน body_iterator เอง
+    async def first_chunks(n):
+        resp = await revocation_stream(cursor=None, last_event_id=str(cursor))
+        assert resp.media_type == "text/event-stream"
+        chunks = [await anext(resp.body_iterator) for _ in range(n)]
+        await resp.body_iterator.aclose()
+        return chunks
+
+    ready, event = asyncio.run(first_chunks(2))
+    assert ready.startswith(f"id: {cursor}\nevent: ready\n")
+    lines = event.strip().split("\n")
+    payload = json.loads(lines[2][len("data: "):])
+    assert lines[:2] == [f"id: {payload['id']}", "event: revocation"]
+    assert payload["reason"] == "logout_all" and payload["id"] > cursor
+
+
+def test_feed_needs_its_own_key(client, monkeypatch):
+    monkeypatch.setattr(settings, "REVOCATION_FEED_KEY", FEED_KEY)
+    monkeypatch.setattr(settings, "ADMIN_KEY", "admin-test")
+
+    assert client.get(FEED, headers={"x-revocation-key": FEED_KEY}).status_code == 200
+    assert client.get(FEED).status_code == 404
+    assert client.get(f"{FEED}/stream", headers={"x-revocation-key": "wrong"}).status_code == 404
+    # admin key ไม่เปิด feed, feed key ไม่เปิด /admin
+    assert client.get(FEED, headers={"x-admin-key": "admin-test"}).status_code == 404
+    assert client.get("/api/v1/admin/revocations/feed", headers={"x-admin-key": FEED_KEY}).status_code == 404
+
+
+def _row(event_id, age_seconds):
+    now = datetime.now(timezone.utc)
+    return {
+        "id": event_id,
+        "created_at": now - timedelta(seconds=age_seconds),
+        "user_id": 1,
+        "session_id": None,
+        "not_before": now,
+        "reason": "logout_all",
+    }
+
+
+def test_feed_waits_for_fresh_gaps_and_skips_old_ones():
+    feed = RevocationFeed(settle_seconds=5, buffer_size=3)
+    feed._head = feed._floor = 0
+
+    # id 2 ยังไม่ commit (แถว 3 เพิ่งเขียน) => หยุดที่ 1
+    assert feed._accept([_row(1, 0), _row(3, 0)]) == 1
+    assert feed.head == 1
+    # เกิน settle แล้ว => ถือว่า rollback, ข้ามไป
+    assert feed._accept([_row(3, 10)]) == 1
+    assert feed.metrics()["gaps_skipped"] == 1
+    assert [e["id"] for e in feed.events_after(0, 10)] == [1, 3]
+
+    # buffer เต็ม => cursor ที่เก่ากว่า floor ต้อง catch-up จากตาราง
+    feed._accept([_row(4, 0), _row(5, 0)])
+    assert feed.events_after(0, 10) is None
+    assert [e["id"] for e in feed.events_after(3, 10)] == [4, 5]
+
+
+def test_not_before_rounds_up_to_the_next_second():
+    row = {"id": 1, "user_id": 1, "session_id": None, "reason": "logout_all"}
+    revoked_at = datetime(2026, 1, 1, 12, 0, 0, 200000, tzinfo=timezone.utc)
+    iat = int(revoked_at.replace(microsecond=0).timestamp())  # token ออกก่อนหน้าในวินาทีเดียวกัน
+    assert event_payload({**row, "not_before": revoked_at})["not_before"] == iat + 1
+    assert event_payload({**row, "not_before": revoked_at.replace(microsecond=0)})["not_before"] == iat
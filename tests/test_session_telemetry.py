@@ -0,0 +1,65 @@
+# tests/test_session_telemetry.py
+import secrets
+
+from app.core.telemetry import SessionTelemetryBuffer
+from app.models.refresh_token import RefreshToken
+
+
+BASE = "/api/v1/auth"
+
+
+def _login(client, device_id="dev1"):
+    email = f"u_{secrets.token_hex(4)}@a.com"
+    client.post(f"{BASE}/register", json={"email": email, "password": "abcd1234"})
+    r = client.post(f"{BASE}/login", json={"email": email, "password": "abcd1234", "device_id": device_id})
+    assert r.status_code == 200, r.text
+    return r.json()
+
+
+def test_buffer_coalesces_and_flushes_one_batch(client, db, SessionLocal):
+    tokens = _login(client, device_id="tele-1")
+    rt = db.query(RefreshToken).filter(RefreshToken.session_id == "tele-1").one()
+    logged_in_at = rt.last_used_at  # login นับเป็นการใช้ session (LRU)
+
+    buf = SessionTelemetryBuffer(session_factory=SessionLocal, max_pending=10)
+    for _ in range(5):
+        buf.touch(rt.user_id, "tele-1", ip="10.0.0.1", user_agent="ua/1")
+    buf.touch(rt.user_id, "tele-other")
+
+    assert buf.flush() == 2
+    m = buf.metrics()
+    assert m["touches"] == 6
+    assert m["coalesced"] == 4
+    assert m["flush_batches"] == 1
+    assert m["writes_saved"] == 5
+    assert m["pending"] == 0
+
+    db.expire_all()
+    rt = db.get(RefreshToken, rt.id)
+    assert rt.last_used_at > logged_in_at
+    assert rt.ip == "10.0.0.1"
+    assert tokens["access_token"]
+
+
+def test_buffer_is_bounded():
+    buf = SessionTelemetryBuffer(session_factory=None, max_pending=2)
+    buf.touch(1, "a")
+    buf.touch(2, "b")
+    buf.touch(3, "c")  # เต็ม => drop ไม่เขียน DB บน request path
+    buf.touch(1, "a")  # key เดิมยัง coalesce ได้
+
+    m = buf.metrics()
+    assert m["pending"] == 2
+    assert m["dropped"] == 1
+    assert m["coalesced"] == 1
+
+
+def test_verify_touches_session_not_db(client):
+    tokens = _login(client, device_id="tele-2")
+
+    before = client.get("/api/v1/admin/session-telemetry").json()["touches"]
+    r = client.get(f"{BASE}/verify", headers={"Authorization": f"Bearer {tokens['access_token']}"})
+    assert r.status_code == 200, r.text
+
+    after = client.get("/api/v1/admin/session-telemetry").json()
+    assert after["touches"] == before + 1
@@ -0,0 +1,72 @@
+# tests/test_sessions.py
+import secrets
+
+from sqlalchemy import select
+
+from app.core.config import settings
+from app.crud.revocation_event import latest_id, list_after
+from app.crud.user import get_user_by_email
+from app.models.refresh_token import RefreshToken
+
+
+BASE = "/api/v1/auth"
+
+
+def _register(client) -> str:
+    email = f"u_{secrets.token_hex(4)}@a.com"
+    client.post(f"{BASE}/register", json={"email": email, "password": "abcd1234"})
+    return email
+
+
+def _login(client, email, device_id=None) -> dict:
+    body = {"email": email, "password": "abcd1234"}
+    if device_id:
+        body["device_id"] = device_id
+    r = client.post(f"{BASE}/login", json=body)
+    assert r.status_code == 200, r.text
+    return r.json()
+
+
+def _live(db, user_id):
+    db.expire_all()
+    return db.execute(
+        select(RefreshToken.session_id).where(RefreshToken.user_id == user_id, RefreshToken.revoked_at.is_(None))
+    ).scalars().all()
+
+
+def test_login_same_device_rotates_in_place(client, db):
+    email = _register(client)
+    first = _login(client, email, "phone")
+    second = _login(client, email, "phone")
+    user_id = get_user_by_email(db, email).id
+
+    rows = db.execute(select(RefreshToken).where(RefreshToken.user_id == user_id)).scalars().all()
+    assert [r.session_id for r in rows] == ["phone"]
+
+    # token เก่าของ device ใช้ไม่ได้แล้ว, token ใหม่ใช้ได้
+    r = client.post(f"{BASE}/refresh-access-token", json={"refresh_token": first["refresh_token"]})
+    assert r.status_code == 401
+    r = client.post(f"{BASE}/refresh-access-token", json={"refresh_token": second["refresh_token"]})
+    assert r.status_code == 200, r.text
+
+
+def test_live_sessions_capped_by_lru(client, db, monkeypatch):
+    monkeypatch.setattr(settings, "REFRESH_SESSIONS_PER_USER_MAX", 3)
+    email = _register(client)
+    for device in ("d1", "d2", "d3"):
+        _login(client, email, device)
+    user_id = get_user_by_email(db, email).id
+
+    # d2 ไม่ได้ใช้นานที่สุด => ถูก evict ก่อน (ไม่ใช่ d1 ที่ login ก่อน)
+    rows = {r.session_id: r for r in db.execute(select(RefreshToken).where(RefreshToken.user_id == user_id)).scalars()}
+    rows["d2"].last_used_at = rows["d3"].last_used_at.replace(year=2000)
+    db.commit()
+
+    head = latest_id(db)
+    _login(client, email, "d4")
+    assert sorted(_live(db, user_id)) == ["d1", "d3", "d4"]
+    # evict = revoke: ต้องออกใน revocation feed เหมือน logout
+    assert [(e["session_id"], e["reason"]) for e in list_after(db, head)] == [("d2", "session_evict")]
+
+    _login(client, email)  # ไม่มี device_id => session ใหม่
+    assert len(_live(db, user_id)) == 3
@@ -0,0 +1,167 @@
+# tests/test_sharding.py
+import secrets
+
+import pytest
+from sqlalchemy import create_engine, func, select
+
+from app.api.deps import get_db
+from app.db.base import Base
+from app.db.sharding import ShardDirectory, sharded_sessionmaker
+from app.main import app as fastapi_app
+from app.models.refresh_token import RefreshToken
+from app.models.user import User
+from app.models.user_shard import UserShard
+from app.tools.reshard import move_user
+from tests.support.faultdb import FaultInjector
+
+
+BASE = "/api/v1/auth"
+
+
+def _use_sharded(tmp_path, faults: FaultInjector | None = None):
+    # directory + 2 shards = SQLite 3 ไฟล์ (ตารางครบทุกไฟล์เหมือนรัน migration ทุก DB)
+    def make(name):
+        path = str(tmp_path / f"{name}.db")
+        if faults is not None and name != "directory":
+            engine = faults.create_sqlite_engine(path)
+        else:
+            engine = create_engine(f"sqlite+pysqlite:///{path}", connect_args={"check_same_thread": False})
+        Base.metadata.create_all(engine)
+        return engine
+
+    directory_engine = make("directory")
+    shards = {"shard-0": make("shard0"), "shard-1": make("shard1")}
+    directory = ShardDirectory(directory_engine, list(shards))
+    ShardedSession = sharded_sessionmaker(directory_engine, shards, directory, autoflush=False)
+
+    def override_get_db():
+        db = ShardedSession()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    fastapi_app.dependency_overrides[get_db] = override_get_db  # client fixture ล้าง override ให้ตอนจบ
+    return directory, shards
+
+
+@pytest.fixture()
+def sharded(client, tmp_path):
+    directory, shards = _use_sharded(tmp_path)
+    yield directory, shards
+    for engine in [directory.engine, *shards.values()]:
+        engine.dispose()
+
+
+def _count(engine, model, **where):
+    stmt = select(func.count()).select_from(model)
+    for k, v in where.items():
+        stmt = stmt.where(getattr(model, k) == v)
+    with engine.connect() as conn:
+        return conn.execute(stmt).scalar()
+
+
+def _register_login(client, email):
+    r = client.post(f"{BASE}/register", json={"email": email, "password": "abcd1234"})
+    assert r.status_code == 200, r.text
+    r = client.post(f"{BASE}/login", json={"email": email, "password": "abcd1234"})
+    assert r.status_code == 200, r.text
+    return r.json()
+
+
+def test_users_and_tokens_live_on_their_shard(client, sharded):
+    directory, shards = sharded
+    emails = [f"u{i}_{secrets.token_hex(3)}@a.com" for i in range(6)]
+    for email in emails:
+        tokens = _register_login(client, email)
+
+    # user_id ไม่ซ้ำข้าม shard และ directory ชี้ถูก shard
+    with directory.engine.connect() as conn:
+        entries = conn.execute(select(UserShard.user_id, UserShard.shard)).all()
+    assert len({uid for uid, _ in entries}) == 6
+    for user_id, shard in entries:
+        other = "shard-1" if shard == "shard-0" else "shard-0"
+        assert _count(shards[shard], User, id=user_id) == 1
+        assert _count(shards[other], User, id=user_id) == 0
+        assert _count(shards[shard], RefreshToken, user_id=user_id) == 1
+    assert _count(directory.engine, User) == 0
+
+    r = client.get(f"{BASE}/verify", headers={"Authorization": f"Bearer {tokens['access_token']}"})
+    assert r.status_code == 200 and r.json()["email"] == emails[-1]
+
+    r = client.post(f"{BASE}/refresh-access-token", json={"refresh_token": tokens["refresh_token"]})
+    assert r.status_code == 200, r.text
+    r = client.post(f"{BASE}/logout", json={"refresh_token": r.json()["refresh_token"]})
+    assert r.status_code == 200
+
+    # reset token: ไม่มี hint => ค้นทุก shard
+    r = client.post(f"{BASE}/forgot-password", json={"email": emails[0]})
+    r = client.post(f"{BASE}/reset-password", json={"token": r.json()["reset_token"], "new_password": "newpass123"})
+    assert r.status_code == 200, r.text
+    r = client.post(f"{BASE}/login", json={"email": emails[0], "password": "newpass123"})
+    assert r.status_code == 200, r.text
+
+
+def test_reshard_moves_user_with_live_sessions(client, sharded):
+    directory, shards = sharded
+    email = f"m_{secrets.token_hex(3)}@a.com"
+    tokens = _register_login(client, email)
+    user_id, source = directory.lookup_email(email)
+    target = "shard-1" if source == "shard-0" else "shard-0"
+
+    result = move_user(directory, shards, user_id, target, drain_seconds=0)
+    assert result.moved and result.refresh_tokens == 1
+
+    assert directory.lookup_email(email) == (user_id, target)
+    assert _count(shards[source], User, id=user_id) == 0
+    assert _count(shards[source], RefreshToken, user_id=user_id) == 0
+    assert _count(shards[target], RefreshToken, user_id=user_id) == 1
+
+    # refresh token ที่ออกก่อนย้ายยังใช้ได้ และ rotate ที่ shard ใหม่
+    r = client.post(f"{BASE}/refresh-access-token", json={"refresh_token": tokens["refresh_token"]})
+    assert r.status_code == 200, r.text
+    assert _count(shards[target], RefreshToken, user_id=user_id) == 2
+
+    # ย้ายซ้ำไปที่เดิม = no-op
+    assert not move_user(directory, shards, user_id, target, drain_seconds=0).moved
+
+
+def test_reshard_merges_writes_made_during_drain(client, sharded):
+    directory, shards = sharded
+    email = f"d_{secrets.token_hex(3)}@a.com"
+    _register_login(client, email)
+    user_id, source = directory.lookup_email(email)
+    target = "shard-1" if source == "shard-0" else "shard-0"
+
+    def stale_worker_writes(_seconds):
+        # worker ที่ cache ยังชี้ source: revoke session ที่ source ระหว่างรอ
+        with shards[source].begin() as conn:
+            conn.execute(RefreshToken.__table__.update().where(RefreshToken.user_id == user_id).values(revoked_at=func.now()))
+
+    move_user(directory, shards, user_id, target, sleep=stale_worker_writes)
+
+    with shards[target].connect() as conn:
+        revoked = conn.execute(select(RefreshToken.revoked_at).where(RefreshToken.user_id == user_id)).scalar()
+    assert revoked is not None
+
+
+def test_failed_shard_write_releases_directory_reservation(client, tmp_path):
+    faults = FaultInjector()
+    directory, shards = _use_sharded(tmp_path, faults)
+    emails = [f"f{i}_{secrets.token_hex(3)}@a.com" for i in range(6)]
+
+    # shard ล่มตอน COMMIT / INSERT หลัง directory จองไปแล้ว: email ต้องไม่ค้างใน directory
+    # (หลาย email: ลำดับ commit ข้าม connection ของ Session ไม่แน่นอน)
+    for fault in ("commit_drop_rate", "drop_rate"):
+        setattr(faults.config, fault, 1.0)
+        for email in emails:
+            with pytest.raises(Exception):
+                client.post(f"{BASE}/register", json={"email": email, "password": "abcd1234"})
+        setattr(faults.config, fault, 0.0)
+        assert [directory.lookup_email(email) for email in emails] == [None] * len(emails)
+
+    _register_login(client, emails[0])
+    user_id, shard = directory.lookup_email(emails[0])
+    assert _count(shards[shard], User, id=user_id) == 1
+    for engine in [directory.engine, *shards.values()]:
+        engine.dispose()
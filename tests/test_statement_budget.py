@@ -0,0 +1,129 @@
+# tests/test_statement_budget.py
+"""
+Statement / round-trip budget ต่อ endpoint: กัน N+1 และ commit ซ้ำซ้อนกลับมา
+ตัวเลขคือจำนวนสูงสุดที่ยอมได้ (ถ้าลดได้ให้ลดตัวเลขตามด้วย)
+
+endpoint ที่ hash password มี commit เพิ่ม 1 ครั้ง: release_connection() ปิด read
+transaction เพื่อคืน connection ให้ pool ระหว่าง bcrypt
+"""
+import secrets
+
+import pytest
+
+from app.db.stats import StatementCounter
+
+
+BASE = "/api/v1/auth"
+
+
+def _auth_headers(access_token: str) -> dict:
+    return {"Authorization": f"Bearer {access_token}"}
+
+
+@pytest.fixture()
+def user(client):
+    email = f"u_{secrets.token_hex(4)}@a.com"
+    password = "abcd1234"
+    client.post(f"{BASE}/register", json={"email": email, "password": password})
+    tokens = client.post(f"{BASE}/login", json={"email": email, "password": password, "device_id": "dev1"}).json()
+    return {"email": email, "password": password, "tokens": tokens}
+
+
+def _assert_budget(c: StatementCounter, statements: int, commits: int):
+    assert c.statements_count <= statements, c.report()
+    assert c.commits <= commits, c.report()
+    assert c.round_trips <= statements + commits, c.report()
+
+
+def test_register_budget(client, engine):
+    with StatementCounter(engine) as c:
+        r = client.post(f"{BASE}/register", json={"email": f"u_{secrets.token_hex(4)}@a.com", "password": "abcd1234"})
+    assert r.status_code == 200, r.text
+    # SELECT email, INSERT user, SELECT (โหลด server defaults ให้ UserOut)
+    _assert_budget(c, statements=3, commits=2)
+
+
+def test_login_budget(client, engine, user):
+    with StatementCounter(engine) as c:
+        r = client.post(f"{BASE}/login", json={"email": user["email"], "password": user["password"]})
+    assert r.status_code == 200, r.text
+    # SELECT user, INSERT refresh_token, SELECT LRU เกิน cap (UPDATE + event เฉพาะเมื่อเกินจริง)
+    _assert_budget(c, statements=3, commits=2)
+
+
+def test_login_same_device_budget(client, engine, user):
+    with StatementCounter(engine) as c:
+        r = client.post(f"{BASE}/login", json={"email": user["email"], "password": user["password"], "device_id": "dev1"})
+    assert r.status_code == 200, r.text
+    # SELECT user, UPDATE refresh_token (rotate in place)
+    _assert_budget(c, statements=2, commits=2)
+
+
+def test_verify_budget(client, engine, user):
+    with StatementCounter(engine) as c:
+        r = client.get(f"{BASE}/verify", headers=_auth_headers(user["tokens"]["access_token"]))
+    assert r.status_code == 200, r.text
+    _assert_budget(c, statements=1, commits=0)
+
+
+def test_refresh_budget(client, engine, user):
+    with StatementCounter(engine) as c:
+        r = client.post(f"{BASE}/refresh-access-token", json={"refresh_token": user["tokens"]["refresh_token"]})
+    assert r.status_code == 200, r.text
+    # SELECT token, SELECT user, UPDATE old token, INSERT new token
+    _assert_budget(c, statements=4, commits=1)
+
+
+def test_logout_budget(client, engine, user):
+    with StatementCounter(engine) as c:
+        r = client.post(f"{BASE}/logout", json={"refresh_token": user["tokens"]["refresh_token"]})
+    assert r.status_code == 200, r.text
+    # SELECT token, UPDATE token, INSERT revocation_event
+    _assert_budget(c, statements=3, commits=1)
+
+
+def test_logout_all_budget(client, engine, user):
+    with StatementCounter(engine) as c:
+        r = client.post(f"{BASE}/logout-all", headers=_auth_headers(user["tokens"]["access_token"]))
+    assert r.status_code == 200, r.text
+    assert r.json()["revoked"] == 1
+    # SELECT user, UPDATE ... (rowcount แทน COUNT), INSERT revocation_event
+    _assert_budget(c, statements=3, commits=1)
+
+
+def test_change_password_budget(client, engine, user):
+    with StatementCounter(engine) as c:
+        r = client.post(
+            f"{BASE}/change-password",
+            json={"old_password": user["password"], "new_password": "zzzz9999"},
+            headers=_auth_headers(user["tokens"]["access_token"]),
+        )
+    assert r.status_code == 200, r.text
+    # SELECT user, UPDATE refresh_tokens, UPDATE users, INSERT revocation_event
+    _assert_budget(c, statements=4, commits=2)
+
+
+def test_forgot_and_reset_password_budget(client, engine, user):
+    with StatementCounter(engine) as c:
+        r = client.post(f"{BASE}/forgot-password", json={"email": user["email"]})
+    assert r.status_code == 200, r.text
+    _assert_budget(c, statements=2, commits=1)
+
+    with StatementCounter(engine) as c:
+        r = client.post(f"{BASE}/reset-password", json={"token": r.json()["reset_token"], "new_password": "zzzz9999"})
+    assert r.status_code == 200, r.text
+    # SELECT reset row, SELECT user, UPDATE refresh_tokens, UPDATE users, UPDATE reset row,
+    # INSERT revocation_event
+    _assert_budget(c, statements=6, commits=2)
+
+
+def test_admin_bulk_budget_does_not_grow_with_users(client, engine):
+    emails = [f"bulk_{secrets.token_hex(4)}@a.com" for _ in range(20)]
+    for email in emails:
+        client.post(f"{BASE}/register", json={"email": email, "password": "abcd1234"})
+    with StatementCounter(engine) as c:
+        r = client.post("/api/v1/admin/users/bulk", json={"action": "deactivate", "emails": emails})
+    assert r.status_code == 200, r.text
+    assert r.json()["users_updated"] == 20
+    # ต่อ chunk: SELECT ids, UPDATE users, UPDATE refresh_tokens, INSERT revocation_events (executemany)
+    _assert_budget(c, statements=4, commits=1)
@@ -0,0 +1,62 @@
+# tests/test_timing.py
+import secrets
+
+from app.core.config import settings
+from app.core.timing import slow_traces, span, start_trace, format_server_timing
+
+
+BASE = "/api/v1/auth"
+
+
+def test_span_records_into_current_trace():
+    trace = start_trace("GET", "/x")
+    with span("stage.a"):
+        pass
+    trace.finish(200)
+
+    assert [name for name, _ in trace.spans] == ["stage.a"]
+    assert format_server_timing(trace).startswith("stage.a;dur=")
+
+
+def test_login_server_timing_header_with_admin_key(client, monkeypatch):
+    monkeypatch.setattr(settings, "ADMIN_KEY", "k-test")
+    email = f"u_{secrets.token_hex(4)}@a.com"
+    client.post(f"{BASE}/register", json={"email": email, "password": "abcd1234"})
+
+    # ไม่มี key -> ไม่มี header
+    r = client.post(f"{BASE}/login", json={"email": email, "password": "abcd1234"})
+    assert r.status_code == 200, r.text
+    assert "server-timing" not in r.headers
+
+    r = client.post(
+        f"{BASE}/login",
+        json={"email": email, "password": "abcd1234"},
+        headers={"x-admin-key": "k-test"},
+    )
+    assert r.status_code == 200, r.text
+    timing = r.headers["server-timing"]
+    for stage in ("db.get_user_by_email", "security.verify_password", "tokens.create_access_token",
+                  "db.save_refresh", "db.commit", "total"):
+        assert f"{stage};dur=" in timing
+
+
+def test_slow_traces_admin_endpoint(client, monkeypatch):
+    monkeypatch.setattr(settings, "SLOW_REQUEST_MS", 0.0)
+    slow_traces.clear()
+
+    client.get("/health")
+
+    r = client.get("/api/v1/admin/traces/slow")
+    assert r.status_code == 200, r.text
+    items = r.json()["items"]
+    assert any(t["path"] == "/health" for t in items)
+
+
+def test_admin_requires_key_when_configured(client, monkeypatch):
+    monkeypatch.setattr(settings, "ADMIN_KEY", "k-test")
+
+    r = client.get("/api/v1/admin/traces/slow")
+    assert r.status_code == 404, r.text
+
+    r = client.get("/api/v1/admin/traces/slow", headers={"x-admin-key": "k-test"})
+    assert r.status_code == 200, r.text
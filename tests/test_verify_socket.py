@@ -0,0 +1,89 @@
+# tests/test_verify_socket.py
+import asyncio
+import os
+import secrets
+import socket
+import struct
+import threading
+
+import pytest
+
+from app.api.verify_socket import BAD_REQUEST, INACTIVE, OK, UNAUTHORIZED, VerifyClient, VerifySocketServer
+from app.core.tokens import create_access_token
+
+
+BASE = "/api/v1/auth"
+
+
+@pytest.fixture()
+def loop():
+    loop = asyncio.new_event_loop()
+    thread = threading.Thread(target=loop.run_forever, daemon=True)
+    thread.start()
+    yield loop
+    loop.call_soon_threadsafe(loop.stop)
+    thread.join(5)
+    loop.close()
+
+
+def _run(loop, coro):
+    return asyncio.run_coroutine_threadsafe(coro, loop).result(5)
+
+
+@pytest.fixture()
+def server(loop, tmp_path, SessionLocal):
+    srv = VerifySocketServer(str(tmp_path / "verify.sock"), session_factory=SessionLocal)
+    assert _run(loop, srv.start())
+    yield srv
+    _run(loop, srv.stop())
+
+
+def test_pipelined_requests_answer_in_order(client, server):
+    email = f"vs_{secrets.token_hex(4)}@a.com"
+    client.post(f"{BASE}/register", json={"email": email, "password": "abcd1234"})
+    tokens = client.post(f"{BASE}/login", json={"email": email, "password": "abcd1234", "device_id": "d1"}).json()
+    user_id = client.get(f"{BASE}/verify", headers={"Authorization": f"Bearer {tokens['access_token']}"}).json()["user_id"]
+
+    with VerifyClient(server.path) as c:
+        results = c.verify_many([
+            tokens["access_token"],
+            "not-a-jwt",
+            tokens["refresh_token"],
+            create_access_token("999999"),
+            tokens["access_token"],
+        ])
+
+    assert [r.status for r in results] == [OK, UNAUTHORIZED, UNAUTHORIZED, INACTIVE, OK]
+    assert (results[0].user_id, results[0].email, results[0].session_id) == (user_id, email, "d1")
+    assert results[2].detail == "Invalid token type"
+    assert server.metrics()["requests"] == 5
+
+
+def test_oversized_frame_is_rejected_and_closed(server):
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as s:
+        s.settimeout(5)
+        s.connect(server.path)
+        s.sendall(struct.pack(">I", server.max_frame + 1) + b"x" * 16)
+        data = b""
+        while chunk := s.recv(4096):
+            data += chunk
+    (n,) = struct.unpack_from(">I", data)
+    assert data[4] == BAD_REQUEST and data[5:4 + n] == b"Frame too large"
+
+
+def test_second_worker_skips_a_live_socket(loop, server):
+    other = VerifySocketServer(server.path)
+    assert _run(loop, other.start()) is False
+    assert not other.serving
+
+    # ตัดสินด้วย lock ไม่ใช่ไฟล์ socket: แม้ path หายไป worker อื่นก็ไม่ bind ซ้อน
+    os.unlink(server.path)
+    assert _run(loop, other.start()) is False
+
+    # socket ค้าง (ไม่มีใคร listen) => worker ถัดไป bind แทนได้
+    _run(loop, server.stop())
+    stale = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    stale.bind(server.path)
+    stale.close()
+    assert _run(loop, other.start()) is True
+    _run(loop, other.stop())
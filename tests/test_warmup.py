@@ -0,0 +1,63 @@
+# tests/test_warmup.py
+import json
+import os
+import subprocess
+import sys
+
+from sqlalchemy import create_engine
+from sqlalchemy.pool import QueuePool
+
+from app.core import warmup as warmup_module
+from app.core.warmup import warm_pool, warmup
+
+
+IMPORT_BUDGET_SECONDS = 3.0  # ~1.2s บนเครื่อง dev; เกินนี้ = มี import หนักหลุดเข้ามา
+
+_PROBE = """
+import json, sys, threading, time
+start = time.perf_counter()
+import app.main
+elapsed = time.perf_counter() - start
+from app.db.session import engine
+print(json.dumps({
+    "elapsed": elapsed,
+    "modules": [m for m in ("smtplib", "pstats", "app.tools.replay") if m in sys.modules],
+    "connections": engine.pool.checkedin() + engine.pool.checkedout(),
+    "threads": threading.active_count(),
+}))
+"""
+
+
+def test_import_is_lean_and_preload_safe():
+    # process ใหม่: sys.modules สะอาด (ไม่โดน test อื่น import ไว้ก่อน)
+    out = subprocess.run([sys.executable, "-c", _PROBE], env=os.environ, capture_output=True, text=True, timeout=60)
+    assert out.returncode == 0, out.stderr
+    probe = json.loads(out.stdout.splitlines()[-1])
+    assert probe["elapsed"] < IMPORT_BUDGET_SECONDS, probe
+    assert probe["modules"] == []
+    # gunicorn --preload: master import แล้ว fork => ห้ามมี connection / thread ตอน import
+    assert probe["connections"] == 0 and probe["threads"] == 1
+
+
+def test_health_is_503_until_warmed_up(client, monkeypatch):
+    assert client.get("/health").status_code == 200
+
+    monkeypatch.setattr(warmup, "ready", False)
+    r = client.get("/health")
+    assert r.status_code == 503 and r.json()["status"] == "starting"
+
+    monkeypatch.setattr(warmup, "ready", True)
+    m = client.get("/api/v1/admin/warmup").json()
+    assert m["connections"]["primary"] == warmup.pool_connections
+    assert {"prime", "pool.primary"} <= set(m["timings_ms"]) and m["errors"] == {}
+
+
+def test_warm_pool_after_fork_drops_inherited_connections(tmp_path, monkeypatch):
+    eng = create_engine(f"sqlite:///{tmp_path / 'w.db'}", poolclass=QueuePool, pool_size=3)
+    inherited = eng.connect()  # เหมือนเปิดไว้ใน master ก่อน fork
+    monkeypatch.setattr(warmup_module, "_IMPORT_PID", -1)
+
+    assert warm_pool(eng, 3) == 3
+    assert eng.pool.checkedin() == 3 and eng.pool.checkedout() == 0
+    inherited.close()
+    eng.dispose()